@@ -0,0 +1,76 @@
+"""actor_activity_streams
+
+Revision ID: e5f6a7b8c9d0
+Revises: d4e5f6a7b8c9
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "e5f6a7b8c9d0"
+down_revision: Union[str, Sequence[str], None] = "d4e5f6a7b8c9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "actor_events",
+        sa.Column("actor_id", sa.Integer(), nullable=False),
+        sa.Column("user_title_id", sa.Integer(), nullable=True),
+        sa.Column("type", sa.String(length=50), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["actor_id"],
+            ["users.id"],
+            name=op.f("fk_actor_events_actor_id_users"),
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_title_id"],
+            ["user_titles.id"],
+            name=op.f("fk_actor_events_user_title_id_user_titles"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_actor_events")),
+    )
+    op.create_index(
+        "ix_actor_events_actor_id_created_at",
+        "actor_events",
+        ["actor_id", "created_at"],
+        unique=False,
+    )
+
+    op.create_table(
+        "notification_cursors",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("read_at", sa.DateTime(), nullable=True),
+        sa.Column("cleared_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name=op.f("fk_notification_cursors_user_id_users"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("user_id", name=op.f("pk_notification_cursors")),
+    )
+
+    # Follower counts and fan-out filter subscriptions by the followed user
+    op.create_index(
+        op.f("ix_subscriptions_following_id"),
+        "subscriptions",
+        ["following_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_subscriptions_following_id"), table_name="subscriptions")
+    op.drop_table("notification_cursors")
+    op.drop_index("ix_actor_events_actor_id_created_at", table_name="actor_events")
+    op.drop_table("actor_events")
@@ -0,0 +1,59 @@
+"""user_follow_counters
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5f6a7b8c9d0
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "f6a7b8c9d0e1"
+down_revision: Union[str, Sequence[str], None] = "e5f6a7b8c9d0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("followers_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "users",
+        sa.Column("following_count", sa.Integer(), server_default="0", nullable=False),
+    )
+
+    # Backfill from the existing social graph
+    op.execute(
+        """
+        UPDATE users u
+        SET followers_count = c.n
+        FROM (
+            SELECT following_id AS user_id, count(*) AS n
+            FROM subscriptions
+            GROUP BY following_id
+        ) c
+        WHERE u.id = c.user_id
+        """
+    )
+    op.execute(
+        """
+        UPDATE users u
+        SET following_count = c.n
+        FROM (
+            SELECT follower_id AS user_id, count(*) AS n
+            FROM subscriptions
+            GROUP BY follower_id
+        ) c
+        WHERE u.id = c.user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "following_count")
+    op.drop_column("users", "followers_count")
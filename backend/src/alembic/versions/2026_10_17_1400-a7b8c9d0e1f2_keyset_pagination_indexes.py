@@ -0,0 +1,104 @@
+"""keyset_pagination_indexes
+
+Revision ID: a7b8c9d0e1f2
+Revises: f6a7b8c9d0e1
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "a7b8c9d0e1f2"
+down_revision: Union[str, Sequence[str], None] = "f6a7b8c9d0e1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("UPDATE subscriptions SET created_at = now() WHERE created_at IS NULL")
+    op.alter_column(
+        "subscriptions",
+        "created_at",
+        existing_type=sa.DateTime(timezone=True),
+        nullable=False,
+    )
+
+    # Superseded by the (following_id, created_at, follower_id) index
+    op.drop_index(op.f("ix_subscriptions_following_id"), table_name="subscriptions")
+    op.create_index(
+        "ix_subscriptions_following_id_created_at",
+        "subscriptions",
+        ["following_id", "created_at", "follower_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_subscriptions_follower_id_created_at",
+        "subscriptions",
+        ["follower_id", "created_at", "following_id"],
+        unique=False,
+    )
+
+    op.create_index(
+        "ix_notifications_recipient_id_created_at",
+        "notifications",
+        ["recipient_id", "created_at", "id"],
+        unique=False,
+    )
+    op.drop_index("ix_actor_events_actor_id_created_at", table_name="actor_events")
+    op.create_index(
+        "ix_actor_events_actor_id_created_at",
+        "actor_events",
+        ["actor_id", "created_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_user_titles_user_id_updated_at",
+        "user_titles",
+        ["user_id", "updated_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_review_comments_user_title_id_created_at",
+        "review_comments",
+        ["user_title_id", "created_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_review_views_user_title_id_viewed_at",
+        "review_views",
+        ["user_title_id", "viewed_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_review_views_user_title_id_viewed_at", table_name="review_views")
+    op.drop_index(
+        "ix_review_comments_user_title_id_created_at", table_name="review_comments"
+    )
+    op.drop_index("ix_user_titles_user_id_updated_at", table_name="user_titles")
+    op.drop_index("ix_actor_events_actor_id_created_at", table_name="actor_events")
+    op.create_index(
+        "ix_actor_events_actor_id_created_at",
+        "actor_events",
+        ["actor_id", "created_at"],
+        unique=False,
+    )
+    op.drop_index("ix_notifications_recipient_id_created_at", table_name="notifications")
+    op.drop_index("ix_subscriptions_follower_id_created_at", table_name="subscriptions")
+    op.drop_index("ix_subscriptions_following_id_created_at", table_name="subscriptions")
+    op.create_index(
+        op.f("ix_subscriptions_following_id"),
+        "subscriptions",
+        ["following_id"],
+        unique=False,
+    )
+    op.alter_column(
+        "subscriptions",
+        "created_at",
+        existing_type=sa.DateTime(timezone=True),
+        nullable=True,
+    )
@@ -0,0 +1,58 @@
+"""user_stats_rollups
+
+Revision ID: b8c9d0e1f2a3
+Revises: a7b8c9d0e1f2
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "b8c9d0e1f2a3"
+down_revision: Union[str, Sequence[str], None] = "a7b8c9d0e1f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_stats_rollups",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("year", sa.SmallInteger(), nullable=False),
+        sa.Column("month", sa.SmallInteger(), nullable=False),
+        sa.Column("dimension", sa.String(length=16), nullable=False),
+        sa.Column("key", sa.String(length=255), nullable=False),
+        sa.Column("count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("score_sum", sa.Float(), server_default="0", nullable=False),
+        sa.Column("score_count", sa.Integer(), server_default="0", nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name=op.f("fk_user_stats_rollups_user_id_users"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint(
+            "user_id",
+            "year",
+            "month",
+            "dimension",
+            "key",
+            name=op.f("pk_user_stats_rollups"),
+        ),
+    )
+    # Bucket recomputes select one user's month of finished titles
+    op.create_index(
+        "ix_user_titles_user_id_finished_at",
+        "user_titles",
+        ["user_id", "finished_at"],
+        unique=False,
+    )
+    # Backfill with: python src/scripts/rebuild_stats_rollups.py
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_titles_user_id_finished_at", table_name="user_titles")
+    op.drop_table("user_stats_rollups")
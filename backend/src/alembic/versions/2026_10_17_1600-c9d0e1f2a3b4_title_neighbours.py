@@ -0,0 +1,45 @@
+"""title_neighbours
+
+Revision ID: c9d0e1f2a3b4
+Revises: b8c9d0e1f2a3
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "c9d0e1f2a3b4"
+down_revision: Union[str, Sequence[str], None] = "b8c9d0e1f2a3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "title_neighbours",
+        sa.Column("title_id", sa.Integer(), nullable=False),
+        sa.Column("rank", sa.SmallInteger(), nullable=False),
+        sa.Column("neighbour_id", sa.Integer(), nullable=False),
+        sa.Column("similarity", sa.REAL(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["title_id"],
+            ["titles.id"],
+            name=op.f("fk_title_neighbours_title_id_titles"),
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["neighbour_id"],
+            ["titles.id"],
+            name=op.f("fk_title_neighbours_neighbour_id_titles"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("title_id", "rank", name=op.f("pk_title_neighbours")),
+    )
+    # Fill with: python src/scripts/build_title_neighbours.py
+
+
+def downgrade() -> None:
+    op.drop_table("title_neighbours")
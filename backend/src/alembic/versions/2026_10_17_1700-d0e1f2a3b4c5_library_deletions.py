@@ -0,0 +1,79 @@
+"""library_deletions
+
+Revision ID: d0e1f2a3b4c5
+Revises: c9d0e1f2a3b4
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "d0e1f2a3b4c5"
+down_revision: Union[str, Sequence[str], None] = "c9d0e1f2a3b4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "library_deletions",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("title_id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=16), nullable=False),
+        sa.Column("season_number", sa.Integer(), nullable=True),
+        sa.Column("episode_number", sa.Integer(), nullable=True),
+        sa.Column(
+            "deleted_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name=op.f("fk_library_deletions_user_id_users"),
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["title_id"],
+            ["titles.id"],
+            name=op.f("fk_library_deletions_title_id_titles"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_library_deletions")),
+    )
+    op.create_index(
+        "ix_library_deletions_user_id_deleted_at",
+        "library_deletions",
+        ["user_id", "deleted_at"],
+        unique=False,
+    )
+    # "Changed since" scans of a user's seasons and episodes
+    op.create_index(
+        "ix_user_title_seasons_user_title_id_updated_at",
+        "user_title_seasons",
+        ["user_title_id", "updated_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_user_title_episodes_user_title_season_id_updated_at",
+        "user_title_episodes",
+        ["user_title_season_id", "updated_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_user_title_episodes_user_title_season_id_updated_at",
+        table_name="user_title_episodes",
+    )
+    op.drop_index(
+        "ix_user_title_seasons_user_title_id_updated_at",
+        table_name="user_title_seasons",
+    )
+    op.drop_index(
+        "ix_library_deletions_user_id_deleted_at", table_name="library_deletions"
+    )
+    op.drop_table("library_deletions")
@@ -0,0 +1,42 @@
+"""screenshot_variants
+
+Revision ID: e1f2a3b4c5d6
+Revises: d0e1f2a3b4c5
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "e1f2a3b4c5d6"
+down_revision: Union[str, Sequence[str], None] = "d0e1f2a3b4c5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "title_screenshots",
+        sa.Column("thumbnail_url", sa.String(length=1024), nullable=True),
+    )
+    op.add_column(
+        "title_screenshots",
+        sa.Column("preview_url", sa.String(length=1024), nullable=True),
+    )
+    op.add_column("title_screenshots", sa.Column("width", sa.Integer(), nullable=True))
+    op.add_column("title_screenshots", sa.Column("height", sa.Integer(), nullable=True))
+    op.add_column(
+        "title_screenshots",
+        sa.Column("blurhash", sa.String(length=64), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("title_screenshots", "blurhash")
+    op.drop_column("title_screenshots", "height")
+    op.drop_column("title_screenshots", "width")
+    op.drop_column("title_screenshots", "preview_url")
+    op.drop_column("title_screenshots", "thumbnail_url")
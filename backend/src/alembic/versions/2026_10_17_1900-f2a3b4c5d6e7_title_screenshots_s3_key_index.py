@@ -0,0 +1,30 @@
+"""title_screenshots_s3_key_index
+
+Revision ID: f2a3b4c5d6e7
+Revises: e1f2a3b4c5d6
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "f2a3b4c5d6e7"
+down_revision: Union[str, Sequence[str], None] = "e1f2a3b4c5d6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Reference checks of the storage garbage collector look objects up by key
+    op.create_index(
+        op.f("ix_title_screenshots_s3_key"),
+        "title_screenshots",
+        ["s3_key"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_title_screenshots_s3_key"), table_name="title_screenshots")
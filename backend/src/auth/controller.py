@@ -6,6 +6,7 @@ from litestar import Controller, post, get, Request, Response
 from litestar.di import Provide
 from litestar.params import Body
 from litestar.enums import RequestEncodingType
+from litestar.exceptions import NotFoundException
 from litestar.security.jwt import Token
 
 from src.auth.service import AuthService
@@ -107,5 +108,11 @@ class AuthController(Controller):
         return response
 
     @get("/me")
-    async def get_me(self, request: Request[User, Token, Any]) -> UserResponse:
-        return UserResponse.model_validate(request.user)
+    async def get_me(
+        self, request: Request[User, Token, Any], db_session: AsyncSession
+    ) -> UserResponse:
+        # request.user is the cached principal; the full profile comes from the DB
+        user = await db_session.get(User, request.user.id)
+        if not user:
+            raise NotFoundException(detail="Пользователь не найден")
+        return UserResponse.model_validate(user)
@@ -1,20 +1,19 @@
 from litestar.security.jwt import JWTAuth, Token
-from sqlalchemy import select
-from src.core.models import User
-from core.models.db_helper import db_helper
 from src.core.config import settings
 
+from auth.principal import Principal, get_principal
 
-async def retrieve_user_handler(token: Token, connection) -> User | None:
+
+async def retrieve_user_handler(token: Token, connection) -> Principal | None:
     """Вызывается автоматически при каждом запросе с токеном"""
-    async with db_helper.session_factory() as session:
-        # Получаем ID пользователя из поля 'sub' токена
-        stmt = select(User).where(User.id == int(token.sub))
-        result = await session.execute(stmt)
-        return result.scalar_one_or_none()
+    # Получаем ID пользователя из поля 'sub' токена
+    principal = await get_principal(int(token.sub))
+    if principal is None or not principal.is_active:
+        return None
+    return principal
 
 
-jwt_config = JWTAuth[User](
+jwt_config = JWTAuth[Principal](
     token_secret=settings.auth.JWT_SECRET,
     retrieve_user_handler=retrieve_user_handler,
     auth_header="Authorization",
@@ -0,0 +1,106 @@
+"""Compact authenticated principal, cached so auth costs no DB round trip.
+
+`retrieve_user_handler` runs on every authenticated request. Instead of
+loading the full `User` row (and its eagerly loaded relationships) it
+resolves a small `Principal` from a short in-process cache, then Redis,
+and only then the database. Handlers that need the full profile load the
+`User` themselves and call `invalidate_principal` after changing it.
+"""
+
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass
+
+from redis.exceptions import RedisError
+from sqlalchemy import select
+
+from core.models import User
+from core.models.db_helper import db_helper
+from core.redis.client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Other processes may serve a stale principal for up to LOCAL_TTL_SECONDS
+# after an invalidation, so keep it short
+LOCAL_TTL_SECONDS = 15
+REDIS_TTL_SECONDS = 10 * 60
+LOCAL_MAX_ENTRIES = 10_000
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    id: int
+    login: str
+    is_private: bool
+    is_active: bool
+
+
+_local: dict[int, tuple[float, Principal]] = {}
+
+
+def _redis_key(user_id: int) -> str:
+    return f"auth:principal:{user_id}"
+
+
+def _remember(principal: Principal) -> None:
+    if len(_local) >= LOCAL_MAX_ENTRIES:
+        now = time.monotonic()
+        for user_id in [k for k, (expires, _) in _local.items() if expires <= now]:
+            del _local[user_id]
+        if len(_local) >= LOCAL_MAX_ENTRIES:
+            _local.clear()
+    _local[principal.id] = (time.monotonic() + LOCAL_TTL_SECONDS, principal)
+
+
+async def _load_from_db(user_id: int) -> Principal | None:
+    stmt = select(User.id, User.login, User.is_private, User.is_active).where(
+        User.id == user_id
+    )
+    async with db_helper.session_factory() as session:
+        row = (await session.execute(stmt)).one_or_none()
+    if row is None:
+        return None
+    return Principal(
+        id=row.id,
+        login=row.login,
+        is_private=row.is_private,
+        is_active=row.is_active,
+    )
+
+
+async def get_principal(user_id: int) -> Principal | None:
+    cached = _local.get(user_id)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+
+    try:
+        raw = await redis_client.get(_redis_key(user_id))
+    except RedisError:
+        logger.warning("Principal cache unavailable for user %s", user_id)
+        raw = None
+    if raw is not None:
+        principal = Principal(**json.loads(raw))
+        _remember(principal)
+        return principal
+
+    principal = await _load_from_db(user_id)
+    if principal is None:
+        return None
+    try:
+        await redis_client.set(
+            _redis_key(user_id), json.dumps(asdict(principal)), ex=REDIS_TTL_SECONDS
+        )
+    except RedisError:
+        pass
+    _remember(principal)
+    return principal
+
+
+async def invalidate_principal(user_id: int) -> None:
+    """Drop the cached principal after the user's row changed."""
+    _local.pop(user_id, None)
+    try:
+        await redis_client.delete(_redis_key(user_id))
+    except RedisError:
+        logger.warning("Failed to invalidate cached principal for user %s", user_id)
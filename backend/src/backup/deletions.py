@@ -0,0 +1,153 @@
+"""Deletion log behind incremental backup exports.
+
+Rows removed from a library leave no `updated_at` behind, so every flush
+that deletes user titles, seasons, episodes or screenshots records them in
+`library_deletions` within the same transaction. Children deleted together
+with their parent are covered by the parent's row. The importer's Core
+deletes bypass this hook and log through `log_statements` instead.
+"""
+
+from collections.abc import Iterable
+
+from sqlalchemy import (
+    Insert,
+    Integer,
+    Select,
+    String,
+    cast,
+    event,
+    insert,
+    literal,
+    null,
+    select,
+)
+from sqlalchemy.orm import Session
+
+from core.models import (
+    LibraryDeletion,
+    TitleEpisode,
+    TitleScreenshot,
+    TitleSeason,
+    UserTitle,
+    UserTitleEpisode,
+    UserTitleSeason,
+)
+
+_COLUMNS = ("user_id", "title_id", "kind", "season_number", "episode_number")
+_NO_NUMBER = cast(null(), Integer)
+
+
+def _entries(ids: Iterable[int]) -> Select:
+    return select(
+        UserTitle.user_id,
+        UserTitle.title_id,
+        literal("entry", String),
+        _NO_NUMBER,
+        _NO_NUMBER,
+    ).where(UserTitle.id.in_(ids))
+
+
+def _seasons(ids: Iterable[int], skip_entries: set[int]) -> Select:
+    return (
+        select(
+            UserTitle.user_id,
+            UserTitle.title_id,
+            literal("season", String),
+            TitleSeason.season_number,
+            _NO_NUMBER,
+        )
+        .select_from(UserTitleSeason)
+        .join(UserTitle, UserTitle.id == UserTitleSeason.user_title_id)
+        .join(TitleSeason, TitleSeason.id == UserTitleSeason.title_season_id)
+        .where(
+            UserTitleSeason.id.in_(ids),
+            UserTitleSeason.user_title_id.not_in(skip_entries),
+        )
+    )
+
+
+def _episodes(
+    ids: Iterable[int], skip_entries: set[int], skip_seasons: set[int]
+) -> Select:
+    return (
+        select(
+            UserTitle.user_id,
+            UserTitle.title_id,
+            literal("episode", String),
+            TitleSeason.season_number,
+            TitleEpisode.episode_number,
+        )
+        .select_from(UserTitleEpisode)
+        .join(
+            UserTitleSeason,
+            UserTitleSeason.id == UserTitleEpisode.user_title_season_id,
+        )
+        .join(UserTitle, UserTitle.id == UserTitleSeason.user_title_id)
+        .join(TitleEpisode, TitleEpisode.id == UserTitleEpisode.title_episode_id)
+        .join(TitleSeason, TitleSeason.id == TitleEpisode.title_season_id)
+        .where(
+            UserTitleEpisode.id.in_(ids),
+            UserTitleSeason.id.not_in(skip_seasons),
+            UserTitleSeason.user_title_id.not_in(skip_entries),
+        )
+    )
+
+
+def _screenshots(ids: Iterable[int], skip_entries: set[int]) -> Select:
+    return (
+        select(
+            UserTitle.user_id,
+            UserTitle.title_id,
+            literal("screenshot", String),
+            _NO_NUMBER,
+            _NO_NUMBER,
+        )
+        .select_from(TitleScreenshot)
+        .join(UserTitle, UserTitle.id == TitleScreenshot.user_title_id)
+        .where(
+            TitleScreenshot.id.in_(ids),
+            TitleScreenshot.user_title_id.not_in(skip_entries),
+        )
+        .distinct()
+    )
+
+
+def log_statements(
+    entries: set[int],
+    seasons: set[int] = frozenset(),
+    episodes: set[int] = frozenset(),
+    screenshots: set[int] = frozenset(),
+) -> list[Insert]:
+    """INSERT ... SELECT statements logging rows about to be deleted, by id."""
+    selects = []
+    if entries:
+        selects.append(_entries(entries))
+    if seasons:
+        selects.append(_seasons(seasons, entries))
+    if episodes:
+        selects.append(_episodes(episodes, entries, seasons))
+    if screenshots:
+        selects.append(_screenshots(screenshots, entries))
+    return [insert(LibraryDeletion).from_select(_COLUMNS, stmt) for stmt in selects]
+
+
+@event.listens_for(Session, "before_flush")
+def _log_deletions(session: Session, flush_context, instances) -> None:
+    deleted: dict[type, set[int]] = {}
+    for obj in session.deleted:
+        if isinstance(
+            obj, UserTitle | UserTitleSeason | UserTitleEpisode | TitleScreenshot
+        ):
+            deleted.setdefault(type(obj), set()).add(obj.id)
+    if not deleted:
+        return
+
+    # The rows still exist before the flush, so their identities are read in SQL
+    connection = session.connection()
+    for stmt in log_statements(
+        deleted.get(UserTitle, set()),
+        deleted.get(UserTitleSeason, set()),
+        deleted.get(UserTitleEpisode, set()),
+        deleted.get(TitleScreenshot, set()),
+    ):
+        connection.execute(stmt)
@@ -0,0 +1,405 @@
+"""Streaming library export.
+
+Top-level user titles are read from a server-side cursor `EXPORT_CHUNK_SIZE`
+rows at a time. Each chunk's screenshots, season trees and DLCs are
+selectin-loaded for that chunk only and serialized before the next one is
+fetched, so memory stays flat regardless of library size and the first
+bytes go out as soon as the first chunk is ready.
+
+With `since`, only entries touched after that moment are exported: the
+entry itself, its seasons, episodes, screenshots or DLCs changed. Within
+an exported entry only the changed seasons and episodes are listed, and
+rows deleted from the library since then come first as tombstones.
+"""
+
+import zlib
+from collections.abc import AsyncIterator, Sequence
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import (
+    CTE,
+    Select,
+    and_,
+    exists,
+    func,
+    or_,
+    select,
+    union,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, selectinload
+
+from core.models import LibraryDeletion, TitleScreenshot
+from core.models.db_helper import db_helper
+from core.models.season import (
+    TitleEpisode,
+    TitleSeason,
+    UserTitleEpisode,
+    UserTitleSeason,
+)
+from core.models.title import Title, UserTitle
+
+from .schemas import (
+    BackupDlcItem,
+    BackupEpisodeItem,
+    BackupItem,
+    BackupSeasonItem,
+    BackupTombstone,
+)
+
+EXPORT_CHUNK_SIZE = 200
+# Transactions that started before an export may commit rows stamped earlier
+# than its snapshot; the next cursor reaches back this far to include them
+CURSOR_OVERLAP = timedelta(minutes=5)
+
+ExportChunk = list[BackupItem | BackupTombstone]
+
+
+def _with_details(stmt: Select) -> Select:
+    return stmt.options(
+        selectinload(UserTitle.title),
+        selectinload(UserTitle.screenshots),
+        selectinload(UserTitle.seasons)
+        .selectinload(UserTitleSeason.title_season)
+        .selectinload(TitleSeason.episodes),
+        selectinload(UserTitle.seasons)
+        .selectinload(UserTitleSeason.episodes)
+        .selectinload(UserTitleEpisode.title_episode),
+    )
+
+
+def naive_utc(moment: datetime | None) -> datetime | None:
+    """Library timestamps are naive UTC; convert aware input to match."""
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone(UTC).replace(tzinfo=None)
+
+
+def _changed(updated_at: datetime, since: datetime | None) -> bool:
+    return since is None or updated_at > since
+
+
+def export_seasons(
+    user_title: UserTitle, since: datetime | None = None
+) -> list[BackupSeasonItem]:
+    seasons: list[BackupSeasonItem] = []
+    for user_season in sorted(
+        user_title.seasons or [],
+        key=lambda s: s.title_season.season_number if s.title_season else 0,
+    ):
+        catalog = user_season.title_season
+        if not catalog:
+            continue
+        user_eps_by_number = {
+            ue.title_episode.episode_number: ue
+            for ue in (user_season.episodes or [])
+            if ue.title_episode
+        }
+        episodes: list[BackupEpisodeItem] = []
+        for catalog_ep in sorted(
+            catalog.episodes or [], key=lambda e: e.episode_number
+        ):
+            user_ep = user_eps_by_number.get(catalog_ep.episode_number)
+            if not user_ep or not _changed(user_ep.updated_at, since):
+                continue
+            episodes.append(
+                BackupEpisodeItem(
+                    episode_number=catalog_ep.episode_number,
+                    name=catalog_ep.name,
+                    status=user_ep.status,
+                    score=user_ep.score,
+                    updated_at=user_ep.updated_at,
+                )
+            )
+        if not episodes and not _changed(user_season.updated_at, since):
+            continue
+
+        seasons.append(
+            BackupSeasonItem(
+                season_number=catalog.season_number,
+                name=catalog.name,
+                episode_count=catalog.episode_count,
+                status=user_season.status,
+                score=user_season.score,
+                score_is_manual=user_season.score_is_manual,
+                review_text=user_season.review_text,
+                is_spoiler=user_season.is_spoiler,
+                updated_at=user_season.updated_at,
+                episodes=episodes or None,
+            )
+        )
+    return seasons
+
+
+def export_dlc(user_title: UserTitle) -> BackupDlcItem:
+    title = user_title.title
+    return BackupDlcItem(
+        external_id=title.external_id,
+        title=title.name,
+        poster_url=title.cover_image,
+        release_year=title.release_year,
+        genres=title.genres or [],
+        status=user_title.status,
+        score=user_title.score,
+        review_text=user_title.review_text,
+        is_spoiler=user_title.is_spoiler,
+        finished_at=user_title.finished_at,
+        times_completed=user_title.times_completed,
+        is_completed_100_percent=user_title.is_completed_100_percent,
+        game_platform=user_title.game_platform,
+        updated_at=user_title.updated_at,
+    )
+
+
+def export_item(
+    user_title: UserTitle,
+    dlcs: Sequence[UserTitle] = (),
+    *,
+    with_seasons: bool = True,
+    since: datetime | None = None,
+) -> BackupItem:
+    title = user_title.title
+    seasons = export_seasons(user_title, since) if with_seasons else None
+    dlc_items = [
+        export_dlc(dlc) for dlc in sorted(dlcs, key=lambda x: x.title.name.lower())
+    ]
+    return BackupItem(
+        external_id=title.external_id,
+        type=title.category,
+        title=title.name,
+        poster_url=title.cover_image,
+        release_year=title.release_year,
+        genres=title.genres or [],
+        status=user_title.status,
+        score=user_title.score,
+        review_text=user_title.review_text,
+        is_spoiler=user_title.is_spoiler,
+        finished_at=user_title.finished_at,
+        times_completed=user_title.times_completed,
+        is_completed_100_percent=user_title.is_completed_100_percent,
+        game_platform=user_title.game_platform,
+        progress_value=user_title.progress_value,
+        screenshots=[s.url for s in user_title.screenshots],
+        updated_at=user_title.updated_at,
+        seasons=seasons or None,
+        dlcs=dlc_items or None,
+    )
+
+
+def _changed_title_ids(user_id: int, since: datetime) -> CTE:
+    """Titles of the user's entries with anything changed after `since`."""
+    mine = UserTitle.user_id == user_id
+    return union(
+        select(UserTitle.title_id).where(mine, UserTitle.updated_at > since),
+        select(UserTitle.title_id)
+        .join(UserTitleSeason, UserTitleSeason.user_title_id == UserTitle.id)
+        .where(mine, UserTitleSeason.updated_at > since),
+        select(UserTitle.title_id)
+        .join(UserTitleSeason, UserTitleSeason.user_title_id == UserTitle.id)
+        .join(
+            UserTitleEpisode,
+            UserTitleEpisode.user_title_season_id == UserTitleSeason.id,
+        )
+        .where(mine, UserTitleEpisode.updated_at > since),
+        select(UserTitle.title_id)
+        .join(TitleScreenshot, TitleScreenshot.user_title_id == UserTitle.id)
+        .where(mine, TitleScreenshot.created_at > since),
+        # Removed screenshots leave only a log entry behind
+        select(LibraryDeletion.title_id).where(
+            LibraryDeletion.user_id == user_id,
+            LibraryDeletion.kind == "screenshot",
+            LibraryDeletion.deleted_at > since,
+        ),
+    ).cte("changed_titles")
+
+
+def _tombstones_select(user_id: int, since: datetime) -> Select:
+    latest = (
+        select(
+            LibraryDeletion.kind,
+            LibraryDeletion.title_id,
+            LibraryDeletion.season_number,
+            LibraryDeletion.episode_number,
+            func.max(LibraryDeletion.deleted_at).label("deleted_at"),
+        )
+        .where(
+            LibraryDeletion.user_id == user_id,
+            LibraryDeletion.deleted_at > since,
+            LibraryDeletion.kind != "screenshot",
+        )
+        .group_by(
+            LibraryDeletion.kind,
+            LibraryDeletion.title_id,
+            LibraryDeletion.season_number,
+            LibraryDeletion.episode_number,
+        )
+        .subquery()
+    )
+    # Rows added back since they were deleted are exported as items instead
+    entry = and_(UserTitle.user_id == user_id, UserTitle.title_id == latest.c.title_id)
+    season = and_(
+        entry,
+        UserTitleSeason.user_title_id == UserTitle.id,
+        TitleSeason.id == UserTitleSeason.title_season_id,
+        TitleSeason.season_number == latest.c.season_number,
+    )
+    episode = and_(
+        season,
+        UserTitleEpisode.user_title_season_id == UserTitleSeason.id,
+        TitleEpisode.id == UserTitleEpisode.title_episode_id,
+        TitleEpisode.episode_number == latest.c.episode_number,
+    )
+    return (
+        select(latest, Title.external_id, Title.category, Title.name)
+        .join(Title, Title.id == latest.c.title_id)
+        .where(
+            or_(
+                and_(latest.c.kind == "entry", ~exists().where(entry)),
+                and_(latest.c.kind == "season", ~exists().where(season)),
+                and_(latest.c.kind == "episode", ~exists().where(episode)),
+            )
+        )
+        .order_by(latest.c.deleted_at)
+    )
+
+
+async def export_cursor(db_session: AsyncSession) -> datetime:
+    """The `since` that continues an export started now."""
+    now = await db_session.scalar(select(func.localtimestamp()))
+    return now - CURSOR_OVERLAP
+
+
+async def _dlcs_of(
+    db_session: AsyncSession,
+    user_id: int,
+    parent_title_ids: list[int],
+    changed: CTE | None = None,
+) -> dict[int, list[UserTitle]]:
+    stmt = (
+        select(UserTitle)
+        .join(Title, UserTitle.title_id == Title.id)
+        .where(
+            UserTitle.user_id == user_id,
+            Title.parent_title_id.in_(parent_title_ids),
+        )
+        .options(selectinload(UserTitle.title))
+    )
+    if changed is not None:
+        stmt = stmt.where(UserTitle.title_id.in_(select(changed.c.title_id)))
+    result = await db_session.execute(stmt)
+    by_parent: dict[int, list[UserTitle]] = {}
+    for dlc in result.scalars().all():
+        by_parent.setdefault(dlc.title.parent_title_id, []).append(dlc)
+    return by_parent
+
+
+async def iter_export_items(
+    user_id: int, since: datetime | None = None
+) -> AsyncIterator[ExportChunk]:
+    """Yield the user's backup items one chunk at a time.
+
+    With `since`, yield tombstones and then the entries changed after it.
+    """
+    since = naive_utc(since)
+    async with db_helper.session_factory() as db_session:
+        changed = None
+        top_level = (
+            select(UserTitle)
+            .join(Title, UserTitle.title_id == Title.id)
+            .where(UserTitle.user_id == user_id, Title.parent_title_id.is_(None))
+        )
+        orphans = select(UserTitle).join(Title, UserTitle.title_id == Title.id)
+
+        if since is not None:
+            result = await db_session.stream(
+                _tombstones_select(user_id, since).execution_options(
+                    yield_per=EXPORT_CHUNK_SIZE
+                )
+            )
+            async for rows in result.partitions():
+                yield [
+                    BackupTombstone(
+                        deleted=row.kind,
+                        external_id=row.external_id,
+                        type=row.category,
+                        title=row.name,
+                        season_number=row.season_number,
+                        episode_number=row.episode_number,
+                        deleted_at=row.deleted_at,
+                    )
+                    for row in rows
+                ]
+
+            changed = _changed_title_ids(user_id, since)
+            changed_ids = select(changed.c.title_id)
+            dlc_title = aliased(Title)
+            top_level = top_level.where(
+                or_(
+                    UserTitle.title_id.in_(changed_ids),
+                    exists().where(
+                        dlc_title.parent_title_id == UserTitle.title_id,
+                        dlc_title.id.in_(changed_ids),
+                    ),
+                )
+            )
+            orphans = orphans.where(UserTitle.title_id.in_(changed_ids))
+
+        top_level = _with_details(top_level.order_by(UserTitle.id)).execution_options(
+            yield_per=EXPORT_CHUNK_SIZE
+        )
+        result = await db_session.stream_scalars(top_level)
+        async for chunk in result.partitions():
+            dlcs = await _dlcs_of(
+                db_session, user_id, [ut.title_id for ut in chunk], changed
+            )
+            yield [
+                export_item(ut, dlcs.get(ut.title_id, ()), since=since) for ut in chunk
+            ]
+            # Drop the chunk's objects; the cursor keeps its own position
+            db_session.expunge_all()
+
+        # DLC rows whose parent is not in the library are exported as roots
+        parent_entry = aliased(UserTitle)
+        orphans = _with_details(
+            orphans.where(
+                UserTitle.user_id == user_id,
+                Title.parent_title_id.is_not(None),
+                ~exists().where(
+                    parent_entry.user_id == user_id,
+                    parent_entry.title_id == Title.parent_title_id,
+                ),
+            ).order_by(UserTitle.id)
+        ).execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        result = await db_session.stream_scalars(orphans)
+        async for chunk in result.partitions():
+            yield [export_item(ut, with_seasons=False) for ut in chunk]
+            db_session.expunge_all()
+
+
+async def ndjson_chunks(items: AsyncIterator[ExportChunk]) -> AsyncIterator[bytes]:
+    """One JSON document per line."""
+    async for chunk in items:
+        yield b"".join(item.model_dump_json().encode() + b"\n" for item in chunk)
+
+
+async def json_array_chunks(
+    items: AsyncIterator[ExportChunk],
+) -> AsyncIterator[bytes]:
+    """The legacy indented JSON array, written incrementally."""
+    opened = False
+    async for chunk in items:
+        if not chunk:
+            continue
+        body = b",\n".join(item.model_dump_json(indent=2).encode() for item in chunk)
+        yield (b",\n" if opened else b"[\n") + body
+        opened = True
+    yield b"\n]" if opened else b"[]"
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,755 @@
+"""Set-based backup import.
+
+Every level of a backup (titles, user titles, screenshots, catalog seasons
+and episodes, user seasons and episodes) is written in three steps:
+
+1. load the existing rows for the whole backup with batched `IN` queries;
+2. diff them against the backup in Python;
+3. write only new or changed rows with multi-row
+   `INSERT ... ON CONFLICT DO UPDATE` statements.
+
+The number of statements grows with the number of batches, not with the
+number of items. Core writes bypass the ORM session hooks, so the importer
+refreshes stats rollups, compare caches and feed timelines itself.
+
+In merge mode a library row edited after the backup's `updated_at` is kept,
+so an incremental export from another device cannot roll it back. The
+tombstones of incremental exports delete entries, seasons and episodes
+(in merge mode only rows not edited since the deletion).
+"""
+
+import logging
+from collections.abc import AsyncIterator, Iterable, Sequence
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, NamedTuple
+
+from sqlalchemy import delete, event, func, insert, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.models import TitleScreenshot
+from core.models.season import (
+    TitleEpisode,
+    TitleSeason,
+    UserTitleEpisode,
+    UserTitleSeason,
+)
+from core.models.title import Title, TitleCategory, UserTitle
+from core.s3 import MAX_SCREENSHOTS_PER_ENTRY, parse_s3_key_from_url
+from feed.timeline import schedule_fan_out
+from screenshots.derivatives import enqueue_screenshot_variants
+from stats.rollups import rebuild_user_rollups
+from storage.gc import schedule_deletion, screenshot_keys
+from users.compare import bump_library_versions
+
+from .deletions import log_statements
+from .export import naive_utc
+from .schemas import BackupDlcItem, BackupItem, BackupTombstone
+
+logger = logging.getLogger(__name__)
+
+# Ids per `IN (...)` lookup
+LOOKUP_BATCH = 1000
+# Rows per multi-row INSERT; stays well under the 32767 bind parameter cap
+WRITE_BATCH = 500
+
+Key = tuple[Any, ...]
+
+
+class _KnownTitle(NamedTuple):
+    id: int
+    parent_title_id: int | None
+
+
+@dataclass
+class ImportReport:
+    processed: int = 0
+    written: int = 0
+    unchanged: int = 0
+    statements: int = 0
+    deleted: int = 0
+    changed_user_title_ids: set[int] = field(default_factory=set)
+    # Deleted user title id -> user id, for the feed
+    removed_user_title_ids: dict[int, int] = field(default_factory=dict)
+
+
+def _batches[T](rows: Sequence[T], size: int) -> Iterable[Sequence[T]]:
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def _user_title_values(entry: BackupItem | BackupDlcItem) -> dict[str, Any]:
+    return {
+        "status": entry.status,
+        "score": entry.score,
+        "review_text": entry.review_text,
+        "is_spoiler": entry.is_spoiler,
+        "finished_at": entry.finished_at,
+        "times_completed": entry.times_completed,
+        "is_completed_100_percent": entry.is_completed_100_percent,
+        "game_platform": entry.game_platform,
+        "progress_value": getattr(entry, "progress_value", None),
+    }
+
+
+class BackupImporter:
+    def __init__(
+        self, db_session: AsyncSession, user_id: int, *, merge: bool = False
+    ) -> None:
+        self.db_session = db_session
+        self.user_id = user_id
+        self.merge = merge
+        self.report = ImportReport()
+        # Entries whose library row is newer than the backup (merge mode)
+        self._kept_user_title_ids: set[int] = set()
+        # S3 keys of screenshot rows removed in the current batch
+        self._released_keys: set[str] = set()
+        # Screenshot rows inserted in the current batch, still without variants
+        self._new_screenshot_ids: list[int] = []
+
+    # --- generic helpers -------------------------------------------------
+
+    async def _load(
+        self, columns: Sequence, filter_column, values: Iterable, *where
+    ) -> list:
+        rows: list = []
+        for batch in _batches(sorted(set(values)), LOOKUP_BATCH):
+            result = await self.db_session.execute(
+                select(*columns).where(filter_column.in_(batch), *where)
+            )
+            rows.extend(result.all())
+        return rows
+
+    async def _sync(
+        self,
+        model,
+        key_columns: tuple[str, ...],
+        desired: dict[Key, dict[str, Any]],
+        existing: dict[Key, Any],
+        stamps: dict[Key, datetime | None] | None = None,
+    ) -> tuple[dict[Key, int], set[Key]]:
+        """Upsert the desired rows that are new or differ.
+
+        In merge mode, existing rows newer than their key's entry in `stamps`
+        are kept as they are, and written rows take the stamp as their
+        `updated_at`: stamping them with the import time would make the
+        library look newer than every later export of the same rows.
+        Returns the row id of every desired key and the keys that were written.
+        """
+        ids: dict[Key, int] = {}
+        written: set[Key] = set()
+        pending: list[dict[str, Any]] = []
+        timestamped = "updated_at" in model.__table__.c
+        keep_stamps = timestamped and self.merge and stamps is not None
+        for key, values in desired.items():
+            current = existing.get(key)
+            if current is not None and (
+                self._library_is_newer(current, stamps, key)
+                or all(getattr(current, name) == value for name, value in values.items())
+            ):
+                ids[key] = current.id
+                self.report.unchanged += 1
+            else:
+                written.add(key)
+                row = {**dict(zip(key_columns, key)), **values}
+                if keep_stamps:
+                    row["updated_at"] = stamps.get(key) or func.now()
+                pending.append(row)
+
+        key_attrs = [getattr(model, name) for name in key_columns]
+        for batch in _batches(pending, WRITE_BATCH):
+            stmt = pg_insert(model).values(list(batch))
+            set_ = {
+                name: stmt.excluded[name]
+                for name in batch[0]
+                if name not in key_columns
+            }
+            if timestamped and not keep_stamps:
+                set_["updated_at"] = func.now()
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(key_columns), set_=set_
+            ).returning(model.id, *key_attrs)
+            result = await self.db_session.execute(stmt)
+            for row in result.all():
+                ids[tuple(row[1:])] = row[0]
+        self.report.written += len(pending)
+        return ids, written
+
+    def _library_is_newer(
+        self, current: Any, stamps: dict[Key, datetime | None] | None, key: Key
+    ) -> bool:
+        if not self.merge or stamps is None:
+            return False
+        stamp = stamps.get(key)
+        # Rows without a timestamp come from full exports and never win a merge.
+        # An equal timestamp is the same version, e.g. from an earlier merge
+        return stamp is None or current.updated_at > stamp
+
+    # --- titles ----------------------------------------------------------
+
+    async def _resolve_titles(
+        self, items: list[BackupItem]
+    ) -> tuple[list[int], list[list[int]]]:
+        """Title ids of every item and of every item's DLCs, in order."""
+        dlc_key = TitleCategory.GAME
+        external_ids = {item.external_id for item in items if item.external_id}
+        external_ids |= {
+            dlc.external_id
+            for item in items
+            for dlc in item.dlcs or []
+            if dlc.external_id
+        }
+        found: dict[Key, _KnownTitle] = {}
+        rows = await self._load(
+            (Title.id, Title.external_id, Title.category, Title.parent_title_id),
+            Title.external_id,
+            external_ids,
+        )
+        # Duplicates in the catalog resolve to the oldest row
+        for row in sorted(rows, key=lambda r: r.id, reverse=True):
+            found[(row.external_id, row.category)] = _KnownTitle(
+                row.id, row.parent_title_id
+            )
+
+        title_ids = await self._create_titles(
+            [(item.external_id, item.type, item, None) for item in items], found
+        )
+        dlc_entries = [
+            (dlc.external_id, dlc_key, dlc, title_id)
+            for item, title_id in zip(items, title_ids)
+            for dlc in item.dlcs or []
+        ]
+        # Known DLC titles without a parent get the first parent they appear under
+        reparent: dict[int, int] = {}
+        for external_id, _, _, parent_id in dlc_entries:
+            known = found.get((external_id, dlc_key)) if external_id else None
+            if known is not None and known.parent_title_id is None:
+                reparent.setdefault(known.id, parent_id)
+        flat_dlc_ids = await self._create_titles(dlc_entries, found)
+        if reparent:
+            await self.db_session.execute(
+                update(Title),
+                [{"id": tid, "parent_title_id": pid} for tid, pid in reparent.items()],
+            )
+            self.report.written += len(reparent)
+
+        dlc_ids: list[list[int]] = []
+        position = 0
+        for item in items:
+            count = len(item.dlcs or [])
+            dlc_ids.append(flat_dlc_ids[position : position + count])
+            position += count
+        return title_ids, dlc_ids
+
+    async def _create_titles(
+        self,
+        entries: list[tuple[str | None, TitleCategory, Any, int | None]],
+        found: dict[Key, _KnownTitle],
+    ) -> list[int]:
+        """Ids for (external_id, category, source, parent) entries, inserting misses.
+
+        Created titles are added to `found`. Entries without an external id
+        always get a new title, as before.
+        """
+        to_create: list[dict[str, Any]] = []
+        slots: list[Key | int] = []
+        created_keys: dict[Key, int] = {}
+        for external_id, category, source, parent_id in entries:
+            key = (external_id, category)
+            if external_id and key in found:
+                slots.append(key)
+                continue
+            if external_id and key in created_keys:
+                slots.append(created_keys[key])
+                continue
+            if external_id:
+                created_keys[key] = len(to_create)
+            slots.append(len(to_create))
+            to_create.append(
+                {
+                    "name": source.title,
+                    "category": category,
+                    "external_id": external_id,
+                    "cover_image": source.poster_url,
+                    "release_year": source.release_year,
+                    "genres": source.genres,
+                    "parent_title_id": parent_id,
+                }
+            )
+
+        new_ids: list[int] = []
+        if to_create:
+            result = await self.db_session.execute(
+                insert(Title).returning(Title.id, sort_by_parameter_order=True),
+                to_create,
+            )
+            new_ids = list(result.scalars().all())
+            self.report.written += len(new_ids)
+            for key, index in created_keys.items():
+                found[key] = _KnownTitle(new_ids[index], to_create[index]["parent_title_id"])
+
+        return [
+            found[slot].id if isinstance(slot, tuple) else new_ids[slot]
+            for slot in slots
+        ]
+
+    # --- library rows ----------------------------------------------------
+
+    async def _sync_user_titles(
+        self, items: list[BackupItem], title_ids: list[int], dlc_ids: list[list[int]]
+    ) -> dict[int, int]:
+        """User title id by title id. Later entries win, as with one-by-one upserts."""
+        desired: dict[Key, dict[str, Any]] = {}
+        stamps: dict[Key, datetime | None] = {}
+        for item, title_id, item_dlc_ids in zip(items, title_ids, dlc_ids):
+            desired[(self.user_id, title_id)] = _user_title_values(item)
+            stamps[(self.user_id, title_id)] = naive_utc(item.updated_at)
+            for dlc, dlc_title_id in zip(item.dlcs or [], item_dlc_ids):
+                desired[(self.user_id, dlc_title_id)] = _user_title_values(dlc)
+                stamps[(self.user_id, dlc_title_id)] = naive_utc(dlc.updated_at)
+
+        value_columns = [getattr(UserTitle, name) for name in _user_title_values(items[0])]
+        rows = await self._load(
+            (
+                UserTitle.id,
+                UserTitle.user_id,
+                UserTitle.title_id,
+                UserTitle.updated_at,
+                *value_columns,
+            ),
+            UserTitle.title_id,
+            [title_id for _, title_id in desired],
+            UserTitle.user_id == self.user_id,
+        )
+        existing = {(row.user_id, row.title_id): row for row in rows}
+        ids, written = await self._sync(
+            UserTitle, ("user_id", "title_id"), desired, existing, stamps
+        )
+        self.report.changed_user_title_ids.update(ids[key] for key in written)
+        # Decided on the entry's timestamp, not on whether it was written: an
+        # incremental export re-sends entries whose only change is screenshots
+        self._kept_user_title_ids = {
+            current.id
+            for key, current in existing.items()
+            if key in desired and self._library_is_newer(current, stamps, key)
+        }
+        return {title_id: ut_id for (_, title_id), ut_id in ids.items()}
+
+    async def _sync_screenshots(
+        self, items: list[BackupItem], user_title_ids: list[int]
+    ) -> None:
+        desired: dict[int, list[dict[str, Any]]] = {}
+        for item, user_title_id in zip(items, user_title_ids):
+            if item.screenshots is None:
+                continue
+            if user_title_id in self._kept_user_title_ids:
+                # The library's entry is newer, and so are its screenshots
+                continue
+            shots = []
+            for position, url in enumerate(item.screenshots[:MAX_SCREENSHOTS_PER_ENTRY]):
+                s3_key = parse_s3_key_from_url(url)
+                if s3_key is None:
+                    logger.warning(
+                        "Skipping screenshot at position %s for user_title %s",
+                        position,
+                        user_title_id,
+                    )
+                    continue
+                shots.append(
+                    {
+                        "user_title_id": user_title_id,
+                        "url": url,
+                        "s3_key": s3_key,
+                        "position": position,
+                    }
+                )
+            desired[user_title_id] = shots
+        if not desired:
+            return
+
+        current: dict[int, list[tuple[int, str]]] = {uid: [] for uid in desired}
+        current_keys: dict[int, set[str]] = {uid: set() for uid in desired}
+        rows = await self._load(
+            (
+                TitleScreenshot.user_title_id,
+                TitleScreenshot.position,
+                TitleScreenshot.url,
+                TitleScreenshot.s3_key,
+            ),
+            TitleScreenshot.user_title_id,
+            desired,
+        )
+        for row in sorted(rows, key=lambda r: (r.user_title_id, r.position)):
+            current[row.user_title_id].append((row.position, row.url))
+            current_keys[row.user_title_id].add(row.s3_key)
+
+        replaced = [
+            uid
+            for uid, shots in desired.items()
+            if [(s["position"], s["url"]) for s in shots] != current[uid]
+        ]
+        self.report.unchanged += len(desired) - len(replaced)
+        self.report.changed_user_title_ids.update(replaced)
+        for uid in replaced:
+            kept = {shot["s3_key"] for shot in desired[uid]}
+            self._released_keys.update(current_keys[uid] - kept)
+        for batch in _batches(replaced, LOOKUP_BATCH):
+            await self.db_session.execute(
+                delete(TitleScreenshot).where(TitleScreenshot.user_title_id.in_(batch))
+            )
+        new_rows = [shot for uid in replaced for shot in desired[uid]]
+        for batch in _batches(new_rows, WRITE_BATCH):
+            result = await self.db_session.execute(
+                insert(TitleScreenshot).values(list(batch)).returning(TitleScreenshot.id)
+            )
+            self._new_screenshot_ids.extend(result.scalars().all())
+        self.report.written += len(new_rows)
+
+    async def _sync_seasons(
+        self,
+        items: list[BackupItem],
+        title_ids: list[int],
+        user_title_ids: list[int],
+    ) -> None:
+        with_seasons = [
+            (item, title_id, user_title_id)
+            for item, title_id, user_title_id in zip(items, title_ids, user_title_ids)
+            if item.seasons
+        ]
+        if not with_seasons:
+            return
+
+        # Catalog seasons: keep catalog values the backup leaves empty
+        rows = await self._load(
+            (
+                TitleSeason.id,
+                TitleSeason.title_id,
+                TitleSeason.season_number,
+                TitleSeason.name,
+                TitleSeason.episode_count,
+            ),
+            TitleSeason.title_id,
+            [title_id for _, title_id, _ in with_seasons],
+        )
+        existing_seasons = {(r.title_id, r.season_number): r for r in rows}
+        desired_seasons: dict[Key, dict[str, Any]] = {}
+        for item, title_id, _ in with_seasons:
+            for season in item.seasons:
+                key = (title_id, season.season_number)
+                current = existing_seasons.get(key)
+                name, episode_count = season.name, season.episode_count
+                if current is not None:
+                    name = name if name is not None else current.name
+                    if episode_count is None:
+                        episode_count = current.episode_count
+                if season.episodes:
+                    episode_count = max(
+                        episode_count or 0,
+                        max(ep.episode_number for ep in season.episodes),
+                    )
+                desired_seasons[key] = {"name": name, "episode_count": episode_count}
+        season_ids, _ = await self._sync(
+            TitleSeason, ("title_id", "season_number"), desired_seasons, existing_seasons
+        )
+
+        # Catalog episodes
+        rows = await self._load(
+            (
+                TitleEpisode.id,
+                TitleEpisode.title_season_id,
+                TitleEpisode.episode_number,
+                TitleEpisode.name,
+            ),
+            TitleEpisode.title_season_id,
+            season_ids.values(),
+        )
+        existing_episodes = {(r.title_season_id, r.episode_number): r for r in rows}
+        desired_episodes: dict[Key, dict[str, Any]] = {}
+        for item, title_id, _ in with_seasons:
+            for season in item.seasons:
+                season_id = season_ids[(title_id, season.season_number)]
+                for ep in season.episodes or []:
+                    key = (season_id, ep.episode_number)
+                    current = existing_episodes.get(key)
+                    name = ep.name
+                    if current is not None and name is None:
+                        name = current.name
+                    desired_episodes[key] = {"name": name}
+        episode_ids, _ = await self._sync(
+            TitleEpisode,
+            ("title_season_id", "episode_number"),
+            desired_episodes,
+            existing_episodes,
+        )
+
+        # The user's seasons
+        season_columns = ("status", "score", "score_is_manual", "review_text", "is_spoiler")
+        rows = await self._load(
+            (
+                UserTitleSeason.id,
+                UserTitleSeason.user_title_id,
+                UserTitleSeason.title_season_id,
+                UserTitleSeason.updated_at,
+                *(getattr(UserTitleSeason, name) for name in season_columns),
+            ),
+            UserTitleSeason.user_title_id,
+            [user_title_id for _, _, user_title_id in with_seasons],
+        )
+        existing_user_seasons = {(r.user_title_id, r.title_season_id): r for r in rows}
+        desired_user_seasons: dict[Key, dict[str, Any]] = {}
+        season_stamps: dict[Key, datetime | None] = {}
+        for item, title_id, user_title_id in with_seasons:
+            for season in item.seasons:
+                season_id = season_ids[(title_id, season.season_number)]
+                desired_user_seasons[(user_title_id, season_id)] = {
+                    name: getattr(season, name) for name in season_columns
+                }
+                season_stamps[(user_title_id, season_id)] = naive_utc(
+                    season.updated_at
+                )
+        user_season_ids, _ = await self._sync(
+            UserTitleSeason,
+            ("user_title_id", "title_season_id"),
+            desired_user_seasons,
+            existing_user_seasons,
+            season_stamps,
+        )
+
+        # The user's episodes
+        rows = await self._load(
+            (
+                UserTitleEpisode.id,
+                UserTitleEpisode.user_title_season_id,
+                UserTitleEpisode.title_episode_id,
+                UserTitleEpisode.status,
+                UserTitleEpisode.score,
+                UserTitleEpisode.updated_at,
+            ),
+            UserTitleEpisode.user_title_season_id,
+            user_season_ids.values(),
+        )
+        existing_user_episodes = {
+            (r.user_title_season_id, r.title_episode_id): r for r in rows
+        }
+        desired_user_episodes: dict[Key, dict[str, Any]] = {}
+        episode_stamps: dict[Key, datetime | None] = {}
+        for item, title_id, user_title_id in with_seasons:
+            for season in item.seasons:
+                season_id = season_ids[(title_id, season.season_number)]
+                user_season_id = user_season_ids[(user_title_id, season_id)]
+                for ep in season.episodes or []:
+                    episode_id = episode_ids[(season_id, ep.episode_number)]
+                    desired_user_episodes[(user_season_id, episode_id)] = {
+                        "status": ep.status,
+                        "score": ep.score,
+                    }
+                    episode_stamps[(user_season_id, episode_id)] = naive_utc(
+                        ep.updated_at
+                    )
+        await self._sync(
+            UserTitleEpisode,
+            ("user_title_season_id", "title_episode_id"),
+            desired_user_episodes,
+            existing_user_episodes,
+            episode_stamps,
+        )
+
+    # --- tombstones ------------------------------------------------------
+
+    def _deletable(self, rows: list, deleted_at: dict[Key, datetime], key) -> set[int]:
+        """Ids of matched rows, minus rows a merge keeps as edited later."""
+        return {
+            row.id
+            for row in rows
+            if not self.merge or row.updated_at < deleted_at[key(row)]
+        }
+
+    async def _apply_tombstones(self, tombstones: list[BackupTombstone]) -> None:
+        # Titles are identified by external id, as on import
+        rows = await self._load(
+            (Title.id, Title.external_id, Title.category),
+            Title.external_id,
+            {t.external_id for t in tombstones if t.external_id},
+        )
+        title_ids = {
+            (row.external_id, row.category): row.id
+            for row in sorted(rows, key=lambda r: r.id, reverse=True)
+        }
+        targets: dict[str, dict[Key, datetime]] = {
+            "entry": {},
+            "season": {},
+            "episode": {},
+        }
+        for tombstone in tombstones:
+            title_id = title_ids.get((tombstone.external_id, tombstone.type))
+            if title_id is None:
+                continue
+            key = (title_id, tombstone.season_number, tombstone.episode_number)
+            key = key[: {"entry": 1, "season": 2, "episode": 3}[tombstone.deleted]]
+            if None in key:
+                continue
+            deleted_at = naive_utc(tombstone.deleted_at)
+            targets[tombstone.deleted][key] = max(
+                deleted_at, targets[tombstone.deleted].get(key, deleted_at)
+            )
+
+        mine = UserTitle.user_id == self.user_id
+        entries: set[int] = set()
+        if targets["entry"]:
+            rows = await self._load(
+                (UserTitle.id, UserTitle.title_id, UserTitle.updated_at),
+                UserTitle.title_id,
+                [key[0] for key in targets["entry"]],
+                mine,
+            )
+            entries = self._deletable(
+                rows, targets["entry"], lambda row: (row.title_id,)
+            )
+
+        seasons: set[int] = set()
+        if targets["season"]:
+            rows = await self._load(
+                (
+                    UserTitleSeason.id,
+                    UserTitleSeason.updated_at,
+                    UserTitle.title_id,
+                    TitleSeason.season_number,
+                ),
+                tuple_(UserTitle.title_id, TitleSeason.season_number),
+                targets["season"],
+                mine,
+                UserTitle.id == UserTitleSeason.user_title_id,
+                TitleSeason.id == UserTitleSeason.title_season_id,
+            )
+            seasons = self._deletable(
+                rows,
+                targets["season"],
+                lambda row: (row.title_id, row.season_number),
+            )
+
+        episodes: set[int] = set()
+        if targets["episode"]:
+            rows = await self._load(
+                (
+                    UserTitleEpisode.id,
+                    UserTitleEpisode.updated_at,
+                    UserTitle.title_id,
+                    TitleSeason.season_number,
+                    TitleEpisode.episode_number,
+                ),
+                tuple_(
+                    UserTitle.title_id,
+                    TitleSeason.season_number,
+                    TitleEpisode.episode_number,
+                ),
+                targets["episode"],
+                mine,
+                UserTitleSeason.id == UserTitleEpisode.user_title_season_id,
+                UserTitle.id == UserTitleSeason.user_title_id,
+                TitleEpisode.id == UserTitleEpisode.title_episode_id,
+                TitleSeason.id == TitleEpisode.title_season_id,
+            )
+            episodes = self._deletable(
+                rows,
+                targets["episode"],
+                lambda row: (row.title_id, row.season_number, row.episode_number),
+            )
+
+        if not (entries or seasons or episodes):
+            return
+        # Log first: the statements read the rows about to be deleted
+        for stmt in log_statements(entries, seasons, episodes):
+            await self.db_session.execute(stmt)
+        # Screenshots go with their entries by cascade, so collect them now
+        rows = await self._load(
+            (TitleScreenshot.s3_key,), TitleScreenshot.user_title_id, entries
+        )
+        self._released_keys.update(row.s3_key for row in rows)
+        for model, ids in (
+            (UserTitleEpisode, episodes),
+            (UserTitleSeason, seasons),
+            (UserTitle, entries),
+        ):
+            for batch in _batches(sorted(ids), LOOKUP_BATCH):
+                await self.db_session.execute(delete(model).where(model.id.in_(batch)))
+        self.report.removed_user_title_ids.update(
+            {user_title_id: self.user_id for user_title_id in entries}
+        )
+        self.report.deleted += len(entries) + len(seasons) + len(episodes)
+
+    # --- entry point -----------------------------------------------------
+
+    def _count_statement(self, *args, **kwargs) -> None:
+        self.report.statements += 1
+
+    @asynccontextmanager
+    async def _counting_statements(self) -> AsyncIterator[None]:
+        connection = (await self.db_session.connection()).sync_connection
+        event.listen(connection, "before_cursor_execute", self._count_statement)
+        try:
+            yield
+        finally:
+            event.remove(connection, "before_cursor_execute", self._count_statement)
+
+    async def write_batch(
+        self, items: list[BackupItem], tombstones: list[BackupTombstone] = ()
+    ) -> None:
+        """Apply `tombstones`, write `items` into the library and commit.
+
+        Batches are independent transactions, so a large backup can be
+        imported in bounded memory; call `finish` once after the last one.
+        """
+        if not items and not tombstones:
+            return
+
+        async with self._counting_statements():
+            if tombstones:
+                await self._apply_tombstones(list(tombstones))
+            if items:
+                title_ids, dlc_ids = await self._resolve_titles(items)
+                ut_by_title = await self._sync_user_titles(items, title_ids, dlc_ids)
+                user_title_ids = [ut_by_title[title_id] for title_id in title_ids]
+                await self._sync_screenshots(items, user_title_ids)
+                await self._sync_seasons(items, title_ids, user_title_ids)
+            await self.db_session.commit()
+        self.report.processed += len(items) + len(tombstones)
+
+        # The storage hooks do not see Core deletes
+        released, self._released_keys = self._released_keys, set()
+        await schedule_deletion(
+            key for s3_key in released for key in screenshot_keys(s3_key)
+        )
+        new_screenshot_ids, self._new_screenshot_ids = self._new_screenshot_ids, []
+        for screenshot_id in new_screenshot_ids:
+            await enqueue_screenshot_variants(screenshot_id)
+
+    async def finish(self) -> ImportReport:
+        """Refresh what the ORM hooks would have: rollups, compare cache, feeds."""
+        changed = self.report.changed_user_title_ids
+        removed = self.report.removed_user_title_ids
+        if changed or removed:
+            async with self._counting_statements():
+                await rebuild_user_rollups(self.db_session, self.user_id)
+                await self.db_session.commit()
+            await bump_library_versions({self.user_id})
+            schedule_fan_out(set(changed), dict(removed))
+        logger.info(
+            "Imported %s items for user %s: %s rows written, %s unchanged, "
+            "%s deleted, %s statements",
+            self.report.processed,
+            self.user_id,
+            self.report.written,
+            self.report.unchanged,
+            self.report.deleted,
+            self.report.statements,
+        )
+        return self.report
+
+    async def run(
+        self, items: list[BackupItem], tombstones: list[BackupTombstone] = ()
+    ) -> ImportReport:
+        """Import `items` in one batch."""
+        await self.write_batch(items, tombstones)
+        return await self.finish()
@@ -0,0 +1,239 @@
+"""Backup import as a background job.
+
+The upload is stored in S3 under `imports/` and a job is queued; the request
+returns immediately with a job id. The worker streams the file back, decodes
+it one item at a time and writes it in batches of IMPORT_BATCH items, so
+neither the API nor the worker ever holds the whole backup in memory.
+Progress and the final report live in a Redis hash the client polls.
+"""
+
+import json
+import logging
+from datetime import UTC, datetime
+from typing import Any
+from uuid import uuid4
+
+from litestar.datastructures import UploadFile
+from pydantic import ValidationError
+
+from core.models.db_helper import db_helper
+from core.redis.client import redis_client
+from core.redis.queue import JobQueue
+from core.s3 import iter_upload, s3_service
+
+from .importer import BackupImporter
+from .reader import iter_backup_documents
+from .schemas import BackupImportJob, BackupItem, BackupResponse, BackupTombstone
+
+logger = logging.getLogger(__name__)
+
+JOB_IMPORT_BACKUP = "import_backup"
+# Items per transaction
+IMPORT_BATCH = 500
+# Job state (and therefore the result) stays readable this long
+JOB_TTL_SECONDS = 24 * 60 * 60
+MAX_REPORTED_ERRORS = 20
+# Largest accepted backup upload; keep nginx's limit for the route in step
+MAX_IMPORT_SIZE = 512 * 1024 * 1024
+
+# Retrying would re-read a file that already failed; the client can re-upload
+backup_queue = JobQueue("backup", max_attempts=1)
+
+
+def _job_key(job_id: str) -> str:
+    return f"backup:import:{job_id}"
+
+
+def _now() -> str:
+    return datetime.now(UTC).isoformat()
+
+
+async def _save(job_id: str, **fields: Any) -> None:
+    key = _job_key(job_id)
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hset(key, mapping={name: str(value) for name, value in fields.items()})
+        pipe.expire(key, JOB_TTL_SECONDS)
+        await pipe.execute()
+
+
+async def create_import_job(
+    user_id: int, upload: UploadFile, *, merge: bool = False
+) -> BackupImportJob:
+    """Store the upload and queue it for import."""
+    job_id = uuid4().hex
+    s3_key = f"imports/{user_id}/{job_id}"
+    total_bytes = await s3_service.upload_stream(
+        iter_upload(upload),
+        s3_key,
+        upload.content_type or "application/octet-stream",
+        public=False,
+        max_size=MAX_IMPORT_SIZE,
+    )
+
+    created_at = _now()
+    await _save(
+        job_id,
+        user_id=user_id,
+        status="queued",
+        total_bytes=total_bytes,
+        created_at=created_at,
+    )
+    await backup_queue.enqueue(
+        JOB_IMPORT_BACKUP,
+        {"job_id": job_id, "user_id": user_id, "s3_key": s3_key, "merge": merge},
+    )
+    return BackupImportJob(
+        job_id=job_id,
+        status="queued",
+        total_bytes=total_bytes,
+        created_at=datetime.fromisoformat(created_at),
+    )
+
+
+async def get_import_job(job_id: str, user_id: int) -> dict[str, str] | None:
+    """The job's raw state, or None if it expired or belongs to someone else."""
+    state = await redis_client.hgetall(_job_key(job_id))
+    if not state or int(state["user_id"]) != user_id:
+        return None
+    return state
+
+
+def job_from_state(job_id: str, state: dict[str, str]) -> BackupImportJob:
+    return BackupImportJob(
+        job_id=job_id,
+        status=state["status"],
+        total_bytes=int(state["total_bytes"]),
+        bytes_read=int(state.get("bytes_read", 0)),
+        processed_count=int(state.get("processed_count", 0)),
+        skipped_count=int(state.get("skipped_count", 0)),
+        error=state.get("error"),
+        created_at=datetime.fromisoformat(state["created_at"]),
+        finished_at=(
+            datetime.fromisoformat(state["finished_at"])
+            if "finished_at" in state
+            else None
+        ),
+    )
+
+
+def result_from_state(state: dict[str, str]) -> BackupResponse:
+    return BackupResponse(
+        message=state.get("error") or "Backup imported successfully",
+        processed_count=int(state.get("processed_count", 0)),
+        written_count=int(state.get("written_count", 0)),
+        unchanged_count=int(state.get("unchanged_count", 0)),
+        statement_count=int(state.get("statement_count", 0)),
+        deleted_count=int(state.get("deleted_count", 0)),
+        skipped_count=int(state.get("skipped_count", 0)),
+        errors=json.loads(state.get("errors", "[]")),
+    )
+
+
+class _ImportRun:
+    def __init__(self, job_id: str, importer: BackupImporter) -> None:
+        self.job_id = job_id
+        self.importer = importer
+        self.bytes_read = 0
+        self.skipped = 0
+        self.errors: list[str] = []
+
+    async def _chunks(self, s3_key: str):
+        async for chunk in s3_service.iter_file(s3_key):
+            self.bytes_read += len(chunk)
+            yield chunk
+
+    def _reject(self, index: int, exc: ValidationError) -> None:
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            first = exc.errors()[0]
+            location = ".".join(str(part) for part in first["loc"])
+            self.errors.append(f"Item {index}: {location}: {first['msg']}")
+
+    async def _write(
+        self, batch: list[BackupItem], tombstones: list[BackupTombstone]
+    ) -> None:
+        await self.importer.write_batch(batch, tombstones)
+        await _save(
+            self.job_id,
+            bytes_read=self.bytes_read,
+            processed_count=self.importer.report.processed,
+            skipped_count=self.skipped,
+        )
+
+    async def import_file(self, s3_key: str) -> None:
+        batch: list[BackupItem] = []
+        tombstones: list[BackupTombstone] = []
+        index = 0
+        async for document in iter_backup_documents(self._chunks(s3_key)):
+            index += 1
+            try:
+                # Incremental exports mix tombstones in with the items
+                if "deleted" in document:
+                    tombstones.append(BackupTombstone.model_validate(document))
+                else:
+                    batch.append(BackupItem.model_validate(document))
+            except ValidationError as exc:
+                self._reject(index, exc)
+                continue
+            if len(batch) + len(tombstones) >= IMPORT_BATCH:
+                await self._write(batch, tombstones)
+                batch, tombstones = [], []
+        await self._write(batch, tombstones)
+
+
+async def _run_import(payload: dict[str, Any]) -> None:
+    job_id, user_id, s3_key = payload["job_id"], payload["user_id"], payload["s3_key"]
+    await _save(job_id, status="running")
+
+    error = None
+    async with db_helper.session_factory() as session:
+        importer = BackupImporter(session, user_id, merge=payload.get("merge", False))
+        run = _ImportRun(job_id, importer)
+        try:
+            await run.import_file(s3_key)
+        except ValueError as exc:
+            # Malformed JSON, bad encoding or a truncated gzip stream
+            error = f"Invalid backup file: {exc}"
+        except Exception:
+            logger.exception("Backup import %s for user %s failed", job_id, user_id)
+            error = "Import failed"
+
+        try:
+            if error is not None:
+                await session.rollback()
+            # Batches committed before a failure stay imported; refresh for them too
+            await importer.finish()
+        except Exception:
+            # Often the same database failure that aborted the import. The
+            # job must still reach a terminal status: it is never retried
+            logger.exception(
+                "Finishing backup import %s for user %s failed", job_id, user_id
+            )
+            error = error or "Import failed"
+    report = importer.report
+
+    fields: dict[str, Any] = {
+        "status": "failed" if error else "completed",
+        "finished_at": _now(),
+        "bytes_read": run.bytes_read,
+        "processed_count": report.processed,
+        "written_count": report.written,
+        "unchanged_count": report.unchanged,
+        "statement_count": report.statements,
+        "deleted_count": report.deleted,
+        "skipped_count": run.skipped,
+        "errors": json.dumps(run.errors, ensure_ascii=False),
+    }
+    if error:
+        fields["error"] = error
+    await _save(job_id, **fields)
+
+    try:
+        await s3_service.delete_file(s3_key)
+    except Exception:
+        logger.warning("Failed to delete import upload %s", s3_key, exc_info=True)
+
+
+BACKUP_HANDLERS = {
+    JOB_IMPORT_BACKUP: _run_import,
+}
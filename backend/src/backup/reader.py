@@ -0,0 +1,112 @@
+"""Incremental reading of uploaded backups.
+
+Accepts everything `/backup/export` produces: the indented JSON array, NDJSON
+and either of them gzipped. Documents are decoded one at a time from a
+rolling buffer, so memory is bounded by the chunk size plus the largest
+single item rather than by the file size.
+"""
+
+import codecs
+import json
+import zlib
+from collections.abc import AsyncIterator
+from typing import Any
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class BackupFormatError(ValueError):
+    pass
+
+
+async def _decompressed(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    decompressor = None
+    head = b""
+    async for chunk in chunks:
+        if decompressor is None:
+            head += chunk
+            if len(head) < len(GZIP_MAGIC):
+                continue
+            if head.startswith(GZIP_MAGIC):
+                decompressor = zlib.decompressobj(wbits=31)
+            else:
+                decompressor = False
+            chunk = head
+        if decompressor:
+            try:
+                data = decompressor.decompress(chunk)
+            except zlib.error as exc:
+                raise BackupFormatError(f"Corrupt gzip stream: {exc}") from exc
+            if data:
+                yield data
+        else:
+            yield chunk
+    if decompressor is None and head:
+        yield head
+    if decompressor:
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+        if not decompressor.eof:
+            raise BackupFormatError("Truncated gzip stream")
+
+
+async def iter_backup_documents(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[dict[str, Any]]:
+    """Yield each item of a JSON array or NDJSON backup as a dict."""
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    stream = _decompressed(chunks)
+    buffer = ""
+    pos = 0
+    exhausted = False
+    in_array: bool | None = None
+
+    async def fill() -> bool:
+        nonlocal buffer, pos, exhausted
+        try:
+            chunk = await anext(stream)
+        except StopAsyncIteration:
+            exhausted = True
+            buffer = buffer[pos:] + utf8.decode(b"", final=True)
+            pos = 0
+            return False
+        buffer = buffer[pos:] + utf8.decode(chunk)
+        pos = 0
+        return True
+
+    while True:
+        # Skip separators: whitespace between NDJSON lines, commas in an array
+        while True:
+            while pos < len(buffer) and (
+                buffer[pos].isspace() or (in_array and buffer[pos] == ",")
+            ):
+                pos += 1
+            if pos < len(buffer) or not await fill():
+                break
+        if pos >= len(buffer):
+            if in_array:
+                raise BackupFormatError("Unterminated JSON array")
+            return
+
+        if in_array is None:
+            in_array = buffer[pos] == "["
+            if in_array:
+                pos += 1
+                continue
+        if in_array and buffer[pos] == "]":
+            return
+
+        while True:
+            try:
+                document, end = decoder.raw_decode(buffer, pos)
+                break
+            except json.JSONDecodeError:
+                # The item may simply continue in the next chunk
+                if exhausted or not await fill():
+                    raise
+        if not isinstance(document, dict):
+            raise BackupFormatError("Backup items must be JSON objects")
+        pos = end
+        yield document
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, List
+from typing import Literal, Optional, List
 
 from pydantic import BaseModel, Field
 
@@ -11,6 +11,7 @@ class BackupEpisodeItem(BaseModel):
     name: Optional[str] = None
     status: UserTitleStatus = UserTitleStatus.PLANNED
     score: Optional[float] = None
+    updated_at: datetime | None = None
 
 
 class BackupSeasonItem(BaseModel):
@@ -23,6 +24,7 @@ class BackupSeasonItem(BaseModel):
     review_text: Optional[str] = None
     is_spoiler: bool = False
     episodes_watched: int = 0
+    updated_at: datetime | None = None
     episodes: Optional[List[BackupEpisodeItem]] = None
 
 
@@ -40,6 +42,7 @@ class BackupDlcItem(BaseModel):
     times_completed: int = 0
     is_completed_100_percent: bool = False
     game_platform: Optional[GamePlatform] = None
+    updated_at: datetime | None = None
 
 
 class BackupItem(BaseModel):
@@ -62,11 +65,50 @@ class BackupItem(BaseModel):
     game_platform: Optional[GamePlatform] = None
     progress_value: Optional[int] = None
     screenshots: Optional[List[str]] = None
+    # Merge imports keep library rows edited after this
+    updated_at: datetime | None = None
 
     seasons: Optional[List[BackupSeasonItem]] = None
     dlcs: Optional[List[BackupDlcItem]] = None
 
 
+class BackupTombstone(BaseModel):
+    """A library row deleted since the `since` of an incremental export."""
+
+    deleted: Literal["entry", "season", "episode"]
+    external_id: str | None = None
+    type: TitleCategory
+    title: str
+    season_number: int | None = None
+    episode_number: int | None = None
+    deleted_at: datetime
+
+
 class BackupResponse(BaseModel):
     message: str
     processed_count: int
+    # Rows inserted or updated, rows left as they were, SQL statements issued
+    written_count: int = 0
+    unchanged_count: int = 0
+    statement_count: int = 0
+    # Library rows removed by the tombstones of an incremental backup
+    deleted_count: int = 0
+    # Items that failed validation and were left out, with the first errors
+    skipped_count: int = 0
+    errors: list[str] = []
+
+
+ImportJobStatus = Literal["queued", "running", "completed", "failed"]
+
+
+class BackupImportJob(BaseModel):
+    job_id: str
+    status: ImportJobStatus
+    # Progress through the uploaded file (compressed size for .gz uploads)
+    total_bytes: int
+    bytes_read: int = 0
+    processed_count: int = 0
+    skipped_count: int = 0
+    error: str | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
@@ -28,58 +28,56 @@ class ComicVineService(ContentProvider):
         if not self.api_key:
             return []
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/search/",
-                    params={
-                        "api_key": self.api_key,
-                        "format": "json",
-                        "query": query,
-                        "resources": "volume",
-                        "limit": 20,
-                        "field_list": "id,name,image,start_year,publisher,deck",
-                    },
-                    headers=self.headers,
-                    timeout=20.0,
-                )
-                response.raise_for_status()
-                data = response.json()
-                if data.get("status_code") != 1:
-                    logger.error(f"Comic Vine search error: {data.get('error')}")
-                    return []
-                return self._process_results(data.get("results") or [])
-            except httpx.HTTPError as e:
-                logger.error(f"Failed to search Comic Vine: {e}")
-                raise
+        try:
+            response = await self.http.get(
+                f"{self.base_url}/search/",
+                params={
+                    "api_key": self.api_key,
+                    "format": "json",
+                    "query": query,
+                    "resources": "volume",
+                    "limit": 20,
+                    "field_list": "id,name,image,start_year,publisher,deck",
+                },
+                headers=self.headers,
+                timeout=20.0,
+            )
+            response.raise_for_status()
+            data = response.json()
+            if data.get("status_code") != 1:
+                logger.error(f"Comic Vine search error: {data.get('error')}")
+                return []
+            return self._process_results(data.get("results") or [])
+        except httpx.HTTPError as e:
+            logger.error(f"Failed to search Comic Vine: {e}")
+            raise
 
     async def get_details(self, external_id: str) -> Optional[ContentDTO]:
         if not self.api_key:
             return None
 
         volume_id = external_id.removeprefix(f"{self.VOLUME_RESOURCE_PREFIX}-")
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/volume/{self.VOLUME_RESOURCE_PREFIX}-{volume_id}/",
-                    params={
-                        "api_key": self.api_key,
-                        "format": "json",
-                        "field_list": "id,name,image,start_year,publisher,deck",
-                    },
-                    headers=self.headers,
-                    timeout=20.0,
-                )
-                response.raise_for_status()
-                data = response.json()
-                if data.get("status_code") != 1:
-                    logger.error(f"Comic Vine details error: {data.get('error')}")
-                    return None
-                results = self._process_results([data.get("results") or {}])
-                return results[0] if results else None
-            except httpx.HTTPError as e:
-                logger.error(f"Failed to get Comic Vine details: {e}")
+        try:
+            response = await self.http.get(
+                f"{self.base_url}/volume/{self.VOLUME_RESOURCE_PREFIX}-{volume_id}/",
+                params={
+                    "api_key": self.api_key,
+                    "format": "json",
+                    "field_list": "id,name,image,start_year,publisher,deck",
+                },
+                headers=self.headers,
+                timeout=20.0,
+            )
+            response.raise_for_status()
+            data = response.json()
+            if data.get("status_code") != 1:
+                logger.error(f"Comic Vine details error: {data.get('error')}")
                 return None
+            results = self._process_results([data.get("results") or {}])
+            return results[0] if results else None
+        except httpx.HTTPError as e:
+            logger.error(f"Failed to get Comic Vine details: {e}")
+            return None
 
     def _process_results(self, items: List[dict[str, Any]]) -> List[ContentDTO]:
         results: List[ContentDTO] = []
@@ -76,12 +76,24 @@ class RedisConfig(BaseModel):
         return f"redis://{auth}{self.host}:{self.port}/{self.db}"
 
 
+class HttpClientConfig(BaseModel):
+    connect_timeout: float = 5.0
+    read_timeout: float = 20.0
+    pool_timeout: float = 5.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = True
+
+
 class S3Config(BaseModel):
     endpoint_url: str
     access_key: str
     secret_key: str
     bucket_name: str
     region: str = "nl"
+    # Connections kept open by the shared client
+    max_pool_connections: int = 20
 
 
 class CookieConfig(BaseModel):
@@ -129,6 +141,7 @@ class Settings(BaseSettings):
     S3_SECRET_KEY: str = ""
     S3_BUCKET_NAME: str = ""
     S3_REGION: str = "nl"
+    S3_MAX_POOL_CONNECTIONS: int = 20
 
     COOKIE_HTTPONLY: bool = True
     COOKIE_SECURE: bool = False
@@ -136,9 +149,17 @@ class Settings(BaseSettings):
 
     JWT_SECRET: str = "dev-only-secret-key-change-in-production"
 
+    # Actors with more followers than this get a shared activity stream
+    # instead of one notification row per follower
+    NOTIFICATION_FANOUT_THRESHOLD: int = 1000
+
+    # Worker processes for resizing and re-encoding uploaded images
+    IMAGE_PROCESS_WORKERS: int = 2
+
     run: RunConfig = RunConfig()
     logging: LoggingConfig = LoggingConfig()
     api: ApiPrefix = ApiPrefix()
+    http: HttpClientConfig = HttpClientConfig()
 
     @property
     def auth(self) -> AuthConfig:
@@ -183,6 +204,7 @@ class Settings(BaseSettings):
             secret_key=self.S3_SECRET_KEY,
             bucket_name=self.S3_BUCKET_NAME,
             region=self.S3_REGION,
+            max_pool_connections=self.S3_MAX_POOL_CONNECTIONS,
         )
 
 
@@ -1,7 +1,11 @@
 from abc import ABC, abstractmethod
 from typing import List, Optional
+
+import httpx
 from pydantic import BaseModel
 
+from core.http_client import provider_http
+
 class ContentDTO(BaseModel):
     external_id: str
     title: str
@@ -14,6 +18,11 @@ class ContentDTO(BaseModel):
     number_of_seasons: Optional[int] = None
 
 class ContentProvider(ABC):
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Shared keep-alive client; never close it from a provider."""
+        return provider_http.client
+
     @abstractmethod
     async def search(self, query: str) -> List[ContentDTO]:
         pass
@@ -29,31 +29,30 @@ class GoogleBooksService(ContentProvider):
         if not self.api_key:
             return []
 
-        async with httpx.AsyncClient() as client:
-            try:
-                items = await self._search_volumes(client, query, lang_restrict="ru")
-                # Fallback for English titles / titles missing Russian metadata
-                if not items:
-                    items = await self._search_volumes(client, query, lang_restrict=None)
-                return self._process_results(items)
-            except httpx.HTTPError as e:
-                # Google Books often returns intermittent 503; don't hard-fail search.
-                status = (
-                    e.response.status_code
-                    if isinstance(e, httpx.HTTPStatusError)
-                    else None
-                )
-                logger.error(
-                    "Failed to search Google Books for query=%r status=%s error=%s",
-                    query,
-                    status,
-                    type(e).__name__,
-                )
-                return []
+        try:
+            items = await self._search_volumes(query, lang_restrict="ru")
+            # Fallback for English titles / titles missing Russian metadata
+            if not items:
+                items = await self._search_volumes(query, lang_restrict=None)
+            return self._process_results(items)
+        except httpx.HTTPError as e:
+            # Intermittent 503s are already retried; what is left propagates,
+            # so the search cache never stores the failure as "no results"
+            status = (
+                e.response.status_code
+                if isinstance(e, httpx.HTTPStatusError)
+                else None
+            )
+            logger.error(
+                "Failed to search Google Books for query=%r status=%s error=%s",
+                query,
+                status,
+                type(e).__name__,
+            )
+            raise
 
     async def _search_volumes(
         self,
-        client: httpx.AsyncClient,
         query: str,
         lang_restrict: Optional[str],
     ) -> List[dict[str, Any]]:
@@ -68,7 +67,6 @@ class GoogleBooksService(ContentProvider):
             params["langRestrict"] = lang_restrict
 
         response = await self._get_with_retry(
-            client,
             f"{self.base_url}/volumes",
             params=params,
         )
@@ -78,27 +76,24 @@ class GoogleBooksService(ContentProvider):
         if not self.api_key:
             return None
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await self._get_with_retry(
-                    client,
-                    f"{self.base_url}/volumes/{external_id}",
-                    params={"key": self.api_key},
-                )
-                data = response.json()
-                results = self._process_results([data])
-                return results[0] if results else None
-            except httpx.HTTPError as e:
-                logger.error(
-                    "Failed to get Google Books details for id=%r: %s",
-                    external_id,
-                    type(e).__name__,
-                )
-                return None
+        try:
+            response = await self._get_with_retry(
+                f"{self.base_url}/volumes/{external_id}",
+                params={"key": self.api_key},
+            )
+            data = response.json()
+            results = self._process_results([data])
+            return results[0] if results else None
+        except httpx.HTTPError as e:
+            logger.error(
+                "Failed to get Google Books details for id=%r: %s",
+                external_id,
+                type(e).__name__,
+            )
+            return None
 
     async def _get_with_retry(
         self,
-        client: httpx.AsyncClient,
         url: str,
         params: dict[str, Any],
     ) -> httpx.Response:
@@ -106,7 +101,7 @@ class GoogleBooksService(ContentProvider):
 
         for attempt in range(1, _MAX_ATTEMPTS + 1):
             try:
-                response = await client.get(
+                response = await self.http.get(
                     url,
                     params=params,
                     headers=self.headers,
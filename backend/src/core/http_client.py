@@ -0,0 +1,74 @@
+"""Process-wide pooled HTTP client shared by all content providers."""
+
+import logging
+
+import httpx
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderHttpClient:
+    """Owns one keep-alive `httpx.AsyncClient` for every external provider.
+
+    httpx keeps a separate connection pool per origin, so TMDB, IGDB,
+    Shikimori, Comic Vine and Google Books each reuse their own warm
+    TCP/TLS connections instead of handshaking on every call.
+    """
+
+    def __init__(
+        self,
+        *,
+        connect_timeout: float,
+        read_timeout: float,
+        pool_timeout: float,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float,
+        http2: bool,
+    ) -> None:
+        self._timeout = httpx.Timeout(
+            read_timeout,
+            connect=connect_timeout,
+            pool=pool_timeout,
+        )
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._http2 = http2
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created lazily so CLI scripts work without the app lifecycle hooks.
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=self._http2,
+                timeout=self._timeout,
+                limits=self._limits,
+                headers={"User-Agent": "TitleTracker/1.0"},
+            )
+        return self._client
+
+    async def startup(self) -> None:
+        _ = self.client
+        logger.info("Provider HTTP client started (http2=%s)", self._http2)
+
+    async def dispose(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+
+provider_http = ProviderHttpClient(
+    connect_timeout=settings.http.connect_timeout,
+    read_timeout=settings.http.read_timeout,
+    pool_timeout=settings.http.pool_timeout,
+    max_connections=settings.http.max_connections,
+    max_keepalive_connections=settings.http.max_keepalive_connections,
+    keepalive_expiry=settings.http.keepalive_expiry,
+    http2=settings.http.http2,
+)
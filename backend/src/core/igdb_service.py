@@ -35,26 +35,25 @@ class IGDBService(ContentProvider):
         if not self.client_id or not self.client_secret:
             raise ValueError("Twitch Client ID and Secret are not configured")
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    self.auth_url,
-                    params={
-                        "client_id": self.client_id,
-                        "client_secret": self.client_secret,
-                        "grant_type": "client_credentials",
-                    },
-                )
-                response.raise_for_status()
-                data = response.json()
+        try:
+            response = await self.http.post(
+                self.auth_url,
+                params={
+                    "client_id": self.client_id,
+                    "client_secret": self.client_secret,
+                    "grant_type": "client_credentials",
+                },
+            )
+            response.raise_for_status()
+            data = response.json()
                 
-                self.access_token = data["access_token"]
-                # Expires in is in seconds. Subtract a buffer to be safe.
-                self.token_expires_at = datetime.now() + timedelta(seconds=data["expires_in"] - 60)
-                return self.access_token
-            except httpx.HTTPError as e:
-                logger.error(f"Failed to authenticate with Twitch: {e}")
-                raise
+            self.access_token = data["access_token"]
+            # Expires in is in seconds. Subtract a buffer to be safe.
+            self.token_expires_at = datetime.now() + timedelta(seconds=data["expires_in"] - 60)
+            return self.access_token
+        except httpx.HTTPError as e:
+            logger.error(f"Failed to authenticate with Twitch: {e}")
+            raise
 
     async def search_games(self, query: str) -> List[Dict[str, Any]]:
         """Searches for games on IGDB."""
@@ -69,22 +68,21 @@ class IGDBService(ContentProvider):
         # fields name, cover.url, first_release_date, genres.name;
         body = f'search "{query}"; fields name, cover.url, first_release_date, genres.name; limit 20;'
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}/games",
-                    headers=headers,
-                    content=body
-                )
-                response.raise_for_status()
-                games = response.json()
-                return self._process_games(games)
-            except httpx.HTTPError as e:
-                logger.error(f"Failed to search games on IGDB: {e}")
-                # Return empty list on error to gracefully handle failures? 
-                # Or raise? Letting it raise for now so controller can handle or 500.
-                # Or raise? Letting it raise for now so controller can handle or 500.
-                raise
+        try:
+            response = await self.http.post(
+                f"{self.base_url}/games",
+                headers=headers,
+                content=body
+            )
+            response.raise_for_status()
+            games = response.json()
+            return self._process_games(games)
+        except httpx.HTTPError as e:
+            logger.error(f"Failed to search games on IGDB: {e}")
+            # Return empty list on error to gracefully handle failures? 
+            # Or raise? Letting it raise for now so controller can handle or 500.
+            # Or raise? Letting it raise for now so controller can handle or 500.
+            raise
 
     async def get_game_details(self, external_id: str) -> Optional[Dict[str, Any]]:
         """Get details for a specific game by ID."""
@@ -98,20 +96,19 @@ class IGDBService(ContentProvider):
             f"dlcs, expansions, parent_game, category; where id = {external_id};"
         )
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}/games",
-                    headers=headers,
-                    content=body
-                )
-                response.raise_for_status()
-                games = response.json()
-                processed = self._process_games(games)
-                return processed[0] if processed else None
-            except httpx.HTTPError as e:
-                logger.error(f"Failed to get game details from IGDB: {e}")
-                return None
+        try:
+            response = await self.http.post(
+                f"{self.base_url}/games",
+                headers=headers,
+                content=body
+            )
+            response.raise_for_status()
+            games = response.json()
+            processed = self._process_games(games)
+            return processed[0] if processed else None
+        except httpx.HTTPError as e:
+            logger.error(f"Failed to get game details from IGDB: {e}")
+            return None
 
     async def get_games_by_ids(self, game_ids: List[int]) -> List[Dict[str, Any]]:
         """Fetch multiple games by IGDB IDs."""
@@ -130,18 +127,17 @@ class IGDBService(ContentProvider):
             f"where id = ({ids}); limit {min(len(game_ids), 500)};"
         )
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}/games",
-                    headers=headers,
-                    content=body,
-                )
-                response.raise_for_status()
-                return self._process_games(response.json())
-            except httpx.HTTPError as e:
-                logger.error(f"Failed to get games by ids from IGDB: {e}")
-                return []
+        try:
+            response = await self.http.post(
+                f"{self.base_url}/games",
+                headers=headers,
+                content=body,
+            )
+            response.raise_for_status()
+            return self._process_games(response.json())
+        except httpx.HTTPError as e:
+            logger.error(f"Failed to get games by ids from IGDB: {e}")
+            return []
 
     async def get_game_dlcs(self, external_id: str) -> List[Dict[str, Any]]:
         """Fetch DLC and expansions linked to a main game on IGDB."""
@@ -0,0 +1,224 @@
+"""Decoding and re-encoding of uploaded images.
+
+Uploads are processed by jobs on `media_queue`, in the background worker.
+Resizing, WebP encoding and blurhash are CPU-bound, so the jobs hand them
+to worker processes through `image_pool` rather than running them on the
+event loop. `render` is the unit of work sent to the pool: it takes the
+raw upload and returns plain bytes and numbers, which pickle cheaply.
+"""
+
+import asyncio
+import io
+import logging
+import multiprocessing
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+from PIL import ExifTags, Image, ImageOps
+
+from core.config import settings
+from core.redis.queue import JobQueue
+
+logger = logging.getLogger(__name__)
+
+WEBP_QUALITY = 80
+# Metadata that can carry camera, location or editing details
+PRIVATE_METADATA = ("exif", "xmp", "XML:com.adobe.xmp", "comment")
+_BLURHASH_CHARS = (
+    "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Variant:
+    name: str
+    width: int
+    height: int
+    # Cover-crop to exactly width x height instead of fitting inside the box
+    crop: bool = False
+
+
+@dataclass(slots=True)
+class RenderedImage:
+    width: int
+    height: int
+    blurhash: str
+    # Variant name -> WebP bytes
+    variants: dict[str, bytes]
+    # The original re-encoded without metadata, or None if it carried none
+    stripped: bytes | None
+    # MIME type of the original (and of `stripped`)
+    content_type: str | None
+
+
+def _base83(value: int, length: int) -> str:
+    return "".join(
+        _BLURHASH_CHARS[value // 83 ** (length - i - 1) % 83] for i in range(length)
+    )
+
+
+def _to_linear(srgb: np.ndarray) -> np.ndarray:
+    srgb = srgb / 255
+    return np.where(srgb <= 0.04045, srgb / 12.92, ((srgb + 0.055) / 1.055) ** 2.4)
+
+
+def _to_srgb(linear: float) -> int:
+    linear = min(max(linear, 0.0), 1.0)
+    if linear <= 0.0031308:
+        return round(linear * 12.92 * 255)
+    return round((1.055 * linear ** (1 / 2.4) - 0.055) * 255)
+
+
+def blurhash(image: Image.Image, x_components: int = 4, y_components: int = 3) -> str:
+    """Blurhash (https://blurha.sh) of an image, computed on a 32px thumbnail."""
+    small = image.convert("RGB")
+    small.thumbnail((32, 32))
+    pixels = _to_linear(np.asarray(small, dtype=np.float64))
+    height, width = pixels.shape[:2]
+    xs = np.arange(width)
+    ys = np.arange(height)
+
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            basis = np.outer(
+                np.cos(np.pi * j * ys / height), np.cos(np.pi * i * xs / width)
+            )
+            scale = 1 if i == j == 0 else 2
+            factors.append(
+                scale * (pixels * basis[..., None]).sum(axis=(0, 1)) / (width * height)
+            )
+
+    dc, ac = factors[0], factors[1:]
+    result = _base83((x_components - 1) + (y_components - 1) * 9, 1)
+    if ac:
+        max_ac = float(np.abs(ac).max())
+        quantised_max = max(0, min(82, int(max_ac * 166 - 0.5)))
+        max_value = (quantised_max + 1) / 166
+        result += _base83(quantised_max, 1)
+    else:
+        max_value = 1
+        result += _base83(0, 1)
+
+    r, g, b = (_to_srgb(float(c)) for c in dc)
+    result += _base83((r << 16) + (g << 8) + b, 4)
+    for component in ac:
+        r, g, b = (
+            max(
+                0,
+                min(18, int(np.floor(np.sign(c) * abs(c / max_value) ** 0.5 * 9 + 9.5))),
+            )
+            for c in component
+        )
+        result += _base83(r * 19 * 19 + g * 19 + b, 2)
+    return result
+
+
+def _webp(image: Image.Image, variant: Variant, icc_profile: bytes | None) -> bytes:
+    if variant.crop:
+        resized = ImageOps.fit(image, (variant.width, variant.height))
+    else:
+        resized = image.copy()
+        resized.thumbnail((variant.width, variant.height))
+    buffer = io.BytesIO()
+    resized.save(
+        buffer, "WEBP", quality=WEBP_QUALITY, method=4, icc_profile=icc_profile
+    )
+    return buffer.getvalue()
+
+
+def _strip(original: Image.Image, upright: Image.Image, rotated: bool) -> bytes | None:
+    """Re-encode the original without metadata, in its own format.
+
+    Only the colour profile is kept, since dropping it would shift colours.
+    """
+    if not any(key in original.info for key in PRIVATE_METADATA):
+        return None
+    # Animations would lose frames, and GIF has no EXIF to begin with
+    if getattr(original, "n_frames", 1) > 1 or original.format not in {
+        "JPEG",
+        "PNG",
+        "WEBP",
+    }:
+        return None
+
+    clean = {"icc_profile": original.info.get("icc_profile"), "exif": b"", "comment": b""}
+    buffer = io.BytesIO()
+    if original.format == "JPEG":
+        if rotated:
+            upright.save(buffer, "JPEG", quality=95, **clean)
+        else:
+            # Reuse the source quantisation tables: no visible recompression
+            original.save(buffer, "JPEG", quality="keep", **clean)
+    elif original.format == "PNG":
+        upright.info.clear()
+        upright.save(buffer, "PNG", optimize=True, icc_profile=clean["icc_profile"])
+    else:
+        upright.save(buffer, "WEBP", quality=90, **clean)
+    return buffer.getvalue()
+
+
+def render(
+    data: bytes, variants: Sequence[Variant], *, strip: bool = True
+) -> RenderedImage:
+    """Decode an upload and produce its WebP variants, blurhash and clean copy.
+
+    EXIF orientation is applied to the pixels before the tag is dropped,
+    so stripped images still display upright. Pass `strip=False` when the
+    original is not kept.
+    """
+    with Image.open(io.BytesIO(data)) as original:
+        original.load()
+        rotated = original.getexif().get(ExifTags.Base.Orientation, 1) != 1
+        upright = ImageOps.exif_transpose(original)
+        icc_profile = original.info.get("icc_profile")
+        # Variants are flat images: use the first frame and drop the palette
+        frame = upright.convert("RGBA" if "A" in upright.getbands() else "RGB")
+        return RenderedImage(
+            width=upright.width,
+            height=upright.height,
+            blurhash=blurhash(frame),
+            variants={
+                variant.name: _webp(frame, variant, icc_profile) for variant in variants
+            },
+            stripped=_strip(original, upright, rotated) if strip else None,
+            content_type=Image.MIME.get(original.format or ""),
+        )
+
+
+class ImageProcessPool:
+    """Process pool for image work, started on first use.
+
+    Children are spawned rather than forked so they never inherit the
+    parent's event loop, sockets or connection pools.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self._max_workers = max_workers
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info("Image process pool started (%s workers)", self._max_workers)
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def dispose(self) -> None:
+        if self._executor is not None:
+            await asyncio.to_thread(self._executor.shutdown)
+        self._executor = None
+
+
+media_queue = JobQueue("media")
+image_pool = ImageProcessPool(max_workers=settings.IMAGE_PROCESS_WORKERS)
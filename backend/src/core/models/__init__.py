@@ -17,12 +17,21 @@ from .db_helper import db_helper
 # from .role import Role, user_roles
 from .user import User
 from .title import GamePlatform, Title, UserTitle, TitleCategory, UserTitleStatus
-from .notification import Notification, NotificationType
+from .notification import (
+    ActorEvent,
+    Notification,
+    NotificationCursor,
+    NotificationType,
+)
 from .screenshot import TitleScreenshot
 from .review_view import ReviewView
 from .review_social import ReactionType, ReviewComment, ReviewReaction
 from .season import TitleSeason, TitleEpisode, UserTitleSeason, UserTitleEpisode
 from .user_list import UserList, UserListItem
+from .stats_rollup import UserStatsRollup
+from .title_neighbour import TitleNeighbour
+from .library_deletion import LibraryDeletion
+from .catalog_sync import CatalogSync
 
 __all__ = (
     "db_helper",
@@ -35,6 +44,8 @@ __all__ = (
     "GamePlatform",
     "Notification",
     "NotificationType",
+    "ActorEvent",
+    "NotificationCursor",
     "TitleScreenshot",
     "ReviewView",
     "ReactionType",
@@ -46,5 +57,9 @@ __all__ = (
     "UserTitleEpisode",
     "UserList",
     "UserListItem",
+    "UserStatsRollup",
+    "TitleNeighbour",
+    "LibraryDeletion",
+    "CatalogSync",
 )
 
@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from sqlalchemy import SmallInteger, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class CatalogSync(Base):
+    """When a catalog object was last synced from its provider.
+
+    `kind` is one of the `user_titles.sync_guard` namespaces; `object_id`
+    is a title or title season id. Written in the same transaction as the
+    synced rows, so it only becomes visible together with them.
+    """
+
+    kind: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    object_id: Mapped[int] = mapped_column(primary_key=True)
+    synced_at: Mapped[datetime] = mapped_column(server_default=func.now())
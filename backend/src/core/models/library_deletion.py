@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from sqlalchemy import ForeignKey, Index, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+from .mixins import IntIdPkMixin
+
+
+class LibraryDeletion(IntIdPkMixin, Base):
+    """A row removed from a user's library, for incremental backup exports.
+
+    `kind` "entry", "season" and "episode" are exported as tombstones;
+    "screenshot" only marks the entry as changed so its screenshot list is
+    exported again. Written by `backup.deletions`.
+    """
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    title_id: Mapped[int] = mapped_column(
+        ForeignKey("titles.id", ondelete="CASCADE"), nullable=False
+    )
+    kind: Mapped[str] = mapped_column(String(16), nullable=False)
+    season_number: Mapped[int | None] = mapped_column(nullable=True)
+    episode_number: Mapped[int | None] = mapped_column(nullable=True)
+    deleted_at: Mapped[datetime] = mapped_column(server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_library_deletions_user_id_deleted_at", "user_id", "deleted_at"),
+    )
@@ -2,7 +2,7 @@ from datetime import datetime
 from enum import Enum
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, String, func, Boolean
+from sqlalchemy import ForeignKey, Index, String, func, Boolean
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -51,3 +51,47 @@ class Notification(IntIdPkMixin, Base):
     user_title: Mapped["UserTitle"] = relationship(
         "UserTitle", lazy="selectin"
     )
+
+    __table_args__ = (
+        Index(
+            "ix_notifications_recipient_id_created_at",
+            "recipient_id",
+            "created_at",
+            "id",
+        ),
+    )
+
+
+class ActorEvent(IntIdPkMixin, Base):
+    """An event of a high-follower actor, stored once and read by every follower.
+
+    Followers see it merged into their notifications; whether it is read is
+    derived from the follower's `NotificationCursor`.
+    """
+
+    actor_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    user_title_id: Mapped[int | None] = mapped_column(
+        ForeignKey("user_titles.id", ondelete="CASCADE"), nullable=True
+    )
+    type: Mapped[NotificationType] = mapped_column(String(50), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(server_default=func.now())
+
+    actor: Mapped["User"] = relationship("User", lazy="selectin")
+    user_title: Mapped["UserTitle"] = relationship("UserTitle", lazy="selectin")
+
+    __table_args__ = (
+        Index("ix_actor_events_actor_id_created_at", "actor_id", "created_at", "id"),
+    )
+
+
+class NotificationCursor(Base):
+    """Per-recipient position in the shared activity streams."""
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    # Activities created at or before read_at are read, before cleared_at hidden
+    read_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    cleared_at: Mapped[datetime | None] = mapped_column(nullable=True)
@@ -2,7 +2,7 @@ from datetime import datetime
 from enum import Enum
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, String, Text, UniqueConstraint, func
+from sqlalchemy import ForeignKey, Index, String, Text, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -37,6 +37,15 @@ class ReviewComment(IntIdPkMixin, Base):
     user_title: Mapped["UserTitle"] = relationship("UserTitle", lazy="noload")
     author: Mapped["User"] = relationship("User", lazy="selectin")
 
+    __table_args__ = (
+        Index(
+            "ix_review_comments_user_title_id_created_at",
+            "user_title_id",
+            "created_at",
+            "id",
+        ),
+    )
+
 
 class ReviewReaction(IntIdPkMixin, Base):
     user_title_id: Mapped[int] = mapped_column(
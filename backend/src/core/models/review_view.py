@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, UniqueConstraint, func
+from sqlalchemy import ForeignKey, Index, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -28,4 +28,10 @@ class ReviewView(IntIdPkMixin, Base):
 
     __table_args__ = (
         UniqueConstraint("user_title_id", "viewer_id", name="uq_review_view"),
+        Index(
+            "ix_review_views_user_title_id_viewed_at",
+            "user_title_id",
+            "viewed_at",
+            "id",
+        ),
     )
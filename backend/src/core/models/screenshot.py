@@ -12,6 +12,12 @@ class TitleScreenshot(IntIdPkMixin, Base):
         ForeignKey("user_titles.id", ondelete="CASCADE"), nullable=False, index=True
     )
     url: Mapped[str] = mapped_column(String(1024), nullable=False)
-    s3_key: Mapped[str] = mapped_column(String(512), nullable=False)
+    s3_key: Mapped[str] = mapped_column(String(512), nullable=False, index=True)
     position: Mapped[int] = mapped_column(default=0)
+    # Filled in by the derivative job once the upload has been processed
+    thumbnail_url: Mapped[str | None] = mapped_column(String(1024))
+    preview_url: Mapped[str | None] = mapped_column(String(1024))
+    width: Mapped[int | None]
+    height: Mapped[int | None]
+    blurhash: Mapped[str | None] = mapped_column(String(64))
     created_at: Mapped[datetime] = mapped_column(server_default=func.now())
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Float, ForeignKey, String, Text, UniqueConstraint, func
+from sqlalchemy import Float, ForeignKey, Index, String, Text, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -83,6 +83,12 @@ class UserTitleSeason(IntIdPkMixin, Base):
         UniqueConstraint(
             "user_title_id", "title_season_id", name="uq_user_title_season"
         ),
+        # Incremental backup exports
+        Index(
+            "ix_user_title_seasons_user_title_id_updated_at",
+            "user_title_id",
+            "updated_at",
+        ),
     )
 
 
@@ -117,4 +123,9 @@ class UserTitleEpisode(IntIdPkMixin, Base):
             "title_episode_id",
             name="uq_user_title_episode",
         ),
+        Index(
+            "ix_user_title_episodes_user_title_season_id_updated_at",
+            "user_title_season_id",
+            "updated_at",
+        ),
     )
@@ -0,0 +1,25 @@
+from sqlalchemy import Float, ForeignKey, SmallInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class UserStatsRollup(Base):
+    """Completed-title counters of one user for one month.
+
+    One row per (dimension, key): dimension "total" has an empty key,
+    "category" / "platform" keys are enum names, "genre" keys are genres.
+    Maintained by `stats.rollups`.
+    """
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    year: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    month: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    dimension: Mapped[str] = mapped_column(String(16), primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+
+    count: Mapped[int] = mapped_column(default=0, server_default="0")
+    score_sum: Mapped[float] = mapped_column(Float, default=0, server_default="0")
+    score_count: Mapped[int] = mapped_column(default=0, server_default="0")
@@ -2,7 +2,7 @@ from datetime import datetime
 from enum import Enum
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, String, UniqueConstraint, func, Float, Text
+from sqlalchemy import ForeignKey, Index, String, UniqueConstraint, func, Float, Text
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -117,4 +117,8 @@ class UserTitle(IntIdPkMixin, Base):
 
     __table_args__ = (
         UniqueConstraint("user_id", "title_id", name="uq_user_title"),
+        # Keyset pages of the feed
+        Index("ix_user_titles_user_id_updated_at", "user_id", "updated_at", "id"),
+        # Year stats and monthly rollup recomputes
+        Index("ix_user_titles_user_id_finished_at", "user_id", "finished_at"),
     )
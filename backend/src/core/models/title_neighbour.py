@@ -0,0 +1,21 @@
+from sqlalchemy import REAL, ForeignKey, SmallInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class TitleNeighbour(Base):
+    """The most similar titles of a title, by item-item collaborative filtering.
+
+    Rebuilt in full by `scripts/build_title_neighbours.py`; rank 1 is the
+    closest neighbour.
+    """
+
+    title_id: Mapped[int] = mapped_column(
+        ForeignKey("titles.id", ondelete="CASCADE"), primary_key=True
+    )
+    rank: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    neighbour_id: Mapped[int] = mapped_column(
+        ForeignKey("titles.id", ondelete="CASCADE")
+    )
+    similarity: Mapped[float] = mapped_column(REAL)
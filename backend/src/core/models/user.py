@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, String, Table, Text, func
+from sqlalchemy import Column, DateTime, ForeignKey, Index, String, Table, Text, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -13,7 +13,25 @@ subscriptions_table = Table(
     Column(
         "following_id", ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
     ),
-    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column(
+        "created_at",
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    ),
+    # Keyset pages of followers / following, newest first
+    Index(
+        "ix_subscriptions_following_id_created_at",
+        "following_id",
+        "created_at",
+        "follower_id",
+    ),
+    Index(
+        "ix_subscriptions_follower_id_created_at",
+        "follower_id",
+        "created_at",
+        "following_id",
+    ),
 )
 
 
@@ -41,13 +59,18 @@ class User(IntIdPkMixin, Base):
     )
     last_login: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
 
+    # Maintained by follow/unfollow in the same transaction as subscriptions
+    followers_count: Mapped[int] = mapped_column(default=0, server_default="0")
+    following_count: Mapped[int] = mapped_column(default=0, server_default="0")
+
+    # Social graph is opt-in: use selectinload(User.followers) where needed
     followers: Mapped[list["User"]] = relationship(
         "User",
         secondary=subscriptions_table,
         primaryjoin=lambda: User.id == subscriptions_table.c.following_id,
         secondaryjoin=lambda: User.id == subscriptions_table.c.follower_id,
         back_populates="following",
-        lazy="selectin",
+        lazy="raise",
     )
 
     following: Mapped[list["User"]] = relationship(
@@ -56,6 +79,6 @@ class User(IntIdPkMixin, Base):
         primaryjoin=lambda: User.id == subscriptions_table.c.follower_id,
         secondaryjoin=lambda: User.id == subscriptions_table.c.following_id,
         back_populates="followers",
-        lazy="selectin",
+        lazy="raise",
     )
 
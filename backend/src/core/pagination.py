@@ -0,0 +1,100 @@
+"""Opaque keyset cursors for lists ordered by (timestamp, id).
+
+List endpoints accept `cursor` alongside the legacy `limit`/`offset` and
+return the cursor of the next page in the `X-Next-Cursor` header (absent on
+the last page), so response bodies stay unchanged. A cursor page is a
+single index range scan no matter how deep the client has scrolled.
+"""
+
+import base64
+import binascii
+import json
+from collections.abc import Callable, Sequence
+from datetime import datetime
+from typing import Any
+
+from litestar import Response
+from litestar.exceptions import ClientException
+from sqlalchemy import ColumnElement, Select, literal, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+Key = tuple[datetime, int]
+
+
+def encode_cursor(payload: Any) -> str:
+    """Encode any JSON-able payload; datetimes become ISO strings."""
+    raw = json.dumps(payload, default=datetime.isoformat, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Any:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ClientException(detail="Invalid cursor") from exc
+
+
+def encode_key(key: Key) -> str:
+    return encode_cursor([key[0], key[1]])
+
+
+def parse_key(raw: Any) -> Key:
+    """Turn a decoded `[timestamp, id]` pair back into a key."""
+    try:
+        ts, row_id = raw
+        return datetime.fromisoformat(ts), int(row_id)
+    except (TypeError, ValueError) as exc:
+        raise ClientException(detail="Invalid cursor") from exc
+
+
+def decode_key(cursor: str) -> Key:
+    return parse_key(decode_cursor(cursor))
+
+
+def keyset_page(
+    stmt: Select,
+    ts_col: ColumnElement,
+    id_col: ColumnElement,
+    *,
+    limit: int,
+    cursor: str | None = None,
+    offset: int = 0,
+    descending: bool = True,
+) -> Select:
+    """Order by (ts, id), continue after `cursor` and fetch one extra row.
+
+    The extra row tells `split_page` whether another page exists. `offset`
+    is only honoured without a cursor, for older clients.
+    """
+    if descending:
+        stmt = stmt.order_by(ts_col.desc(), id_col.desc())
+    else:
+        stmt = stmt.order_by(ts_col.asc(), id_col.asc())
+
+    if cursor:
+        position = tuple_(ts_col, id_col)
+        ts, row_id = decode_key(cursor)
+        # Bind with the column types so timestamptz keys stay tz-aware
+        after = tuple_(literal(ts, ts_col.type), literal(row_id, id_col.type))
+        stmt = stmt.where(position < after if descending else position > after)
+    elif offset:
+        stmt = stmt.offset(offset)
+
+    return stmt.limit(limit + 1)
+
+
+def split_page[T](
+    rows: Sequence[T], limit: int, key: Callable[[T], Key]
+) -> tuple[list[T], str | None]:
+    """Trim the look-ahead row and build the next cursor from the last item."""
+    page = list(rows[:limit])
+    if len(rows) <= limit or not page:
+        return page, None
+    return page, encode_key(key(page[-1]))
+
+
+def paged_response(content: Any, next_cursor: str | None) -> Response:
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+    return Response(content=content, headers=headers)
@@ -0,0 +1,173 @@
+"""Small Redis-backed job queue with retries and per-key dedupe."""
+
+import asyncio
+import json
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+from uuid import uuid4
+
+from redis.exceptions import RedisError
+
+from core.redis.client import redis_client
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[dict[str, Any]], Awaitable[None]]
+
+
+class JobQueue:
+    """A reliable list-based queue.
+
+    Jobs move atomically from the ready list into a per-consumer processing
+    list while they run, so a crashed worker's jobs are requeued on restart.
+    Failed jobs are retried with exponential backoff through a delayed
+    sorted set and end up in a dead-letter list after `max_attempts`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_attempts: int = 5,
+        base_backoff_seconds: float = 5.0,
+        dedupe_ttl_seconds: int = 60 * 60,
+    ) -> None:
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_backoff_seconds = base_backoff_seconds
+        self.dedupe_ttl_seconds = dedupe_ttl_seconds
+
+    @property
+    def _ready_key(self) -> str:
+        return f"queue:{self.name}:ready"
+
+    @property
+    def _delayed_key(self) -> str:
+        return f"queue:{self.name}:delayed"
+
+    @property
+    def _dead_key(self) -> str:
+        return f"queue:{self.name}:dead"
+
+    def _processing_key(self, consumer: str) -> str:
+        return f"queue:{self.name}:processing:{consumer}"
+
+    def _dedupe_key(self, dedupe_key: str) -> str:
+        return f"queue:{self.name}:pending:{dedupe_key}"
+
+    async def enqueue(
+        self,
+        kind: str,
+        payload: dict[str, Any],
+        *,
+        dedupe_key: str | None = None,
+    ) -> bool:
+        """Queue a job; returns False if an identical job is already pending."""
+        job_id = uuid4().hex
+        if dedupe_key is not None:
+            claimed = await redis_client.set(
+                self._dedupe_key(dedupe_key),
+                job_id,
+                nx=True,
+                ex=self.dedupe_ttl_seconds,
+            )
+            if not claimed:
+                return False
+
+        job = {
+            "id": job_id,
+            "kind": kind,
+            "payload": payload,
+            "attempts": 0,
+            "dedupe_key": dedupe_key,
+        }
+        await redis_client.lpush(self._ready_key, json.dumps(job))
+        return True
+
+    async def _promote_due(self) -> None:
+        due = await redis_client.zrangebyscore(
+            self._delayed_key, "-inf", time.time(), start=0, num=100
+        )
+        for raw in due:
+            # ZREM succeeds for exactly one worker, which then owns the job
+            if await redis_client.zrem(self._delayed_key, raw):
+                await redis_client.lpush(self._ready_key, raw)
+
+    async def _requeue_orphans(self, consumer: str) -> None:
+        processing = self._processing_key(consumer)
+        while await redis_client.lmove(processing, self._ready_key, "RIGHT", "LEFT"):
+            pass
+
+    async def _handle(self, raw: str, handlers: dict[str, JobHandler]) -> None:
+        job = json.loads(raw)
+        if job.get("dedupe_key"):
+            # New requests for the same key may queue again once this one starts
+            await redis_client.delete(self._dedupe_key(job["dedupe_key"]))
+
+        handler = handlers.get(job["kind"])
+        if handler is None:
+            logger.error("No handler for job kind %r in queue %s", job["kind"], self.name)
+            await redis_client.lpush(self._dead_key, raw)
+            return
+
+        try:
+            await handler(job["payload"])
+        except Exception:
+            job["attempts"] += 1
+            if job["attempts"] >= self.max_attempts:
+                logger.exception(
+                    "Job %s (%s) failed permanently after %s attempts",
+                    job["id"],
+                    job["kind"],
+                    job["attempts"],
+                )
+                await redis_client.lpush(self._dead_key, json.dumps(job))
+                return
+
+            delay = self.base_backoff_seconds * 2 ** (job["attempts"] - 1)
+            logger.warning(
+                "Job %s (%s) failed, retry %s/%s in %.0fs",
+                job["id"],
+                job["kind"],
+                job["attempts"],
+                self.max_attempts - 1,
+                delay,
+                exc_info=True,
+            )
+            await redis_client.zadd(self._delayed_key, {json.dumps(job): time.time() + delay})
+
+    async def run_worker(
+        self,
+        handlers: dict[str, JobHandler],
+        stop: asyncio.Event,
+        *,
+        consumer: str,
+        poll_timeout: float = 1.0,
+    ) -> None:
+        """Process jobs until `stop` is set; the job in progress always finishes."""
+        processing = self._processing_key(consumer)
+        await self._requeue_orphans(consumer)
+        logger.info("Worker %s consuming queue %s", consumer, self.name)
+
+        while not stop.is_set():
+            try:
+                await self._promote_due()
+                raw = await redis_client.blmove(
+                    self._ready_key, processing, poll_timeout, "RIGHT", "LEFT"
+                )
+            except RedisError:
+                logger.exception("Queue %s unavailable, backing off", self.name)
+                await asyncio.sleep(poll_timeout)
+                continue
+
+            if raw is None:
+                continue
+
+            try:
+                await self._handle(raw, handlers)
+            finally:
+                await redis_client.lrem(processing, 1, raw)
+
+        logger.info("Worker %s stopped", consumer)
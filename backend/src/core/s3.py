@@ -1,17 +1,65 @@
+import asyncio
 import logging
+from collections.abc import AsyncIterable, AsyncIterator
+from contextlib import AsyncExitStack, suppress
+from typing import Any
 from uuid import uuid4
 
 import aioboto3
 from botocore.config import Config as BotoConfig
+from botocore.exceptions import BotoCoreError, ClientError
+from litestar.datastructures import UploadFile
 
 from core.config import settings
 
 logger = logging.getLogger(__name__)
 
 ALLOWED_CONTENT_TYPES = {"image/jpeg", "image/png", "image/webp", "image/gif"}
+# File extension used in the keys of uploaded images
+IMAGE_EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/gif": "gif",
+}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5 MB
 MAX_SCREENSHOTS_PER_ENTRY = 10
 
+# Uploads read from the request in chunks of this size
+UPLOAD_CHUNK_SIZE = 256 * 1024
+# Larger uploads go up as multipart, in parts of at least this size
+# (S3 requires 5 MiB for every part but the last)
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+# For objects whose key changes whenever their content does
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Most keys a single DeleteObjects request accepts
+DELETE_OBJECTS_BATCH = 1000
+# Lifetime of presigned upload forms handed to clients
+PRESIGNED_UPLOAD_EXPIRES_SECONDS = 10 * 60
+
+
+class FileTooLargeError(ValueError):
+    def __init__(self, max_size: int) -> None:
+        super().__init__(f"File exceeds {max_size} bytes")
+        self.max_size = max_size
+
+
+async def iter_upload(
+    upload: UploadFile, chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    while chunk := await upload.read(chunk_size):
+        yield chunk
+
+
+async def read_limited(chunks: AsyncIterable[bytes], max_size: int) -> bytes:
+    """Collect a stream, raising FileTooLargeError once it passes `max_size`."""
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer += chunk
+        if len(buffer) > max_size:
+            raise FileTooLargeError(max_size)
+    return bytes(buffer)
+
 
 def parse_s3_key_from_url(url: str) -> str | None:
     """Extract S3 object key from a public URL ({endpoint}/{bucket}/{key})."""
@@ -23,9 +71,19 @@ def parse_s3_key_from_url(url: str) -> str | None:
 
 
 class S3Service:
+    """S3 access through one long-lived client.
+
+    The client and its connection pool are opened on first use (or by
+    `startup`) and closed by `dispose`, so requests reuse warm connections
+    instead of setting up a client per call.
+    """
+
     def __init__(self):
         self._session = aioboto3.Session()
         self._config = settings.s3
+        self._client: Any = None
+        self._exit_stack: AsyncExitStack | None = None
+        self._lock = asyncio.Lock()
 
     def _get_client_kwargs(self):
         return {
@@ -34,41 +92,237 @@ class S3Service:
             "aws_access_key_id": self._config.access_key,
             "aws_secret_access_key": self._config.secret_key,
             "region_name": self._config.region,
-            "config": BotoConfig(signature_version="s3v4"),
+            "config": BotoConfig(
+                signature_version="s3v4",
+                max_pool_connections=self._config.max_pool_connections,
+                tcp_keepalive=True,
+            ),
         }
 
+    async def _get_client(self) -> Any:
+        if self._client is None:
+            async with self._lock:
+                if self._client is None:
+                    stack = AsyncExitStack()
+                    self._client = await stack.enter_async_context(
+                        self._session.client(**self._get_client_kwargs())
+                    )
+                    self._exit_stack = stack
+        return self._client
+
+    async def startup(self) -> None:
+        if not self._config.endpoint_url:
+            logger.info("S3 is not configured; client not started")
+            return
+        await self._get_client()
+        logger.info("S3 client started")
+
+    async def dispose(self) -> None:
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+        self._client = None
+        self._exit_stack = None
+
     def generate_key(self, user_id: int, extension: str) -> str:
         return f"screenshots/{user_id}/{uuid4().hex}.{extension}"
 
+    def public_url(self, key: str) -> str:
+        return f"{self._config.endpoint_url}/{self._config.bucket_name}/{key}"
+
     async def upload_file(
         self,
         file_content: bytes,
         key: str,
         content_type: str,
+        *,
+        cache_control: str | None = None,
     ) -> str:
-        async with self._session.client(**self._get_client_kwargs()) as s3:
-            try:
-                await s3.put_object(
-                    Bucket=self._config.bucket_name,
-                    Key=key,
-                    Body=file_content,
-                    ContentType=content_type,
-                    ACL="public-read",
-                )
-            except Exception as e:
-                logger.exception("S3 upload failed")
-                raise RuntimeError(f"Не удалось загрузить файл в S3: {str(e)}")
+        s3 = await self._get_client()
+        extra = {"CacheControl": cache_control} if cache_control else {}
+        try:
+            await s3.put_object(
+                Bucket=self._config.bucket_name,
+                Key=key,
+                Body=file_content,
+                ContentType=content_type,
+                ACL="public-read",
+                **extra,
+            )
+        except (BotoCoreError, ClientError) as e:
+            logger.exception("S3 upload failed")
+            raise RuntimeError(f"Не удалось загрузить файл в S3: {str(e)}")
 
-        url = f"{self._config.endpoint_url}/{self._config.bucket_name}/{key}"
+        url = self.public_url(key)
         logger.info("Uploaded %s -> %s", key, url)
         return url
 
-    async def delete_file(self, key: str) -> None:
-        async with self._session.client(**self._get_client_kwargs()) as s3:
-            await s3.delete_object(
-                Bucket=self._config.bucket_name,
+    async def upload_stream(
+        self,
+        chunks: AsyncIterable[bytes],
+        key: str,
+        content_type: str,
+        *,
+        max_size: int | None = None,
+        public: bool = True,
+    ) -> int:
+        """Upload a stream of chunks without holding it all; returns its size.
+
+        Raises FileTooLargeError as soon as more than `max_size` bytes have
+        been read. Streams up to MULTIPART_THRESHOLD go up with one PUT,
+        longer ones as a multipart upload that is aborted on any error.
+        """
+        s3 = await self._get_client()
+        bucket = self._config.bucket_name
+        extra: dict[str, str] = {"ContentType": content_type}
+        if public:
+            extra["ACL"] = "public-read"
+
+        buffer = bytearray()
+        size = 0
+        upload_id: str | None = None
+        parts: list[dict[str, Any]] = []
+
+        async def flush_part() -> None:
+            response = await s3.upload_part(
+                Bucket=bucket,
                 Key=key,
+                UploadId=upload_id,
+                PartNumber=len(parts) + 1,
+                Body=bytes(buffer),
             )
+            parts.append({"ETag": response["ETag"], "PartNumber": len(parts) + 1})
+            buffer.clear()
+
+        async def abort() -> None:
+            if upload_id is not None:
+                with suppress(BotoCoreError, ClientError):
+                    await s3.abort_multipart_upload(
+                        Bucket=bucket, Key=key, UploadId=upload_id
+                    )
+
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise FileTooLargeError(max_size)
+                buffer += chunk
+                if len(buffer) >= MULTIPART_THRESHOLD:
+                    if upload_id is None:
+                        response = await s3.create_multipart_upload(
+                            Bucket=bucket, Key=key, **extra
+                        )
+                        upload_id = response["UploadId"]
+                    await flush_part()
+
+            if upload_id is None:
+                await s3.put_object(Bucket=bucket, Key=key, Body=bytes(buffer), **extra)
+            else:
+                if buffer:
+                    await flush_part()
+                await s3.complete_multipart_upload(
+                    Bucket=bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    MultipartUpload={"Parts": parts},
+                )
+        except (BotoCoreError, ClientError) as e:
+            await abort()
+            logger.exception("S3 upload failed")
+            raise RuntimeError(f"Не удалось загрузить файл в S3: {e!s}") from e
+        except BaseException:
+            await abort()
+            raise
+
+        logger.info(
+            "Uploaded %s (%s bytes, %s)",
+            key,
+            size,
+            f"{len(parts)} parts" if parts else "single put",
+        )
+        return size
+
+    async def presigned_post(
+        self,
+        key: str,
+        content_type: str,
+        *,
+        max_size: int,
+        expires_in: int = PRESIGNED_UPLOAD_EXPIRES_SECONDS,
+    ) -> dict[str, Any]:
+        """A form the client can POST one public object to, straight to S3.
+
+        The signed policy pins the key and content type and bounds the size,
+        so the bucket itself rejects anything else.
+        """
+        s3 = await self._get_client()
+        return await s3.generate_presigned_post(
+            Bucket=self._config.bucket_name,
+            Key=key,
+            Fields={"Content-Type": content_type, "acl": "public-read"},
+            Conditions=[
+                {"Content-Type": content_type},
+                {"acl": "public-read"},
+                ["content-length-range", 1, max_size],
+            ],
+            ExpiresIn=expires_in,
+        )
+
+    async def head_file(self, key: str) -> dict[str, Any] | None:
+        """Object metadata, or None if there is no such object."""
+        s3 = await self._get_client()
+        try:
+            return await s3.head_object(Bucket=self._config.bucket_name, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in {"404", "NoSuchKey", "NotFound"}:
+                return None
+            raise
+
+    async def iter_file(
+        self, key: str, chunk_size: int = 64 * 1024
+    ) -> AsyncIterator[bytes]:
+        s3 = await self._get_client()
+        response = await s3.get_object(Bucket=self._config.bucket_name, Key=key)
+        async with response["Body"] as body:
+            async for chunk in body.iter_chunks(chunk_size):
+                yield chunk
+
+    async def iter_object_pages(
+        self, prefix: str
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """List a prefix one page (up to 1000 objects) at a time."""
+        s3 = await self._get_client()
+        paginator = s3.get_paginator("list_objects_v2")
+        async for page in paginator.paginate(
+            Bucket=self._config.bucket_name,
+            Prefix=prefix,
+            PaginationConfig={"PageSize": DELETE_OBJECTS_BATCH},
+        ):
+            yield page.get("Contents", [])
+
+    async def delete_objects(self, keys: list[str]) -> list[str]:
+        """Delete keys with one DeleteObjects call per 1000; returns failed keys."""
+        s3 = await self._get_client()
+        failed: list[str] = []
+        for start in range(0, len(keys), DELETE_OBJECTS_BATCH):
+            batch = keys[start : start + DELETE_OBJECTS_BATCH]
+            response = await s3.delete_objects(
+                Bucket=self._config.bucket_name,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+            )
+            for error in response.get("Errors", []):
+                logger.warning(
+                    "Failed to delete %s: %s", error.get("Key"), error.get("Message")
+                )
+                failed.append(error["Key"])
+        logger.info("Deleted %s objects", len(keys) - len(failed))
+        return failed
+
+    async def delete_file(self, key: str) -> None:
+        s3 = await self._get_client()
+        await s3.delete_object(
+            Bucket=self._config.bucket_name,
+            Key=key,
+        )
         logger.info("Deleted %s", key)
 
 
@@ -7,6 +7,10 @@ from core.content import ContentProvider, ContentDTO
 logger = logging.getLogger(__name__)
 
 
+class ShikimoriGraphQLError(RuntimeError):
+    """The GraphQL endpoint answered with an `errors` payload."""
+
+
 class ShikimoriService(ContentProvider):
     SHIKIMORI_ORIGIN = "https://shikimori.io"
 
@@ -24,26 +28,27 @@ class ShikimoriService(ContentProvider):
         query: str,
         variables: dict[str, Any] | None = None,
         *,
-        raise_on_http: bool = False,
+        raise_errors: bool = False,
     ) -> dict[str, Any] | None:
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    self.base_url,
-                    json={"query": query, "variables": variables or {}},
-                    headers=self.headers,
-                )
-                response.raise_for_status()
-                data = response.json()
-                if "errors" in data:
-                    logger.error(f"GraphQL Errors: {data['errors']}")
-                    return None
-                return data.get("data") or {}
-            except httpx.HTTPError as e:
-                logger.error(f"Failed Shikimori GraphQL ({self.media_type}): {e}")
-                if raise_on_http:
-                    raise
+        try:
+            response = await self.http.post(
+                self.base_url,
+                json={"query": query, "variables": variables or {}},
+                headers=self.headers,
+            )
+            response.raise_for_status()
+            data = response.json()
+            if "errors" in data:
+                logger.error(f"GraphQL Errors: {data['errors']}")
+                if raise_errors:
+                    raise ShikimoriGraphQLError(str(data["errors"]))
                 return None
+            return data.get("data") or {}
+        except httpx.HTTPError as e:
+            logger.error(f"Failed Shikimori GraphQL ({self.media_type}): {e}")
+            if raise_errors:
+                raise
+            return None
 
     async def search(self, query: str) -> List[ContentDTO]:
         kind_filter = ', kind: "!special"' if self.media_type == "anime" else ""
@@ -61,10 +66,8 @@ class ShikimoriService(ContentProvider):
         """
 
         data = await self._graphql(
-            graphql_query, {"search": query}, raise_on_http=True
+            graphql_query, {"search": query}, raise_errors=True
         )
-        if data is None:
-            return []
         return self._process_results(data.get(f"{self.media_type}s", []) or [])
 
     async def get_details(self, external_id: str) -> Optional[ContentDTO]:
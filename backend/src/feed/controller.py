@@ -1,6 +1,6 @@
 from typing import Any
 
-from litestar import Controller, Request, get
+from litestar import Controller, Request, Response, get
 from litestar.di import Provide
 from litestar.security.jwt import Token
 from sqlalchemy import select
@@ -10,9 +10,58 @@ from sqlalchemy.orm import selectinload
 from core.models import Title, User, UserTitle
 from core.models.db_helper import get_db_session
 from core.models.user import subscriptions_table
+from core.pagination import keyset_page, paged_response, split_page
 from titles.schemas import TitleRead
 
 from .schemas import FeedActor, FeedItem
+from .timeline import read_timeline
+
+
+def _feed_query():
+    return (
+        select(UserTitle)
+        .join(Title, Title.id == UserTitle.title_id)
+        .options(
+            selectinload(UserTitle.title),
+            selectinload(UserTitle.user),
+        )
+        .where(Title.parent_title_id.is_(None))
+    )
+
+
+async def _page_from_db(
+    db_session: AsyncSession,
+    user_id: int,
+    *,
+    limit: int,
+    cursor: str | None,
+    offset: int,
+) -> tuple[list[UserTitle], str | None]:
+    followees = select(subscriptions_table.c.following_id).where(
+        subscriptions_table.c.follower_id == user_id
+    )
+    stmt = keyset_page(
+        # Private profiles are only visible to followers; we're already following
+        _feed_query().where(UserTitle.user_id.in_(followees)),
+        UserTitle.updated_at,
+        UserTitle.id,
+        limit=limit,
+        cursor=cursor,
+        offset=offset,
+    )
+    result = await db_session.execute(stmt)
+    return split_page(
+        result.scalars().unique().all(), limit, lambda ut: (ut.updated_at, ut.id)
+    )
+
+
+async def _load_user_titles(db_session: AsyncSession, ids: list[int]) -> list[UserTitle]:
+    if not ids:
+        return []
+    result = await db_session.execute(_feed_query().where(UserTitle.id.in_(ids)))
+    by_id = {ut.id: ut for ut in result.scalars().unique().all()}
+    # Rows deleted since they were fanned out are simply skipped
+    return [by_id[i] for i in ids if i in by_id]
 
 
 class FeedController(Controller):
@@ -29,34 +78,24 @@ class FeedController(Controller):
         db_session: AsyncSession,
         limit: int = 30,
         offset: int = 0,
-    ) -> list[FeedItem]:
-        following_ids_stmt = select(subscriptions_table.c.following_id).where(
-            subscriptions_table.c.follower_id == request.user.id
-        )
-        following_result = await db_session.execute(following_ids_stmt)
-        following_ids = list(following_result.scalars().all())
-        if not following_ids:
-            return []
+        cursor: str | None = None,
+    ) -> Response[list[FeedItem]]:
+        """Recent library activity of followed users, newest first.
 
-        stmt = (
-            select(UserTitle)
-            .join(User, User.id == UserTitle.user_id)
-            .join(Title, Title.id == UserTitle.title_id)
-            .options(
-                selectinload(UserTitle.title),
-                selectinload(UserTitle.user),
-            )
-            .where(
-                UserTitle.user_id.in_(following_ids),
-                Title.parent_title_id.is_(None),
-                # Private profiles are only visible to followers; we're already following
-            )
-            .order_by(UserTitle.updated_at.desc())
-            .limit(min(limit, 50))
-            .offset(offset)
+        Served from the viewer's materialized timeline; pages beyond it,
+        or any page while Redis is unavailable, come from Postgres.
+        """
+        limit = min(limit, 50)
+        page = await read_timeline(
+            db_session, request.user.id, limit=limit, cursor=cursor, offset=offset
         )
-        result = await db_session.execute(stmt)
-        items = result.scalars().unique().all()
+        if page is None:
+            items, next_cursor = await _page_from_db(
+                db_session, request.user.id, limit=limit, cursor=cursor, offset=offset
+            )
+        else:
+            ids, next_cursor = page
+            items = await _load_user_titles(db_session, ids)
 
         feed: list[FeedItem] = []
         for ut in items:
@@ -79,4 +118,4 @@ class FeedController(Controller):
                     title=TitleRead.model_validate(ut.title),
                 )
             )
-        return feed
+        return paged_response(feed, next_cursor)
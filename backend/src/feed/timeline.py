@@ -0,0 +1,268 @@
+"""Home timelines materialized in Redis sorted sets.
+
+Each user's timeline holds the ids of their followees' user titles scored
+by `updated_at`, newest first and trimmed to `TIMELINE_LENGTH`. Changes to
+`UserTitle` rows are picked up from the ORM session, so every write path
+is covered. After commit they are fanned out to the followers' timelines
+in a background task. A timeline that is missing (expired, never built,
+invalidated by a follow change) is rebuilt from Postgres on the next read.
+
+Members are zero-padded ids so that Redis orders equal scores by id, which
+matches the (updated_at, id) keyset used by the SQL feed.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from redis.exceptions import RedisError
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from core.models import Title, UserTitle
+from core.models.db_helper import db_helper
+from core.models.user import subscriptions_table
+from core.pagination import decode_key, encode_key
+from core.redis.client import redis_client
+
+logger = logging.getLogger(__name__)
+
+TIMELINE_LENGTH = 800
+TIMELINE_TTL_SECONDS = 7 * 24 * 60 * 60
+# Commands per pipeline round trip during fan-out
+FANOUT_BATCH = 1000
+
+_EPOCH = datetime(1970, 1, 1)
+_PENDING_KEY = "feed_timeline_changes"
+
+_background_fanouts: set[asyncio.Task] = set()
+
+
+def _timeline_key(user_id: int) -> str:
+    return f"feed:timeline:{user_id}"
+
+
+def _built_key(user_id: int) -> str:
+    return f"feed:timeline:{user_id}:built"
+
+
+def _member(user_title_id: int) -> str:
+    return f"{user_title_id:010d}"
+
+
+def _score(updated_at: datetime) -> int:
+    # Integer microseconds are exact in a Redis double until year 2255
+    return (updated_at.replace(tzinfo=None) - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_score(score: float) -> datetime:
+    return _EPOCH + timedelta(microseconds=int(score))
+
+
+def _followee_titles():
+    return (
+        select(UserTitle.id, UserTitle.user_id, UserTitle.updated_at)
+        .join(Title, Title.id == UserTitle.title_id)
+        .where(Title.parent_title_id.is_(None))
+    )
+
+
+# --- write side -----------------------------------------------------------
+
+
+@dataclass
+class _PendingChanges:
+    new: list[UserTitle] = field(default_factory=list)
+    changed_ids: set[int] = field(default_factory=set)
+    # user title id -> author id
+    removed: dict[int, int] = field(default_factory=dict)
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_changes(session: Session, flush_context, instances) -> None:
+    pending = session.info.setdefault(_PENDING_KEY, _PendingChanges())
+    for obj in session.new:
+        if isinstance(obj, UserTitle):
+            pending.new.append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, UserTitle) and session.is_modified(
+            obj, include_collections=False
+        ):
+            pending.changed_ids.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, UserTitle):
+            pending.removed[obj.id] = obj.user_id
+
+
+@event.listens_for(Session, "after_flush")
+def _resolve_new_ids(session: Session, flush_context) -> None:
+    # New rows only have an id once flushed
+    pending = session.info.get(_PENDING_KEY)
+    if pending is not None:
+        pending.changed_ids.update(obj.id for obj in pending.new)
+        pending.new.clear()
+
+
+@event.listens_for(Session, "after_commit")
+def _schedule_fan_out(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending is None or not (pending.changed_ids or pending.removed):
+        return
+    schedule_fan_out(pending.changed_ids, pending.removed)
+
+
+def schedule_fan_out(changed_ids: set[int], removed: dict[int, int]) -> None:
+    """Run `fan_out` in the background.
+
+    Called after commit by the session hook, and directly by bulk writers
+    whose Core statements the hook does not see.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(fan_out(changed_ids, removed))
+    _background_fanouts.add(task)
+    task.add_done_callback(_background_fanouts.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+async def fan_out(changed_ids: set[int], removed: dict[int, int]) -> None:
+    """Push changed user titles into their author's followers' timelines."""
+    try:
+        async with db_helper.session_factory() as session:
+            rows = []
+            if changed_ids:
+                result = await session.execute(
+                    _followee_titles().where(UserTitle.id.in_(changed_ids))
+                )
+                rows = result.all()
+
+            authors = {row.user_id for row in rows} | set(removed.values())
+            result = await session.execute(
+                select(
+                    subscriptions_table.c.following_id,
+                    subscriptions_table.c.follower_id,
+                ).where(subscriptions_table.c.following_id.in_(authors))
+            )
+            followers: dict[int, list[int]] = defaultdict(list)
+            for following_id, follower_id in result.all():
+                followers[following_id].append(follower_id)
+
+        commands = []
+        touched: set[int] = set()
+        for row in rows:
+            for follower_id in followers[row.user_id]:
+                entry = {_member(row.id): _score(row.updated_at)}
+                commands.append(("zadd", _timeline_key(follower_id), entry))
+                touched.add(follower_id)
+        for user_title_id, author_id in removed.items():
+            for follower_id in followers[author_id]:
+                commands.append(("zrem", _timeline_key(follower_id), _member(user_title_id)))
+        for follower_id in touched:
+            key = _timeline_key(follower_id)
+            commands.append(("zremrangebyrank", key, 0, -(TIMELINE_LENGTH + 1)))
+            commands.append(("expire", key, TIMELINE_TTL_SECONDS))
+
+        for start in range(0, len(commands), FANOUT_BATCH):
+            pipe = redis_client.pipeline(transaction=False)
+            for name, *args in commands[start : start + FANOUT_BATCH]:
+                getattr(pipe, name)(*args)
+            await pipe.execute()
+    except RedisError:
+        logger.warning("Feed fan-out failed for user titles %s", sorted(changed_ids))
+    except Exception:
+        logger.exception("Feed fan-out failed for user titles %s", sorted(changed_ids))
+
+
+async def invalidate_timeline(user_id: int) -> None:
+    """Force a rebuild on next read, e.g. after the user's follows changed."""
+    try:
+        await redis_client.delete(_built_key(user_id), _timeline_key(user_id))
+    except RedisError:
+        logger.warning("Failed to invalidate feed timeline of user %s", user_id)
+
+
+async def rebuild_timeline(db_session: AsyncSession, user_id: int) -> None:
+    followees = select(subscriptions_table.c.following_id).where(
+        subscriptions_table.c.follower_id == user_id
+    )
+    result = await db_session.execute(
+        _followee_titles()
+        .where(UserTitle.user_id.in_(followees))
+        .order_by(UserTitle.updated_at.desc(), UserTitle.id.desc())
+        .limit(TIMELINE_LENGTH)
+    )
+    entries = {_member(row.id): _score(row.updated_at) for row in result.all()}
+
+    key = _timeline_key(user_id)
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.delete(key)
+    if entries:
+        pipe.zadd(key, entries)
+        pipe.expire(key, TIMELINE_TTL_SECONDS)
+    pipe.set(_built_key(user_id), "1", ex=TIMELINE_TTL_SECONDS)
+    await pipe.execute()
+
+
+# --- read side ------------------------------------------------------------
+
+
+async def read_timeline(
+    db_session: AsyncSession,
+    user_id: int,
+    *,
+    limit: int,
+    cursor: str | None = None,
+    offset: int = 0,
+) -> tuple[list[int], str | None] | None:
+    """Return one page of user title ids and the next page cursor.
+
+    Returns None when the page cannot be served from Redis (Redis is down,
+    or the page runs past the trimmed end of the timeline); callers then
+    fall back to the SQL feed with the same cursor.
+    """
+    key = _timeline_key(user_id)
+    try:
+        if not await redis_client.exists(_built_key(user_id)):
+            await rebuild_timeline(db_session, user_id)
+
+        if cursor:
+            after_ts, after_id = decode_key(cursor)
+            max_score = _score(after_ts)
+            # Entries sharing the cursor's score are skipped below
+            ties = await redis_client.zcount(key, max_score, max_score)
+            entries = await redis_client.zrevrangebyscore(
+                key, max_score, "-inf", start=0, num=limit + 1 + ties, withscores=True
+            )
+            entries = [
+                (member, score)
+                for member, score in entries
+                if score < max_score or int(member) < after_id
+            ]
+        else:
+            entries = await redis_client.zrevrange(
+                key, offset, offset + limit, withscores=True
+            )
+        size = await redis_client.zcard(key)
+    except RedisError:
+        logger.warning("Feed timeline unavailable for user %s", user_id)
+        return None
+
+    if len(entries) <= limit and size >= TIMELINE_LENGTH:
+        # Older items were trimmed away; only Postgres has them
+        return None
+
+    page = entries[:limit]
+    next_cursor = None
+    if len(entries) > limit:
+        member, score = page[-1]
+        next_cursor = encode_key((_from_score(score), int(member)))
+    return [int(member) for member, _ in page], next_cursor
@@ -4,6 +4,7 @@ from litestar import Controller, get
 
 from core.igdb_service import igdb_service
 from games.schemas import GameSearchResult
+from search.cache import cached_search
 
 
 class GamesController(Controller):
@@ -15,7 +16,9 @@ class GamesController(Controller):
         if not q:
             return []
         try:
-            results = await igdb_service.search_games(q)
+            results = await cached_search(
+                "igdb_games", q, lambda: igdb_service.search_games(q)
+            )
             return [GameSearchResult(**item) for item in results]
         except Exception as e:
             from litestar.exceptions import HTTPException
@@ -2,7 +2,11 @@ from auth.controller import AuthController
 from titles.controller import TitleController
 from games.controller import GamesController
 
-from search.controller import SearchController
+from search.controller import (
+    SEARCH_FAILED_HEADER,
+    SEARCH_TIMED_OUT_HEADER,
+    SearchController,
+)
 from user_titles.controller import UserTitlesController
 from users.controller import UsersController
 from backup.controller import BackupController
@@ -14,6 +18,10 @@ from feed.controller import FeedController
 from social.controller import SocialController
 from auth.jwt import jwt_config
 from core.models.db_helper import db_helper
+from core.http_client import provider_http
+from core.images import image_pool
+from core.s3 import s3_service
+from core.pagination import NEXT_CURSOR_HEADER
 from litestar import Litestar, Router
 from litestar.config.cors import CORSConfig
 from litestar.static_files import StaticFilesConfig
@@ -38,6 +46,7 @@ cors_config = CORSConfig(
     ],
     allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, SEARCH_TIMED_OUT_HEADER, SEARCH_FAILED_HEADER],
     allow_credentials=True,
 )
 
@@ -66,7 +75,13 @@ app = Litestar(
     route_handlers=[api_router],
     debug=settings.run.debug,
     on_app_init=[jwt_config.on_app_init],
-    on_shutdown=[db_helper.dispose],
+    on_startup=[provider_http.startup, s3_service.startup],
+    on_shutdown=[
+        db_helper.dispose,
+        provider_http.dispose,
+        s3_service.dispose,
+        image_pool.dispose,
+    ],
     cors_config=cors_config,
     static_files_config=[
         StaticFilesConfig(directories=[os.path.join(os.path.dirname(__file__), "..", "static")], path="/static"),
@@ -0,0 +1,127 @@
+"""Read side of the shared activity streams of high-follower actors.
+
+An activity is visible to a user who followed its actor before it happened.
+Read/cleared state is a per-recipient cursor rather than a row per
+activity, so marking things read never writes more than one row.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Select, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from core.models import ActorEvent, NotificationCursor
+from core.models.title import UserTitle
+from core.models.user import subscriptions_table
+from core.pagination import keyset_page
+
+
+async def get_cursor(db_session: AsyncSession, user_id: int) -> NotificationCursor | None:
+    return await db_session.get(NotificationCursor, user_id)
+
+
+def _visible_activities(
+    stmt: Select, user_id: int, cursor: NotificationCursor | None
+) -> Select:
+    stmt = stmt.join(
+        subscriptions_table,
+        subscriptions_table.c.following_id == ActorEvent.actor_id,
+    ).where(
+        subscriptions_table.c.follower_id == user_id,
+        ActorEvent.created_at >= subscriptions_table.c.created_at,
+    )
+    if cursor is not None and cursor.cleared_at is not None:
+        stmt = stmt.where(ActorEvent.created_at > cursor.cleared_at)
+    return stmt
+
+
+def is_activity_read(activity: ActorEvent, cursor: NotificationCursor | None) -> bool:
+    return (
+        cursor is not None
+        and cursor.read_at is not None
+        and activity.created_at <= cursor.read_at
+    )
+
+
+async def list_activities(
+    db_session: AsyncSession,
+    user_id: int,
+    cursor: NotificationCursor | None,
+    *,
+    limit: int,
+    after: str | None = None,
+) -> list[ActorEvent]:
+    """Newest activities visible to the user, plus one look-ahead row.
+
+    `after` is a keyset page cursor over (created_at, id).
+    """
+    stmt = _visible_activities(
+        select(ActorEvent).options(
+            selectinload(ActorEvent.actor),
+            selectinload(ActorEvent.user_title).selectinload(UserTitle.title),
+        ),
+        user_id,
+        cursor,
+    )
+    stmt = keyset_page(
+        stmt, ActorEvent.created_at, ActorEvent.id, limit=limit, cursor=after
+    )
+    result = await db_session.execute(stmt)
+    return list(result.scalars().all())
+
+
+async def get_activity(
+    db_session: AsyncSession,
+    user_id: int,
+    activity_id: int,
+) -> ActorEvent | None:
+    cursor = await get_cursor(db_session, user_id)
+    stmt = _visible_activities(
+        select(ActorEvent).options(
+            selectinload(ActorEvent.actor),
+            selectinload(ActorEvent.user_title).selectinload(UserTitle.title),
+        ),
+        user_id,
+        cursor,
+    ).where(ActorEvent.id == activity_id)
+    return (await db_session.execute(stmt)).scalar_one_or_none()
+
+
+async def count_unread_activities(
+    db_session: AsyncSession,
+    user_id: int,
+    cursor: NotificationCursor | None,
+) -> int:
+    stmt = _visible_activities(select(func.count(ActorEvent.id)), user_id, cursor)
+    if cursor is not None and cursor.read_at is not None:
+        stmt = stmt.where(ActorEvent.created_at > cursor.read_at)
+    return (await db_session.execute(stmt)).scalar() or 0
+
+
+async def advance_read_cursor(
+    db_session: AsyncSession,
+    user_id: int,
+    read_at: datetime | None = None,
+) -> None:
+    """Mark activities up to `read_at` (default: now) as read; never moves back."""
+    value = read_at if read_at is not None else func.now()
+    stmt = pg_insert(NotificationCursor).values(user_id=user_id, read_at=value)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[NotificationCursor.user_id],
+        set_={
+            # GREATEST ignores NULLs, so the first read just sets the cursor
+            "read_at": func.greatest(NotificationCursor.read_at, stmt.excluded.read_at),
+        },
+    )
+    await db_session.execute(stmt)
+
+
+async def clear_read_activities(db_session: AsyncSession, user_id: int) -> None:
+    """Hide every activity that is already read."""
+    await db_session.execute(
+        update(NotificationCursor)
+        .where(NotificationCursor.user_id == user_id)
+        .values(cleared_at=NotificationCursor.read_at)
+    )
@@ -4,14 +4,30 @@ from sqlalchemy import select, update, func, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from litestar import Controller, get, patch, delete as litestar_delete, Request
+from litestar import Controller, get, patch, delete as litestar_delete, Request, Response
 from litestar.di import Provide
-from litestar.exceptions import NotFoundException
+from litestar.exceptions import ClientException, NotFoundException
 
 from core.models.db_helper import get_db_session
 from core.models import User
-from core.models.notification import Notification
+from core.models.notification import ActorEvent, Notification
 from core.models.title import UserTitle
+from core.pagination import (
+    decode_cursor,
+    encode_cursor,
+    encode_key,
+    keyset_page,
+    paged_response,
+)
+from .activity import (
+    advance_read_cursor,
+    clear_read_activities,
+    count_unread_activities,
+    get_activity,
+    get_cursor,
+    is_activity_read,
+    list_activities,
+)
 from .reminders import ensure_on_hold_reminders
 from .schemas import NotificationRead, UnreadCountResponse, ActorInfo, TitleInfo
 
@@ -43,6 +59,23 @@ def _serialize_notification(n: Notification) -> NotificationRead:
     )
 
 
+def _serialize_activity(a: ActorEvent, is_read: bool) -> NotificationRead:
+    title_info = None
+    if a.user_title and a.user_title.title:
+        title_info = TitleInfo.model_validate(a.user_title.title)
+
+    return NotificationRead(
+        id=a.id,
+        type=a.type,
+        is_read=is_read,
+        created_at=a.created_at,
+        user_title_id=a.user_title_id,
+        actor=ActorInfo.model_validate(a.actor),
+        title=title_info,
+        source="activity",
+    )
+
+
 class NotificationsController(Controller):
     path = "/notifications"
     tags = ["Notifications"]
@@ -57,22 +90,64 @@ class NotificationsController(Controller):
         db_session: AsyncSession,
         limit: int = 30,
         offset: int = 0,
-    ) -> list[NotificationRead]:
-        """Get notifications for the current user."""
+        cursor: str | None = None,
+    ) -> Response[list[NotificationRead]]:
+        """Get notifications for the current user.
+
+        Personal notifications are merged with the shared activity streams
+        of followed high-follower users, newest first. The page cursor keeps
+        a separate keyset position for each of the two sources.
+        """
         created = await ensure_on_hold_reminders(db_session, request.user.id)
         if created:
             await db_session.commit()
 
-        stmt = (
-            _build_notification_query()
-            .where(Notification.recipient_id == request.user.id)
-            .order_by(Notification.created_at.desc())
-            .limit(limit)
-            .offset(offset)
+        positions: dict[str, str | None] = {"n": None, "a": None}
+        if cursor:
+            decoded = decode_cursor(cursor)
+            if not isinstance(decoded, dict) or not all(
+                isinstance(decoded.get(k), (str, type(None))) for k in positions
+            ):
+                raise ClientException(detail="Invalid cursor")
+            positions = {k: decoded.get(k) for k in positions}
+            offset = 0
+
+        # Either source may supply the whole page, so take offset + limit
+        # from each and cut the page out of the merged list
+        window = offset + limit
+        stmt = keyset_page(
+            _build_notification_query().where(
+                Notification.recipient_id == request.user.id
+            ),
+            Notification.created_at,
+            Notification.id,
+            limit=window,
+            cursor=positions["n"],
         )
         result = await db_session.execute(stmt)
-        notifications = result.scalars().all()
-        return [_serialize_notification(n) for n in notifications]
+        merged = [("n", n, _serialize_notification(n)) for n in result.scalars().all()]
+
+        read_cursor = await get_cursor(db_session, request.user.id)
+        activities = await list_activities(
+            db_session,
+            request.user.id,
+            read_cursor,
+            limit=window,
+            after=positions["a"],
+        )
+        merged.extend(
+            ("a", a, _serialize_activity(a, is_activity_read(a, read_cursor)))
+            for a in activities
+        )
+        merged.sort(key=lambda entry: (entry[1].created_at, entry[1].id), reverse=True)
+
+        next_cursor = None
+        if len(merged) > window:
+            for source, row, _ in merged[:window]:
+                positions[source] = encode_key((row.created_at, row.id))
+            next_cursor = encode_cursor(positions)
+
+        return paged_response([item for _, _, item in merged[offset:window]], next_cursor)
 
     @get("/unread-count")
     async def get_unread_count(
@@ -94,6 +169,9 @@ class NotificationsController(Controller):
         )
         result = await db_session.execute(stmt)
         count = result.scalar() or 0
+
+        cursor = await get_cursor(db_session, request.user.id)
+        count += await count_unread_activities(db_session, request.user.id, cursor)
         return UnreadCountResponse(count=count)
 
     @patch("/{notification_id:int}/read")
@@ -124,6 +202,23 @@ class NotificationsController(Controller):
 
         return _serialize_notification(notification)
 
+    @patch("/activity/{activity_id:int}/read")
+    async def mark_activity_as_read(
+        self,
+        activity_id: int,
+        request: Request[User, dict, Any],
+        db_session: AsyncSession,
+    ) -> NotificationRead:
+        """Mark a shared activity, and every older one, as read."""
+        activity = await get_activity(db_session, request.user.id, activity_id)
+        if not activity:
+            raise NotFoundException(detail="Notification not found")
+
+        await advance_read_cursor(db_session, request.user.id, activity.created_at)
+        await db_session.commit()
+
+        return _serialize_activity(activity, is_read=True)
+
     @patch("/read-all")
     async def mark_all_as_read(
         self,
@@ -140,6 +235,7 @@ class NotificationsController(Controller):
             .values(is_read=True)
         )
         await db_session.execute(stmt)
+        await advance_read_cursor(db_session, request.user.id)
         await db_session.commit()
         return {"status": "ok"}
 
@@ -158,5 +254,6 @@ class NotificationsController(Controller):
             )
         )
         await db_session.execute(stmt)
+        await clear_read_activities(db_session, request.user.id)
         await db_session.commit()
         return {"status": "ok"}
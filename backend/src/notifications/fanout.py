@@ -0,0 +1,62 @@
+"""Notification fan-out to an actor's followers.
+
+Regular actors get one notification row per follower, written with a single
+INSERT ... SELECT. Actors above `NOTIFICATION_FANOUT_THRESHOLD` followers
+write one shared `ActorEvent` row instead, which followers merge into
+their notifications at read time (see `notifications.activity`).
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import Integer, String, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.models import ActorEvent, Notification, NotificationType, User
+from core.models.user import subscriptions_table
+
+
+async def count_followers(db_session: AsyncSession, user_id: int) -> int:
+    stmt = select(User.followers_count).where(User.id == user_id)
+    return (await db_session.execute(stmt)).scalar_one_or_none() or 0
+
+
+async def notify_followers(
+    db_session: AsyncSession,
+    *,
+    actor_id: int,
+    user_title_id: int | None,
+    notification_type: NotificationType,
+) -> int:
+    """Notify every follower of the actor about an event.
+
+    Returns the number of rows written: one per follower, or 1 when the
+    event went to the actor's shared activity stream.
+    """
+    follower_count = await count_followers(db_session, actor_id)
+    if follower_count == 0:
+        return 0
+
+    if follower_count > settings.NOTIFICATION_FANOUT_THRESHOLD:
+        db_session.add(
+            ActorEvent(
+                actor_id=actor_id,
+                user_title_id=user_title_id,
+                type=notification_type,
+            )
+        )
+        return 1
+
+    followers = select(
+        subscriptions_table.c.follower_id,
+        literal(actor_id, Integer),
+        literal(user_title_id, Integer),
+        literal(notification_type.value, String(50)),
+    ).where(subscriptions_table.c.following_id == actor_id)
+
+    stmt = insert(Notification).from_select(
+        ["recipient_id", "actor_id", "user_title_id", "type"],
+        followers,
+    )
+    result = await db_session.execute(stmt)
+    return result.rowcount or 0
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Literal
 
 from pydantic import BaseModel, ConfigDict
 
@@ -29,6 +30,8 @@ class NotificationRead(BaseModel):
     user_title_id: int | None = None
     actor: ActorInfo
     title: TitleInfo | None = None
+    # "activity" items come from a followed user's shared stream
+    source: Literal["notification", "activity"] = "notification"
 
     model_config = ConfigDict(from_attributes=True)
 
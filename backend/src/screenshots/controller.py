@@ -1,3 +1,4 @@
+import re
 from typing import Annotated, Any
 
 from litestar import Controller, post, delete as litestar_delete, Request
@@ -11,11 +12,109 @@ from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.models import User, UserTitle, TitleScreenshot
-from core.models.notification import Notification, NotificationType
-from core.models.user import subscriptions_table
+from core.models.notification import NotificationType
 from core.models.db_helper import get_db_session
-from core.s3 import s3_service, ALLOWED_CONTENT_TYPES, MAX_FILE_SIZE, MAX_SCREENSHOTS_PER_ENTRY
-from .schemas import ScreenshotRead
+from core.s3 import (
+    s3_service,
+    iter_upload,
+    FileTooLargeError,
+    ALLOWED_CONTENT_TYPES,
+    IMAGE_EXTENSIONS,
+    MAX_FILE_SIZE,
+    MAX_SCREENSHOTS_PER_ENTRY,
+    PRESIGNED_UPLOAD_EXPIRES_SECONDS,
+)
+from notifications.fanout import notify_followers
+from storage.gc import schedule_deletion
+from .derivatives import enqueue_screenshot_variants
+from .schemas import (
+    ScreenshotConfirm,
+    ScreenshotRead,
+    ScreenshotUploadRequest,
+    ScreenshotUploadTicket,
+)
+
+# Room for the multipart boundaries and part headers around the file
+MULTIPART_OVERHEAD = 64 * 1024
+# Advisory lock namespace for confirms (user_titles.sync_guard uses 1-3)
+CONFIRM_LOCK = 4
+
+# The exact shape of s3_service.generate_key: variants and other objects
+# under the user's prefix can never be confirmed as screenshots
+_UPLOAD_KEY = re.compile(
+    r"screenshots/(?P<user_id>\d+)/[0-9a-f]{32}\.(?:"
+    + "|".join(sorted(set(IMAGE_EXTENSIONS.values())))
+    + ")"
+)
+
+def _check_content_type(content_type: str) -> None:
+    if content_type not in ALLOWED_CONTENT_TYPES:
+        raise ClientException(
+            detail="Неподдерживаемый формат. Допустимые: JPEG, PNG, WebP, GIF",
+            status_code=400,
+        )
+
+
+async def _screenshot_count(
+    db_session: AsyncSession, user_id: int, user_title_id: int
+) -> int:
+    """Screenshots already on the entry; fails unless another one may be added."""
+    # Verify user_title belongs to current user
+    stmt = select(UserTitle).where(
+        UserTitle.id == user_title_id,
+        UserTitle.user_id == user_id,
+    )
+    result = await db_session.execute(stmt)
+    user_title = result.scalar_one_or_none()
+
+    if not user_title:
+        raise NotFoundException(detail="Запись не найдена или не принадлежит вам")
+
+    # Check screenshot limit
+    count_stmt = select(func.count()).where(
+        TitleScreenshot.user_title_id == user_title_id
+    )
+    count_result = await db_session.execute(count_stmt)
+    current_count = count_result.scalar() or 0
+
+    if current_count >= MAX_SCREENSHOTS_PER_ENTRY:
+        raise ClientException(
+            detail=f"Максимум {MAX_SCREENSHOTS_PER_ENTRY} скриншотов на запись",
+            status_code=400,
+        )
+    return current_count
+
+
+async def _save_screenshot(
+    db_session: AsyncSession,
+    user_id: int,
+    user_title_id: int,
+    s3_key: str,
+    position: int,
+) -> ScreenshotRead:
+    screenshot = TitleScreenshot(
+        user_title_id=user_title_id,
+        url=s3_service.public_url(s3_key),
+        s3_key=s3_key,
+        position=position,
+    )
+    db_session.add(screenshot)
+    await db_session.flush()
+
+    # Create notifications for followers
+    await notify_followers(
+        db_session,
+        actor_id=user_id,
+        user_title_id=user_title_id,
+        notification_type=NotificationType.TITLE_UPDATED,
+    )
+
+    await db_session.commit()
+    await db_session.refresh(screenshot)
+
+    await enqueue_screenshot_variants(screenshot.id)
+
+    return ScreenshotRead.model_validate(screenshot)
 
 
 class ScreenshotsController(Controller):
@@ -25,103 +124,125 @@ class ScreenshotsController(Controller):
         "db_session": Provide(get_db_session),
     }
 
-    @post("/upload/{user_title_id:int}")
-    async def upload_screenshot(
+    @post("/upload-url/{user_title_id:int}")
+    async def create_upload_url(
         self,
         user_title_id: int,
+        data: ScreenshotUploadRequest,
         request: Request[User, dict, Any],  # type: ignore
         db_session: AsyncSession,
-        data: Annotated[UploadFile, Body(media_type=RequestEncodingType.MULTI_PART)],
-    ) -> ScreenshotRead:
-        """Upload a screenshot for a user title entry."""
+    ) -> ScreenshotUploadTicket:
+        """Presigned form for uploading a screenshot directly to storage.
+
+        The client POSTs the file with the returned fields to `url`, then
+        calls `/screenshots/confirm/{user_title_id}` with the key.
+        """
         user_id = request.user.id
+        await _screenshot_count(db_session, user_id, user_title_id)
+        _check_content_type(data.content_type)
 
-        # Verify user_title belongs to current user
-        stmt = select(UserTitle).where(
-            UserTitle.id == user_title_id,
-            UserTitle.user_id == user_id,
+        s3_key = s3_service.generate_key(user_id, IMAGE_EXTENSIONS[data.content_type])
+        form = await s3_service.presigned_post(
+            s3_key, data.content_type, max_size=MAX_FILE_SIZE
         )
-        result = await db_session.execute(stmt)
-        user_title = result.scalar_one_or_none()
+        return ScreenshotUploadTicket(
+            s3_key=s3_key,
+            url=form["url"],
+            fields=form["fields"],
+            expires_in=PRESIGNED_UPLOAD_EXPIRES_SECONDS,
+        )
+
+    @post("/confirm/{user_title_id:int}")
+    async def confirm_upload(
+        self,
+        user_title_id: int,
+        data: ScreenshotConfirm,
+        request: Request[User, dict, Any],  # type: ignore
+        db_session: AsyncSession,
+    ) -> ScreenshotRead:
+        """Attach a screenshot uploaded through `/screenshots/upload-url`."""
+        user_id = request.user.id
+        s3_key = data.s3_key
 
-        if not user_title:
-            raise NotFoundException(detail="Запись не найдена или не принадлежит вам")
+        # Keys come from generate_key, so anything else was never issued here
+        match = _UPLOAD_KEY.fullmatch(s3_key)
+        if match is None or int(match["user_id"]) != user_id:
+            raise ClientException(detail="Неверный ключ файла", status_code=400)
 
-        # Check screenshot limit
-        count_stmt = select(func.count()).where(
-            TitleScreenshot.user_title_id == user_title_id
+        # Concurrent confirms of one key wait here until the first commits,
+        # then find its row below instead of inserting a duplicate
+        await db_session.execute(
+            select(func.pg_advisory_xact_lock(CONFIRM_LOCK, func.hashtext(s3_key)))
         )
-        count_result = await db_session.execute(count_stmt)
-        current_count = count_result.scalar() or 0
+        # A retried confirm returns the screenshot it already created
+        existing = await db_session.scalar(
+            select(TitleScreenshot).where(TitleScreenshot.s3_key == s3_key)
+        )
+        if existing:
+            if existing.user_title_id != user_title_id:
+                raise ClientException(detail="Неверный ключ файла", status_code=400)
+            return ScreenshotRead.model_validate(existing)
 
-        if current_count >= MAX_SCREENSHOTS_PER_ENTRY:
-            raise ClientException(
-                detail=f"Максимум {MAX_SCREENSHOTS_PER_ENTRY} скриншотов на запись",
-                status_code=400,
-            )
+        current_count = await _screenshot_count(db_session, user_id, user_title_id)
 
-        # Read and validate file
-        content = await data.read()
+        head = await s3_service.head_file(s3_key)
+        if head is None:
+            raise ClientException(detail="Файл не загружен", status_code=400)
 
-        if len(content) > MAX_FILE_SIZE:
+        # The upload policy already enforces these; re-check what is stored
+        content_type = head.get("ContentType", "")
+        extension = s3_key.rsplit(".", 1)[-1]
+        if head["ContentLength"] > MAX_FILE_SIZE:
+            await schedule_deletion([s3_key])
             raise ClientException(
                 detail="Файл слишком большой (макс. 5 МБ)",
                 status_code=400,
             )
-
-        content_type = data.content_type or "application/octet-stream"
-        if content_type not in ALLOWED_CONTENT_TYPES:
+        if IMAGE_EXTENSIONS.get(content_type) != extension:
+            await schedule_deletion([s3_key])
             raise ClientException(
                 detail="Неподдерживаемый формат. Допустимые: JPEG, PNG, WebP, GIF",
                 status_code=400,
             )
 
-        # Determine extension
-        ext_map = {
-            "image/jpeg": "jpg",
-            "image/png": "png",
-            "image/webp": "webp",
-            "image/gif": "gif",
-        }
-        ext = ext_map.get(content_type, "jpg")
-
-        # Upload to S3
-        s3_key = s3_service.generate_key(user_id, ext)
-        url = await s3_service.upload_file(content, s3_key, content_type)
-
-        # Save to DB
-        screenshot = TitleScreenshot(
-            user_title_id=user_title_id,
-            url=url,
-            s3_key=s3_key,
-            position=current_count,
+        return await _save_screenshot(
+            db_session, user_id, user_title_id, s3_key, current_count
         )
-        db_session.add(screenshot)
-        await db_session.flush()
 
-        # Create notifications for followers
-        follower_stmt = select(subscriptions_table.c.follower_id).where(
-            subscriptions_table.c.following_id == user_id
-        )
-        follower_result = await db_session.execute(follower_stmt)
-        follower_ids = [row[0] for row in follower_result.fetchall()]
-
-        if follower_ids:
-            notifications = [
-                Notification(
-                    recipient_id=follower_id,
-                    actor_id=user_id,
-                    user_title_id=user_title_id,
-                    type=NotificationType.TITLE_UPDATED,
-                )
-                for follower_id in follower_ids
-            ]
-            db_session.add_all(notifications)
+    # Oversized bodies are refused while being received, before any parsing
+    @post(
+        "/upload/{user_title_id:int}",
+        request_max_body_size=MAX_FILE_SIZE + MULTIPART_OVERHEAD,
+    )
+    async def upload_screenshot(
+        self,
+        user_title_id: int,
+        request: Request[User, dict, Any],  # type: ignore
+        db_session: AsyncSession,
+        data: Annotated[UploadFile, Body(media_type=RequestEncodingType.MULTI_PART)],
+    ) -> ScreenshotRead:
+        """Upload a screenshot through the API (prefer `/screenshots/upload-url`)."""
+        user_id = request.user.id
+        current_count = await _screenshot_count(db_session, user_id, user_title_id)
 
-        await db_session.commit()
-        await db_session.refresh(screenshot)
+        content_type = data.content_type or "application/octet-stream"
+        _check_content_type(content_type)
+
+        # Stream to S3 in chunks, stopping as soon as the size limit is passed
+        s3_key = s3_service.generate_key(user_id, IMAGE_EXTENSIONS[content_type])
+        try:
+            await s3_service.upload_stream(
+                iter_upload(data), s3_key, content_type, max_size=MAX_FILE_SIZE
+            )
+        except FileTooLargeError:
+            raise ClientException(
+                detail="Файл слишком большой (макс. 5 МБ)",
+                status_code=400,
+            )
 
-        return ScreenshotRead.model_validate(screenshot)
+        return await _save_screenshot(
+            db_session, user_id, user_title_id, s3_key, current_count
+        )
 
     @litestar_delete("/{screenshot_id:int}", status_code=200)
     async def delete_screenshot(
@@ -148,10 +269,7 @@ class ScreenshotsController(Controller):
         if not screenshot:
             raise NotFoundException(detail="Скриншот не найден")
 
-        # Delete from S3
-        await s3_service.delete_file(screenshot.s3_key)
-
-        # Delete from DB
+        # The objects are queued for deletion once this commits (storage.gc)
         await db_session.delete(screenshot)
         await db_session.commit()
 
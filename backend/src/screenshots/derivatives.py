@@ -0,0 +1,123 @@
+"""Thumbnails, WebP previews and metadata stripping for uploaded screenshots.
+
+Queued once a screenshot row exists: by the upload endpoints, by backup
+imports, and for older rows by `scripts/backfill_screenshot_variants.py`.
+The variants are stored next to the original under the same key stem, and
+their URLs, the image dimensions and a blurhash placeholder are recorded on
+the row. Rows sharing a key (imported backups keep the original URLs) reuse
+the variants rendered for the first of them.
+"""
+
+import logging
+from typing import Any
+
+from PIL import Image
+from redis.exceptions import RedisError
+from sqlalchemy import select
+
+from core.images import RenderedImage, Variant, image_pool, media_queue, render
+from core.models import TitleScreenshot
+from core.models.db_helper import db_helper
+from core.s3 import IMMUTABLE_CACHE_CONTROL, s3_service
+
+logger = logging.getLogger(__name__)
+
+JOB_SCREENSHOT_VARIANTS = "screenshot_variants"
+
+THUMBNAIL = Variant("thumb", 320, 180, crop=True)
+PREVIEW = Variant("preview", 1920, 1080)
+VARIANTS = (THUMBNAIL, PREVIEW)
+
+
+def variant_key(s3_key: str, variant: Variant) -> str:
+    return f"{s3_key.rsplit('.', 1)[0]}.{variant.name}.webp"
+
+
+def variant_keys(s3_key: str) -> list[str]:
+    return [variant_key(s3_key, variant) for variant in VARIANTS]
+
+
+async def enqueue_screenshot_variants(screenshot_id: int) -> None:
+    """Schedule derivative generation; readers fall back to the original."""
+    try:
+        await media_queue.enqueue(
+            JOB_SCREENSHOT_VARIANTS,
+            {"screenshot_id": screenshot_id},
+            dedupe_key=f"{JOB_SCREENSHOT_VARIANTS}:{screenshot_id}",
+        )
+    except RedisError:
+        logger.warning("Failed to enqueue variants for screenshot %s", screenshot_id)
+
+
+async def _run_screenshot_variants(payload: dict[str, Any]) -> None:
+    async with db_helper.session_factory() as session:
+        screenshot = await session.get(TitleScreenshot, payload["screenshot_id"])
+        if screenshot is None or screenshot.thumbnail_url is not None:
+            return
+        s3_key = screenshot.s3_key
+
+        rendered_before = await session.scalar(
+            select(TitleScreenshot)
+            .where(
+                TitleScreenshot.s3_key == s3_key,
+                TitleScreenshot.thumbnail_url.is_not(None),
+            )
+            .limit(1)
+        )
+        if rendered_before is not None:
+            for name in ("thumbnail_url", "preview_url", "width", "height", "blurhash"):
+                setattr(screenshot, name, getattr(rendered_before, name))
+            await session.commit()
+            return
+        # Release the connection while the image is downloaded and rendered
+        await session.rollback()
+
+        if await s3_service.head_file(s3_key) is None:
+            # Imported rows can point at files deleted since the export
+            logger.warning(
+                "Screenshot %s has no file at %s", payload["screenshot_id"], s3_key
+            )
+            return
+        data = b"".join([chunk async for chunk in s3_service.iter_file(s3_key)])
+        try:
+            rendered: RenderedImage = await image_pool.run(render, data, VARIANTS)
+        except (Image.DecompressionBombError, OSError):
+            # Not retried: the same bytes would fail the same way
+            logger.warning(
+                "Screenshot %s is not a usable image", payload["screenshot_id"]
+            )
+            return
+
+        urls = {}
+        for variant in VARIANTS:
+            key = variant_key(s3_key, variant)
+            # Rendered once per upload, and every upload gets a fresh key
+            urls[variant.name] = await s3_service.upload_file(
+                rendered.variants[variant.name],
+                key,
+                "image/webp",
+                cache_control=IMMUTABLE_CACHE_CONTROL,
+            )
+        if rendered.stripped is not None and rendered.content_type:
+            # Overwrite the public original so EXIF (GPS, camera) is gone
+            await s3_service.upload_file(
+                rendered.stripped, s3_key, rendered.content_type
+            )
+
+        screenshot = await session.get(TitleScreenshot, payload["screenshot_id"])
+        if screenshot is None:
+            # Deleted while rendering
+            for key in variant_keys(s3_key):
+                await s3_service.delete_file(key)
+            return
+        screenshot.thumbnail_url = urls[THUMBNAIL.name]
+        screenshot.preview_url = urls[PREVIEW.name]
+        screenshot.width = rendered.width
+        screenshot.height = rendered.height
+        screenshot.blurhash = rendered.blurhash
+        await session.commit()
+
+
+SCREENSHOT_HANDLERS = {
+    JOB_SCREENSHOT_VARIANTS: _run_screenshot_variants,
+}
@@ -1,9 +1,58 @@
-from pydantic import BaseModel, ConfigDict
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, model_validator
+
+from core.models import TitleScreenshot
 
 
 class ScreenshotRead(BaseModel):
+    """A screenshot with the lightest URLs that serve each use.
+
+    `url` is the WebP preview (full view) and `thumbnail_url` the small
+    card crop; both fall back to the original until the derivative job has
+    run. `original_url` is the upload itself.
+    """
+
     id: int
     url: str
+    thumbnail_url: str
+    original_url: str
+    width: int | None = None
+    height: int | None = None
+    blurhash: str | None = None
     position: int
 
     model_config = ConfigDict(from_attributes=True)
+
+    @model_validator(mode="before")
+    @classmethod
+    def _pick_variants(cls, data: Any) -> Any:
+        if isinstance(data, TitleScreenshot):
+            return {
+                "id": data.id,
+                "url": data.preview_url or data.url,
+                "thumbnail_url": data.thumbnail_url or data.url,
+                "original_url": data.url,
+                "width": data.width,
+                "height": data.height,
+                "blurhash": data.blurhash,
+                "position": data.position,
+            }
+        return data
+
+
+class ScreenshotUploadRequest(BaseModel):
+    content_type: str
+
+
+class ScreenshotUploadTicket(BaseModel):
+    """Presigned form for uploading one screenshot directly to storage."""
+
+    s3_key: str
+    url: str
+    fields: dict[str, str]
+    expires_in: int
+
+
+class ScreenshotConfirm(BaseModel):
+    s3_key: str
@@ -0,0 +1,59 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.getcwd(), "src"))
+
+from sqlalchemy import select
+
+from core.models import TitleScreenshot
+from core.models.db_helper import db_helper
+from screenshots.derivatives import enqueue_screenshot_variants
+
+
+async def backfill(batch_size: int) -> None:
+    started = time.monotonic()
+    queued = 0
+    last_id = 0
+    async with db_helper.session_factory() as session:
+        while True:
+            result = await session.execute(
+                select(TitleScreenshot.id)
+                .where(
+                    TitleScreenshot.thumbnail_url.is_(None),
+                    TitleScreenshot.id > last_id,
+                )
+                .order_by(TitleScreenshot.id)
+                .limit(batch_size)
+            )
+            screenshot_ids = list(result.scalars().all())
+            if not screenshot_ids:
+                break
+            # Jobs are deduplicated per screenshot, so reruns are safe
+            for screenshot_id in screenshot_ids:
+                await enqueue_screenshot_variants(screenshot_id)
+            queued += len(screenshot_ids)
+            last_id = screenshot_ids[-1]
+            print(f"  {queued} queued")
+
+    await db_helper.dispose()
+    print(f"Queued {queued} screenshots in {time.monotonic() - started:.1f}s.")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Queue thumbnail and preview generation for screenshots without them"
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+    asyncio.run(backfill(args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
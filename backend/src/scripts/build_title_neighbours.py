@@ -0,0 +1,274 @@
+"""Offline item-item collaborative filtering.
+
+Builds a sparse user x title rating matrix from `user_titles` and computes
+the cosine similarity of every pair of titles sharing at least
+MIN_SUPPORT raters. The top-N neighbours of each title replace the
+contents of `title_neighbours`, which serves "because you liked X"
+suggestions.
+
+Similarities are computed one block of titles at a time, so peak memory
+grows with the block size instead of with the full title x title product.
+
+Usage:
+    python src/scripts/build_title_neighbours.py
+    python src/scripts/build_title_neighbours.py --synthetic-ratings 1000000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.getcwd(), "src"))
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import delete, insert, select
+
+from core.models import Title, TitleNeighbour, UserTitle, UserTitleStatus
+from core.models.db_helper import db_helper
+
+# Implicit rating of an unscored entry; scored entries use score / 10
+STATUS_WEIGHTS = {
+    UserTitleStatus.COMPLETED: 0.8,
+    UserTitleStatus.PLAYING: 0.6,
+    UserTitleStatus.WATCHING: 0.6,
+    UserTitleStatus.ON_HOLD: 0.4,
+    UserTitleStatus.PLANNED: 0.3,
+    UserTitleStatus.WISHLIST: 0.3,
+    UserTitleStatus.DROPPED: 0.1,
+}
+# Pairs rated by fewer users than this are noise (one shared rater gives 1.0)
+MIN_SUPPORT = 3
+INSERT_BATCH = 5000
+
+
+class Ratings:
+    """Parallel arrays of (user id, title id, rating)."""
+
+    def __init__(self, users: np.ndarray, titles: np.ndarray, values: np.ndarray):
+        self.users = users
+        self.titles = titles
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+async def load_ratings(session) -> Ratings:
+    stmt = (
+        select(UserTitle.user_id, UserTitle.title_id, UserTitle.score, UserTitle.status)
+        .join(Title, Title.id == UserTitle.title_id)
+        .where(Title.parent_title_id.is_(None))
+        .execution_options(yield_per=100_000)
+    )
+    users, titles, values = [], [], []
+    result = await session.stream(stmt)
+    async for rows in result.partitions():
+        users.append(np.fromiter((r[0] for r in rows), dtype=np.int32, count=len(rows)))
+        titles.append(np.fromiter((r[1] for r in rows), dtype=np.int32, count=len(rows)))
+        values.append(
+            np.fromiter(
+                (
+                    r[2] / 10 if r[2] is not None else STATUS_WEIGHTS.get(r[3], 0.3)
+                    for r in rows
+                ),
+                dtype=np.float32,
+                count=len(rows),
+            )
+        )
+    if not values:
+        empty = np.empty(0, dtype=np.int32)
+        return Ratings(empty, empty, np.empty(0, dtype=np.float32))
+    return Ratings(np.concatenate(users), np.concatenate(titles), np.concatenate(values))
+
+
+def synthetic_ratings(count: int, seed: int = 0) -> Ratings:
+    """Random ratings with a long-tailed title popularity, for benchmarking."""
+    rng = np.random.default_rng(seed)
+    n_users = max(count // 50, 1)
+    n_titles = max(count // 20, 1)
+    users = rng.integers(0, n_users, count, dtype=np.int32)
+    # Zipf-like popularity: a few titles are in most libraries
+    titles = (n_titles * rng.random(count) ** 3).astype(np.int32)
+    pairs = np.unique(users.astype(np.int64) * n_titles + titles)
+    users = (pairs // n_titles).astype(np.int32)
+    titles = (pairs % n_titles).astype(np.int32)
+    values = rng.integers(1, 11, len(pairs)).astype(np.float32) / 10
+    return Ratings(users, titles, values)
+
+
+def rating_matrix(ratings: Ratings) -> tuple[sparse.csr_array, np.ndarray]:
+    """Column-normalized user x title CSR matrix and the title id of each column."""
+    user_ids, rows = np.unique(ratings.users, return_inverse=True)
+    title_ids, cols = np.unique(ratings.titles, return_inverse=True)
+    matrix = sparse.csr_array(
+        (ratings.values, (rows, cols)),
+        shape=(len(user_ids), len(title_ids)),
+        dtype=np.float32,
+    )
+    norms = np.sqrt(matrix.multiply(matrix).sum(axis=0))
+    norms[norms == 0] = 1
+    scale = sparse.diags_array((1 / norms).astype(np.float32))
+    return sparse.csr_array(matrix @ scale), title_ids
+
+
+def top_neighbours(
+    matrix: sparse.csr_array, top_n: int, block_size: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(title col, rank, neighbour col, similarity) of each title's top-N."""
+    by_title = matrix.T.tocsr()
+    rated = by_title.copy()
+    rated.data[:] = 1
+    rated_t = matrix.copy()
+    rated_t.data[:] = 1
+
+    out_title, out_rank, out_neighbour, out_sim = [], [], [], []
+    n_titles = matrix.shape[1]
+    for start in range(0, n_titles, block_size):
+        stop = min(start + block_size, n_titles)
+        similarity = by_title[start:stop] @ matrix
+        support = rated[start:stop] @ rated_t
+        similarity = sparse.csr_array(similarity.multiply(support >= MIN_SUPPORT))
+        similarity.sort_indices()
+
+        indptr, indices, data = similarity.indptr, similarity.indices, similarity.data
+        for row in range(stop - start):
+            lo, hi = indptr[row], indptr[row + 1]
+            cols, sims = indices[lo:hi], data[lo:hi]
+            keep = cols != start + row
+            cols, sims = cols[keep], sims[keep]
+            if not len(sims):
+                continue
+            if len(sims) > top_n:
+                best = np.argpartition(-sims, top_n - 1)[:top_n]
+            else:
+                best = np.arange(len(sims))
+            best = best[np.argsort(-sims[best], kind="stable")]
+            out_title.append(np.full(len(best), start + row, dtype=np.int32))
+            out_rank.append(np.arange(1, len(best) + 1, dtype=np.int16))
+            out_neighbour.append(cols[best])
+            out_sim.append(sims[best])
+
+    if not out_title:
+        empty = np.empty(0, dtype=np.int32)
+        return empty, empty.astype(np.int16), empty, np.empty(0, dtype=np.float32)
+    return (
+        np.concatenate(out_title),
+        np.concatenate(out_rank),
+        np.concatenate(out_neighbour),
+        np.concatenate(out_sim),
+    )
+
+
+async def store_neighbours(session, title_ids, titles, ranks, neighbours, sims) -> None:
+    # One transaction: readers keep seeing the previous table until commit
+    await session.execute(delete(TitleNeighbour))
+    for start in range(0, len(titles), INSERT_BATCH):
+        stop = start + INSERT_BATCH
+        await session.execute(
+            insert(TitleNeighbour),
+            [
+                {
+                    "title_id": int(title_id),
+                    "rank": int(rank),
+                    "neighbour_id": int(neighbour_id),
+                    "similarity": float(sim),
+                }
+                for title_id, rank, neighbour_id, sim in zip(
+                    title_ids[titles[start:stop]],
+                    ranks[start:stop],
+                    title_ids[neighbours[start:stop]],
+                    sims[start:stop],
+                )
+            ],
+        )
+    await session.commit()
+
+
+def _peak_rss() -> str:
+    if sys.platform == "win32":
+        return "n/a"
+    import resource  # Unix only
+
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak //= 1024
+    return f"{peak / 1024:.0f} MB"
+
+
+async def build(top_n: int, block_size: int, synthetic: int | None, dry_run: bool) -> None:
+    timings: dict[str, float] = {}
+    started = time.monotonic()
+
+    if synthetic:
+        ratings = synthetic_ratings(synthetic)
+        dry_run = True
+    else:
+        async with db_helper.session_factory() as session:
+            ratings = await load_ratings(session)
+    timings["load"] = time.monotonic() - started
+
+    mark = time.monotonic()
+    matrix, title_ids = rating_matrix(ratings)
+    timings["matrix"] = time.monotonic() - mark
+    matrix_mb = (
+        matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+    ) / 2**20
+    print(
+        f"{len(ratings)} ratings, {matrix.shape[0]} users x {matrix.shape[1]} titles, "
+        f"CSR {matrix_mb:.1f} MB"
+    )
+
+    mark = time.monotonic()
+    titles, ranks, neighbours, sims = top_neighbours(matrix, top_n, block_size)
+    timings["similarity"] = time.monotonic() - mark
+    covered = len(np.unique(titles))
+    print(f"{len(titles)} neighbour rows for {covered} titles")
+
+    if not dry_run:
+        mark = time.monotonic()
+        async with db_helper.session_factory() as session:
+            await store_neighbours(session, title_ids, titles, ranks, neighbours, sims)
+        timings["store"] = time.monotonic() - mark
+    if not synthetic:
+        await db_helper.dispose()
+
+    phases = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in timings.items())
+    print(
+        f"Done in {time.monotonic() - started:.1f}s ({phases}); "
+        f"peak RSS {_peak_rss()}."
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rebuild title_neighbours with item-item collaborative filtering"
+    )
+    parser.add_argument("--top-n", type=int, default=20)
+    parser.add_argument(
+        "--block-size",
+        type=int,
+        default=500,
+        help="Titles per similarity block; bounds peak memory",
+    )
+    parser.add_argument(
+        "--synthetic-ratings",
+        type=int,
+        help="Benchmark on N random ratings instead of the database (implies --dry-run)",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Compute but do not write the table"
+    )
+    args = parser.parse_args()
+
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+    asyncio.run(build(args.top_n, args.block_size, args.synthetic_ratings, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
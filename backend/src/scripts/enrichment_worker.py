@@ -0,0 +1,76 @@
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import sys
+
+sys.path.append(os.path.join(os.getcwd(), "src"))
+
+from backup.jobs import BACKUP_HANDLERS, backup_queue
+from core.config import settings
+from core.http_client import provider_http
+from core.images import image_pool, media_queue
+from core.models.db_helper import db_helper
+from core.redis.client import redis_client
+from core.s3 import s3_service
+from screenshots.derivatives import SCREENSHOT_HANDLERS
+from storage.gc import STORAGE_HANDLERS, run_sweeper, storage_queue
+from user_titles.enrichment import ENRICHMENT_HANDLERS, enrichment_queue
+
+
+async def run_worker(consumer: str) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            # Windows: rely on KeyboardInterrupt instead
+            pass
+
+    try:
+        # Slow backup imports get their own loop so enrichment never waits behind them
+        await asyncio.gather(
+            enrichment_queue.run_worker(ENRICHMENT_HANDLERS, stop, consumer=consumer),
+            backup_queue.run_worker(BACKUP_HANDLERS, stop, consumer=consumer),
+            media_queue.run_worker(SCREENSHOT_HANDLERS, stop, consumer=consumer),
+            storage_queue.run_worker(STORAGE_HANDLERS, stop, consumer=consumer),
+            run_sweeper(stop),
+        )
+    finally:
+        await provider_http.dispose()
+        await image_pool.dispose()
+        await s3_service.dispose()
+        await db_helper.dispose()
+        await redis_client.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Run the background worker "
+            "(catalog enrichment, backup imports, image processing, storage cleanup)"
+        )
+    )
+    parser.add_argument(
+        "--consumer",
+        default=socket.gethostname(),
+        help="Stable worker name; unfinished jobs of this name are requeued on start",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=settings.logging.log_level_value,
+        format=settings.logging.log_format,
+    )
+
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+    asyncio.run(run_worker(args.consumer))
+
+
+if __name__ == "__main__":
+    main()
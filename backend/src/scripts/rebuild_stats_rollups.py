@@ -0,0 +1,57 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.getcwd(), "src"))
+
+from sqlalchemy import select
+
+from core.models import User
+from core.models.db_helper import db_helper
+from stats.rollups import rebuild_user_rollups
+
+
+async def rebuild(user_ids: list[int] | None, batch_size: int) -> None:
+    started = time.monotonic()
+    async with db_helper.session_factory() as session:
+        if not user_ids:
+            result = await session.execute(select(User.id).order_by(User.id))
+            user_ids = list(result.scalars().all())
+
+        print(f"Rebuilding stats rollups for {len(user_ids)} users...")
+        for done, user_id in enumerate(user_ids, start=1):
+            await rebuild_user_rollups(session, user_id)
+            # One transaction per batch keeps locks short on a live database
+            if done % batch_size == 0:
+                await session.commit()
+                print(f"  {done}/{len(user_ids)}")
+        await session.commit()
+
+    await db_helper.dispose()
+    print(f"Done in {time.monotonic() - started:.1f}s.")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Backfill or rebuild the per-user monthly stats rollups"
+    )
+    parser.add_argument(
+        "--user-id",
+        type=int,
+        action="append",
+        dest="user_ids",
+        help="Only rebuild this user (repeatable); default: all users",
+    )
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+    asyncio.run(rebuild(args.user_ids, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
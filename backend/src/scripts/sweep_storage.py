@@ -0,0 +1,54 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import timedelta
+
+sys.path.append(os.path.join(os.getcwd(), "src"))
+
+from core.models.db_helper import db_helper
+from core.s3 import s3_service
+from storage.gc import ORPHAN_GRACE, sweep
+
+
+async def run(grace_hours: float, dry_run: bool) -> None:
+    started = time.monotonic()
+    try:
+        report = await sweep(grace=timedelta(hours=grace_hours), dry_run=dry_run)
+    finally:
+        await s3_service.dispose()
+        await db_helper.dispose()
+
+    action = "Would delete" if dry_run else "Deleted"
+    count = report.orphaned if dry_run else report.deleted
+    print(f"Scanned {report.scanned} objects, {report.orphaned} unreferenced.")
+    print(f"{action} {count} objects, {report.bytes_reclaimed / 1024**2:.1f} MiB.")
+    if report.failed:
+        print(f"{report.failed} deletes failed.")
+    print(f"Done in {time.monotonic() - started:.1f}s.")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Delete S3 objects that no screenshot or avatar references"
+    )
+    parser.add_argument(
+        "--grace-hours",
+        type=float,
+        default=ORPHAN_GRACE.total_seconds() / 3600,
+        help="Keep unreferenced objects younger than this",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Only report what would be deleted"
+    )
+    args = parser.parse_args()
+
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+    asyncio.run(run(args.grace_hours, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 import asyncio
 from sqlalchemy import select
 from core.models.db_helper import db_helper
+from core.http_client import provider_http
 from core.models.title import Title, TitleCategory
 from core.igdb_service import igdb_service
 from core.tmdb_service import TmdbService
@@ -75,8 +76,9 @@ async def sync_genres():
         else:
             print("No updates made.")
 
-    # Dispose engine
+    # Dispose engine and provider connections
     await db_helper.dispose()
+    await provider_http.dispose()
     print("Done.")
 
 if __name__ == "__main__":
@@ -0,0 +1,203 @@
+"""Search across every provider at once (`/search?type=all`).
+
+All providers are queried concurrently, each within its own time budget,
+so the slowest one never decides the response time. A provider that has
+not answered after HEDGE_AFTER_SECONDS gets a second, hedged request (or
+an immediate retry if the first failed), and the first answer wins.
+Providers still running when their budget ends are reported as timed out;
+their requests keep going in the background and fill the search cache, so
+the next identical search finds them.
+
+Results are merged. A title that a general provider returns next to a
+specialised catalogue of the same work (TMDB next to Shikimori's anime,
+ComicVine or Google Books next to Shikimori's manga) is kept once, from
+the catalogue. Everything is ranked by how well the title matches the
+query, then by each provider's own ordering.
+"""
+
+import asyncio
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+from core.comicvine_service import comicvine_service
+from core.content import ContentDTO, ContentProvider
+from core.google_books_service import google_books_service
+from core.igdb_service import igdb_service
+from core.shikimori_service import ShikimoriService
+from core.tmdb_service import TmdbService
+
+from .cache import cached_search, normalize_query
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS: dict[str, ContentProvider] = {
+    "game": igdb_service,
+    "movie": TmdbService("movie"),
+    "tv": TmdbService("tv"),
+    "anime": ShikimoriService("anime"),
+    "manga": ShikimoriService("manga"),
+    "comics": comicvine_service,
+    "book": google_books_service,
+}
+
+# Time each provider gets, cache lookup included
+PROVIDER_TIMEOUT_SECONDS: dict[str, float] = {
+    "game": 2.5,
+    "movie": 2.5,
+    "tv": 2.5,
+    "anime": 2.5,
+    "manga": 2.5,
+    "comics": 3.0,
+    "book": 2.5,
+}
+# A provider slower than this gets a second request racing the first
+HEDGE_AFTER_SECONDS = 0.8
+SEARCH_ALL_LIMIT = 50
+
+# General provider -> the specialised catalogue whose results it duplicates.
+# A film and a series are different works, so tv and movie never collapse
+_COVERED_BY = {
+    "tv": "anime",
+    "movie": "anime",
+    "comics": "manga",
+    "book": "manga",
+}
+
+_background_searches: set[asyncio.Task] = set()
+
+
+@dataclass(slots=True)
+class AggregateSearch:
+    results: list[ContentDTO]
+    timed_out: list[str] = field(default_factory=list)
+    failed: list[str] = field(default_factory=list)
+
+
+async def _hedged(provider: ContentProvider, query: str) -> list[ContentDTO]:
+    """Run `provider.search`, racing a second attempt if the first is slow."""
+    attempts = [asyncio.create_task(provider.search(query))]
+    try:
+        done, _ = await asyncio.wait(attempts, timeout=HEDGE_AFTER_SECONDS)
+        if done and attempts[0].exception() is None:
+            return attempts[0].result()
+        attempts.append(asyncio.create_task(provider.search(query)))
+
+        error: BaseException | None = None
+        pending = {task for task in attempts if not task.done()}
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in attempts:
+            task.cancel()
+
+
+async def _provider_search(kind: str, query: str) -> list[dict[str, Any]]:
+    provider = PROVIDERS[kind]
+
+    async def fetch() -> list[dict[str, Any]]:
+        return [item.model_dump() for item in await _hedged(provider, query)]
+
+    return await cached_search(kind, query, fetch)
+
+
+async def _budgeted(kind: str, query: str) -> list[dict[str, Any]]:
+    """One provider's results, or TimeoutError once its budget is spent."""
+    task = asyncio.create_task(_provider_search(kind, query))
+    try:
+        # Shielded: a timeout stops the wait, not the search, which then
+        # completes in the background and populates the cache
+        return await asyncio.wait_for(
+            asyncio.shield(task), PROVIDER_TIMEOUT_SECONDS[kind]
+        )
+    except TimeoutError:
+        _background_searches.add(task)
+        task.add_done_callback(_background_searches.discard)
+        task.add_done_callback(_log_background_failure)
+        raise
+
+
+def _log_background_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Background search failed: %s", task.exception())
+
+
+_WORD = re.compile(r"\w+")
+
+
+def _match_score(item: ContentDTO, query: str) -> int:
+    """3 exact title, 2 title prefix, 1 all query words present, else 0."""
+    best = 0
+    words = set(_WORD.findall(query))
+    for title in (item.title, item.original_title):
+        if not title:
+            continue
+        title = normalize_query(title)
+        if title == query:
+            return 3
+        if title.startswith(query):
+            best = max(best, 2)
+        elif words and words <= set(_WORD.findall(title)):
+            best = max(best, 1)
+    return best
+
+
+def merge_results(
+    results: dict[str, list[ContentDTO]], query: str
+) -> list[ContentDTO]:
+    """Drop what a specialised catalogue already found and rank by title match."""
+    query = normalize_query(query)
+
+    def identities(item: ContentDTO) -> set[tuple[str, int | None]]:
+        names = [item.title]
+        # Google Books puts the authors in original_title
+        if item.original_title and item.type != "book":
+            names.append(item.original_title)
+        return {(normalize_query(name), item.release_year) for name in names}
+
+    catalogued = {
+        kind: set().union(*(identities(item) for item in results.get(kind, [])))
+        for kind in set(_COVERED_BY.values())
+    }
+    ranked: list[tuple[int, float, ContentDTO]] = []
+    for kind, items in results.items():
+        covered = catalogued.get(_COVERED_BY.get(kind), set())
+        for position, item in enumerate(items):
+            if identities(item) & covered:
+                continue
+            # Within one match level, a provider's top hits come first
+            ranked.append((_match_score(item, query), 1 / (1 + position), item))
+
+    ranked.sort(key=lambda entry: entry[:2], reverse=True)
+    return [item for _, _, item in ranked[:SEARCH_ALL_LIMIT]]
+
+
+async def search_all(query: str) -> AggregateSearch:
+    kinds = list(PROVIDERS)
+    outcomes = await asyncio.gather(
+        *(_budgeted(kind, query) for kind in kinds), return_exceptions=True
+    )
+
+    found: dict[str, list[ContentDTO]] = {}
+    timed_out: list[str] = []
+    failed: list[str] = []
+    for kind, outcome in zip(kinds, outcomes):
+        if isinstance(outcome, TimeoutError):
+            timed_out.append(kind)
+        elif isinstance(outcome, BaseException):
+            logger.warning("Search in %s failed: %s", kind, outcome)
+            failed.append(kind)
+        else:
+            found[kind] = [ContentDTO(**item) for item in outcome]
+
+    return AggregateSearch(
+        results=merge_results(found, query), timed_out=timed_out, failed=failed
+    )
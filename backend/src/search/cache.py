@@ -0,0 +1,100 @@
+"""Redis cache for provider search results with stale-while-revalidate."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from redis.exceptions import RedisError
+
+from core.redis.client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Results younger than this are served as-is.
+FRESH_TTL_SECONDS = 6 * 60 * 60
+# Older results are still served, but trigger a background refresh.
+STALE_TTL_SECONDS = 24 * 60 * 60
+# Empty result sets expire sooner so new releases show up quickly.
+NEGATIVE_TTL_SECONDS = 10 * 60
+# Guards against several workers refreshing the same key at once.
+REFRESH_LOCK_SECONDS = 30
+
+_background_refreshes: set[asyncio.Task] = set()
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.casefold().split())
+
+
+def _cache_key(provider: str, query: str) -> str:
+    digest = hashlib.sha1(normalize_query(query).encode("utf-8")).hexdigest()
+    return f"search:{provider}:{digest}"
+
+
+async def _store(key: str, results: list[dict[str, Any]]) -> None:
+    ttl = STALE_TTL_SECONDS if results else NEGATIVE_TTL_SECONDS
+    payload = json.dumps(
+        {"fetched_at": time.time(), "results": results},
+        ensure_ascii=False,
+    )
+    try:
+        await redis_client.set(key, payload, ex=ttl)
+    except RedisError:
+        logger.warning("Failed to write search cache key %s", key)
+
+
+async def _refresh(
+    key: str,
+    fetch: Callable[[], Awaitable[list[dict[str, Any]]]],
+) -> None:
+    lock_key = f"{key}:refresh"
+    try:
+        if not await redis_client.set(lock_key, "1", nx=True, ex=REFRESH_LOCK_SECONDS):
+            return
+    except RedisError:
+        return
+
+    try:
+        await _store(key, await fetch())
+    except Exception:
+        logger.exception("Background search refresh failed for %s", key)
+    finally:
+        try:
+            await redis_client.delete(lock_key)
+        except RedisError:
+            pass
+
+
+async def cached_search(
+    provider: str,
+    query: str,
+    fetch: Callable[[], Awaitable[list[dict[str, Any]]]],
+) -> list[dict[str, Any]]:
+    """Return cached results for (provider, query), fetching on a miss.
+
+    Provider errors propagate on a miss and are never cached.
+    """
+    key = _cache_key(provider, query)
+
+    try:
+        raw = await redis_client.get(key)
+    except RedisError:
+        logger.warning("Search cache unavailable, querying %s directly", provider)
+        return await fetch()
+
+    if raw is not None:
+        cached = json.loads(raw)
+        age = time.time() - cached["fetched_at"]
+        if cached["results"] and age > FRESH_TTL_SECONDS:
+            task = asyncio.create_task(_refresh(key, fetch))
+            _background_refreshes.add(task)
+            task.add_done_callback(_background_refreshes.discard)
+        return cached["results"]
+
+    results = await fetch()
+    await _store(key, results)
+    return results
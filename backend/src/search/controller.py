@@ -1,20 +1,23 @@
+import logging
 from typing import List, Literal
 
-from litestar import Controller, get
+from litestar import Controller, Response, get
 from litestar.exceptions import HTTPException
 
 from core.content import ContentDTO
-from core.igdb_service import igdb_service
-from core.tmdb_service import TmdbService
-from core.shikimori_service import ShikimoriService
-from core.comicvine_service import comicvine_service
-from core.google_books_service import google_books_service
-
-# Instantiate services
-tmdb_movie_service = TmdbService("movie")
-tmdb_tv_service = TmdbService("tv")
-shikimori_anime_service = ShikimoriService("anime")
-shikimori_manga_service = ShikimoriService("manga")
+from search.aggregate import PROVIDERS, search_all
+from search.cache import cached_search
+
+logger = logging.getLogger(__name__)
+
+# Providers whose outages show as an empty result rather than an error;
+# Google Books often returns intermittent 503s. Nothing is cached for them
+SOFT_FAIL_TYPES = frozenset({"book"})
+
+# Comma-separated providers missing from a `type=all` response
+SEARCH_TIMED_OUT_HEADER = "X-Search-Timed-Out"
+SEARCH_FAILED_HEADER = "X-Search-Failed"
+
 
 class SearchController(Controller):
     path = "/search"
@@ -24,32 +27,41 @@ class SearchController(Controller):
     async def search(
         self, 
         q: str, 
-        type: Literal["game", "movie", "tv", "anime", "manga", "comics", "book"]
-    ) -> List[ContentDTO]:
+        type: Literal["game", "movie", "tv", "anime", "manga", "comics", "book", "all"]
+    ) -> Response[List[ContentDTO]]:
         """
         Search for content across different providers.
+
+        `type=all` queries every provider concurrently and returns whatever
+        arrived in time; providers that timed out or failed are listed in
+        the X-Search-Timed-Out and X-Search-Failed headers.
         """
         if not q:
-            return []
+            return Response([])
+
+        if type == "all":
+            outcome = await search_all(q)
+            headers = {}
+            if outcome.timed_out:
+                headers[SEARCH_TIMED_OUT_HEADER] = ",".join(outcome.timed_out)
+            if outcome.failed:
+                headers[SEARCH_FAILED_HEADER] = ",".join(outcome.failed)
+            return Response(outcome.results, headers=headers)
+
+        provider = PROVIDERS.get(type)
+        if provider is None:
+            # This branch might be unreachable due to type hint validation by Litestar
+            raise HTTPException(detail="Invalid type", status_code=400)
+
+        async def fetch() -> list[dict]:
+            return [item.model_dump() for item in await provider.search(q)]
 
         try:
-            if type == "game":
-                return await igdb_service.search(q)
-            elif type == "movie":
-                return await tmdb_movie_service.search(q)
-            elif type == "tv":
-                return await tmdb_tv_service.search(q)
-            elif type == "anime":
-                return await shikimori_anime_service.search(q)
-            elif type == "manga":
-                return await shikimori_manga_service.search(q)
-            elif type == "comics":
-                return await comicvine_service.search(q)
-            elif type == "book":
-                return await google_books_service.search(q)
-            else:
-                 # This branch might be unreachable due to type hint validation by Litestar
-                 raise HTTPException(detail="Invalid type", status_code=400)
+            results = await cached_search(type, q, fetch)
         except Exception as e:
-             # Log the error? It's already logged in services usually.
-             raise HTTPException(detail=f"Search failed: {str(e)}", status_code=500)
+            if type in SOFT_FAIL_TYPES:
+                logger.warning("Search in %s failed: %s", type, e)
+                return Response([])
+            # Log the error? It's already logged in services usually.
+            raise HTTPException(detail=f"Search failed: {str(e)}", status_code=500)
+        return Response([ContentDTO(**item) for item in results])
@@ -0,0 +1,90 @@
+""""Because you liked X" suggestions from precomputed title neighbours.
+
+`scripts/build_title_neighbours.py` stores each title's nearest neighbours
+by item-item collaborative filtering. Serving is one indexed lookup of the
+seed titles' neighbours, minus what the viewer already tracks.
+"""
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.models import Title, TitleNeighbour, UserTitle, UserTitleStatus
+from titles.schemas import TitleRead
+
+from .schemas import BecauseYouLiked, SimilarTitle
+
+# Seeds are the viewer's best-rated (then most recent) completed titles
+SEED_TITLES = 5
+
+
+def _title_columns():
+    return [Title.__table__.c[name] for name in TitleRead.model_fields]
+
+
+async def _seed_titles(db_session: AsyncSession, user_id: int) -> list[int]:
+    result = await db_session.execute(
+        select(UserTitle.title_id)
+        .join(Title, Title.id == UserTitle.title_id)
+        .where(
+            UserTitle.user_id == user_id,
+            UserTitle.status == UserTitleStatus.COMPLETED,
+            Title.parent_title_id.is_(None),
+        )
+        .order_by(UserTitle.score.desc().nulls_last(), UserTitle.updated_at.desc())
+        .limit(SEED_TITLES)
+    )
+    return list(result.scalars().all())
+
+
+async def because_you_liked(
+    db_session: AsyncSession,
+    user_id: int,
+    *,
+    title_id: int | None = None,
+    limit: int,
+) -> list[BecauseYouLiked]:
+    """Neighbours of `title_id`, or of the viewer's favourite titles.
+
+    A title suggested for several seeds is only listed under the first.
+    """
+    seeds = [title_id] if title_id is not None else await _seed_titles(db_session, user_id)
+    if not seeds:
+        return []
+
+    mine = select(UserTitle.title_id).where(UserTitle.user_id == user_id)
+    result = await db_session.execute(
+        select(
+            TitleNeighbour.title_id.label("seed_id"),
+            TitleNeighbour.similarity,
+            *_title_columns(),
+        )
+        .join(Title, Title.id == TitleNeighbour.neighbour_id)
+        .where(
+            TitleNeighbour.title_id.in_(seeds),
+            TitleNeighbour.neighbour_id.not_in(mine),
+        )
+        .order_by(TitleNeighbour.title_id, TitleNeighbour.rank)
+    )
+    neighbours: dict[int, list] = {seed: [] for seed in seeds}
+    for row in result.all():
+        neighbours[row.seed_id].append(row)
+
+    by_seed: dict[int, list[SimilarTitle]] = {}
+    seen: set[int] = set()
+    for seed in seeds:
+        fresh = [row for row in neighbours[seed] if row.id not in seen][:limit]
+        seen.update(row.id for row in fresh)
+        by_seed[seed] = [
+            SimilarTitle(title=TitleRead.model_validate(row), similarity=row.similarity)
+            for row in fresh
+        ]
+
+    result = await db_session.execute(select(*_title_columns()).where(Title.id.in_(seeds)))
+    sources = {row.id: row for row in result.all()}
+    return [
+        BecauseYouLiked(
+            source=TitleRead.model_validate(sources[seed]), items=by_seed[seed]
+        )
+        for seed in seeds
+        if seed in sources and by_seed[seed]
+    ]
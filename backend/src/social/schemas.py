@@ -17,3 +17,13 @@ class RecommendationItem(BaseModel):
     score: float
     shared_genres: list[str]
     recommended_by: list[RecommendedByUser]
+
+
+class SimilarTitle(BaseModel):
+    title: TitleRead
+    similarity: float
+
+
+class BecauseYouLiked(BaseModel):
+    source: TitleRead
+    items: list[SimilarTitle]
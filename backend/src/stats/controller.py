@@ -1,17 +1,43 @@
 from calendar import monthrange
-from collections import Counter
+from collections import Counter, defaultdict
+from datetime import datetime
 from typing import Annotated, Any
 
 from litestar import Controller, Request, get
 from litestar.di import Provide
 from litestar.params import Parameter
-from sqlalchemy import extract, select
+from sqlalchemy import (
+    Float,
+    Integer,
+    String,
+    cast,
+    extract,
+    func,
+    literal,
+    select,
+    union_all,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from core.models import Title, User, UserTitle, UserTitleStatus
+from core.models import (
+    GamePlatform,
+    Title,
+    TitleCategory,
+    User,
+    UserStatsRollup,
+    UserTitle,
+    UserTitleStatus,
+)
 from core.models.db_helper import get_db_session
-from .schemas import DayCount, MonthCount, NamedCount, YearStatsRead
+from . import rollups  # noqa: F401  (registers the rollup maintenance listeners)
+from .schemas import (
+    DayCount,
+    MonthCount,
+    NamedCount,
+    StatsOverviewRead,
+    YearOverview,
+    YearStatsRead,
+)
 
 CATEGORY_LABELS = {
     "game": "Игры",
@@ -24,6 +50,82 @@ CATEGORY_LABELS = {
 }
 
 
+def _most_common(counter: Counter[str], n: int | None = None) -> list[tuple[str, int]]:
+    # Ties by name, so the order does not depend on row order
+    return sorted(counter.items(), key=lambda item: (-item[1], item[0]))[:n]
+
+
+def _year_stats_query(user_id: int, year: int, month: int | None):
+    """All year-stats aggregates as (dim, key, count, avg_score) rows.
+
+    Each dimension is a GROUP BY over the same CTE, glued with UNION ALL so
+    the whole page is one round trip and no rows leave the database.
+    """
+    done = (
+        select(
+            UserTitle.finished_at,
+            UserTitle.score,
+            UserTitle.game_platform,
+            Title.category,
+            Title.genres,
+        )
+        .join(Title, UserTitle.title_id == Title.id)
+        .where(
+            UserTitle.user_id == user_id,
+            UserTitle.status == UserTitleStatus.COMPLETED,
+            UserTitle.finished_at >= datetime(year, 1, 1),
+            UserTitle.finished_at < datetime(year + 1, 1, 1),
+            Title.parent_title_id.is_(None),
+        )
+        .cte("done")
+    )
+    finished_month = extract("month", done.c.finished_at)
+    if month is None:
+        scope = done
+    else:
+        scope = select(done).where(finished_month == month).cte("scope")
+
+    no_score = cast(None, Float)
+
+    def grouped(dim: str, key, source, *where):
+        return (
+            select(
+                literal(dim).label("dim"),
+                cast(key, String).label("key"),
+                func.count().label("count"),
+                no_score.label("avg_score"),
+            )
+            .select_from(source)
+            .where(*where)
+            .group_by(key)
+        )
+
+    genres = select(func.unnest(scope.c.genres).label("genre")).subquery("genres")
+
+    parts = [
+        select(
+            literal("total"),
+            cast(None, String),
+            func.count(),
+            cast(func.avg(scope.c.score), Float),
+        ).select_from(scope),
+        # Months always cover the whole year, other dimensions the scope
+        grouped("month", cast(finished_month, Integer), done),
+        grouped("genre", genres.c.genre, genres, genres.c.genre != ""),
+        grouped(
+            "platform",
+            scope.c.game_platform,
+            scope,
+            scope.c.game_platform.is_not(None),
+        ),
+        grouped("category", scope.c.category, scope),
+    ]
+    if month is not None:
+        day = cast(extract("day", scope.c.finished_at), Integer)
+        parts.append(grouped("day", day, scope))
+    return union_all(*parts)
+
+
 class StatsController(Controller):
     path = "/stats"
     tags = ["Stats"]
@@ -39,86 +141,133 @@ class StatsController(Controller):
         year: int,
         month: Annotated[int | None, Parameter(required=False, ge=1, le=12)] = None,
     ) -> YearStatsRead:
-        stmt = (
-            select(UserTitle)
-            .join(Title, UserTitle.title_id == Title.id)
-            .options(selectinload(UserTitle.title))
-            .where(
-                UserTitle.user_id == request.user.id,
-                UserTitle.status == UserTitleStatus.COMPLETED,
-                UserTitle.finished_at.is_not(None),
-                extract("year", UserTitle.finished_at) == year,
-                Title.parent_title_id.is_(None),
-            )
-        )
-        result = await db_session.execute(stmt)
-        year_completed = list(result.scalars().unique().all())
+        stmt = _year_stats_query(request.user.id, year, month)
+        rows = (await db_session.execute(stmt)).all()
 
-        month_counter: Counter[int] = Counter()
-        for ut in year_completed:
-            if ut.finished_at:
-                month_counter[ut.finished_at.month] += 1
+        counters: dict[str, Counter[str]] = defaultdict(Counter)
+        completed_count = 0
+        average_score = None
+        for dim, key, count, avg_score in rows:
+            if dim == "total":
+                completed_count = count
+                average_score = round(avg_score, 1) if avg_score is not None else None
+            else:
+                counters[dim][key] = count
 
+        month_counter = counters["month"]
         if month is None:
-            completed = year_completed
             daily_heatmap: list[DayCount] = []
         else:
-            completed = [
-                ut
-                for ut in year_completed
-                if ut.finished_at and ut.finished_at.month == month
-            ]
-            day_counter: Counter[int] = Counter()
-            for ut in completed:
-                if ut.finished_at:
-                    day_counter[ut.finished_at.day] += 1
+            day_counter = counters["day"]
             days_in_month = monthrange(year, month)[1]
             daily_heatmap = [
-                DayCount(day=day, count=day_counter.get(day, 0))
+                DayCount(day=day, count=day_counter.get(str(day), 0))
                 for day in range(1, days_in_month + 1)
             ]
 
-        scores = [ut.score for ut in completed if ut.score is not None]
-        average_score = round(sum(scores) / len(scores), 1) if scores else None
-
-        genre_counter: Counter[str] = Counter()
-        for ut in completed:
-            for genre in ut.title.genres or []:
-                if genre:
-                    genre_counter[genre] += 1
-
-        platform_counter: Counter[str] = Counter()
-        for ut in completed:
-            if ut.game_platform is not None:
-                platform_counter[ut.game_platform.value] += 1
-
-        category_counter: Counter[str] = Counter()
-        for ut in completed:
-            category_counter[ut.title.category.value] += 1
+        # Postgres returns enum names; the API has always used the values
+        genre_counter = counters["genre"]
+        platform_counter = Counter(
+            {GamePlatform[name].value: n for name, n in counters["platform"].items()}
+        )
+        category_counter = Counter(
+            {TitleCategory[name].value: n for name, n in counters["category"].items()}
+        )
 
         return YearStatsRead(
             year=year,
             month=month,
-            completed_count=len(completed),
+            completed_count=completed_count,
             average_score=average_score,
             top_genres=[
                 NamedCount(name=name, count=count)
-                for name, count in genre_counter.most_common(8)
+                for name, count in _most_common(genre_counter, 8)
             ],
             monthly_heatmap=[
-                MonthCount(month=m, count=month_counter.get(m, 0))
+                MonthCount(month=m, count=month_counter.get(str(m), 0))
                 for m in range(1, 13)
             ],
             daily_heatmap=daily_heatmap,
             by_platform=[
                 NamedCount(name=name, count=count)
-                for name, count in platform_counter.most_common()
+                for name, count in _most_common(platform_counter)
             ],
             by_category=[
                 NamedCount(
                     name=CATEGORY_LABELS.get(name, name),
                     count=count,
                 )
-                for name, count in category_counter.most_common()
+                for name, count in _most_common(category_counter)
             ],
         )
+
+    @get("/overview")
+    async def get_overview(
+        self,
+        request: Request[User, dict, Any],  # type: ignore
+        db_session: AsyncSession,
+    ) -> StatsOverviewRead:
+        """All years of completed titles side by side, read from the rollups."""
+        stmt = (
+            select(
+                UserStatsRollup.year,
+                UserStatsRollup.month,
+                UserStatsRollup.dimension,
+                UserStatsRollup.key,
+                UserStatsRollup.count,
+                UserStatsRollup.score_sum,
+                UserStatsRollup.score_count,
+            )
+            .where(UserStatsRollup.user_id == request.user.id)
+            .order_by(UserStatsRollup.year.desc())
+        )
+        rows = (await db_session.execute(stmt)).all()
+
+        years: dict[int, dict[str, Counter]] = {}
+        score_sums: Counter[int] = Counter()
+        score_counts: Counter[int] = Counter()
+        for year, month, dimension, key, count, score_sum, score_count in rows:
+            counters = years.setdefault(year, defaultdict(Counter))
+            if dimension == "total":
+                counters["month"][month] += count
+                score_sums[year] += score_sum
+                score_counts[year] += score_count
+            else:
+                counters[dimension][key] += count
+
+        overview = []
+        for year, counters in years.items():
+            platforms = Counter(
+                {GamePlatform[name].value: n for name, n in counters["platform"].items()}
+            )
+            categories = Counter(
+                {TitleCategory[name].value: n for name, n in counters["category"].items()}
+            )
+            overview.append(
+                YearOverview(
+                    year=year,
+                    completed_count=sum(counters["month"].values()),
+                    average_score=(
+                        round(score_sums[year] / score_counts[year], 1)
+                        if score_counts[year]
+                        else None
+                    ),
+                    monthly=[
+                        MonthCount(month=m, count=counters["month"].get(m, 0))
+                        for m in range(1, 13)
+                    ],
+                    top_genres=[
+                        NamedCount(name=name, count=count)
+                        for name, count in _most_common(counters["genre"], 8)
+                    ],
+                    by_platform=[
+                        NamedCount(name=name, count=count)
+                        for name, count in _most_common(platforms)
+                    ],
+                    by_category=[
+                        NamedCount(name=CATEGORY_LABELS.get(name, name), count=count)
+                        for name, count in _most_common(categories)
+                    ],
+                )
+            )
+        return StatsOverviewRead(years=overview)
@@ -0,0 +1,212 @@
+"""Per-user monthly stats rollups kept in step with library changes.
+
+Whenever a flush inserts, deletes or changes the status, score, finish date
+or platform of a `UserTitle`, the affected (user, year, month) buckets are
+recomputed from `user_titles` inside the same transaction. A bucket is one
+month of one user's library, so the recompute is a small indexed GROUP BY
+no matter how big the library is. Recomputes hold a transaction-level
+advisory lock on the user, so two transactions never delete and re-insert
+the same bucket at once. `scripts/rebuild_stats_rollups.py`
+rebuilds everything, e.g. after catalog genres were re-synced.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import (
+    Float,
+    Integer,
+    Select,
+    String,
+    cast,
+    delete,
+    event,
+    extract,
+    func,
+    insert,
+    inspect,
+    literal,
+    select,
+    union_all,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from core.models import Title, UserStatsRollup, UserTitle, UserTitleStatus
+
+# Changes to these UserTitle fields move a title between buckets or keys
+TRACKED_FIELDS = ("status", "score", "finished_at", "game_platform")
+
+_PENDING_KEY = "stats_rollup_buckets"
+
+Bucket = tuple[int, int, int]
+
+
+def _month_range(year: int, month: int) -> tuple[datetime, datetime]:
+    start = datetime(year, month, 1)
+    end = datetime(year + month // 12, month % 12 + 1, 1)
+    return start, end
+
+
+def rollup_select(*where) -> Select:
+    """Rollup rows for the completed titles matching `where`.
+
+    Columns follow the `UserStatsRollup` insert order.
+    """
+    completed = (
+        select(
+            UserTitle.user_id,
+            cast(extract("year", UserTitle.finished_at), Integer).label("year"),
+            cast(extract("month", UserTitle.finished_at), Integer).label("month"),
+            UserTitle.score,
+            UserTitle.game_platform,
+            Title.category,
+            Title.genres,
+        )
+        .join(Title, UserTitle.title_id == Title.id)
+        .where(
+            UserTitle.status == UserTitleStatus.COMPLETED,
+            UserTitle.finished_at.is_not(None),
+            Title.parent_title_id.is_(None),
+            *where,
+        )
+        .cte("completed")
+    )
+
+    def grouped(dimension: str, key, source, *conditions):
+        group_by = [source.c.user_id, source.c.year, source.c.month]
+        if key is None:
+            key = literal("", String)
+        else:
+            group_by.append(key)
+        return (
+            select(
+                source.c.user_id,
+                source.c.year,
+                source.c.month,
+                literal(dimension, String),
+                cast(key, String),
+                func.count(),
+                func.coalesce(func.sum(source.c.score), 0.0).cast(Float),
+                func.count(source.c.score),
+            )
+            .where(*conditions)
+            .group_by(*group_by)
+        )
+
+    genres = select(
+        completed.c.user_id,
+        completed.c.year,
+        completed.c.month,
+        completed.c.score,
+        func.unnest(completed.c.genres).label("genre"),
+    ).subquery("genres")
+
+    return union_all(
+        grouped("total", None, completed),
+        grouped("category", completed.c.category, completed),
+        grouped(
+            "platform",
+            completed.c.game_platform,
+            completed,
+            completed.c.game_platform.is_not(None),
+        ),
+        grouped("genre", genres.c.genre, genres, genres.c.genre != ""),
+    )
+
+
+def _insert_rollups(*where):
+    columns = [
+        "user_id",
+        "year",
+        "month",
+        "dimension",
+        "key",
+        "count",
+        "score_sum",
+        "score_count",
+    ]
+    return insert(UserStatsRollup).from_select(columns, rollup_select(*where))
+
+
+def _lock_user(user_id: int):
+    # Released at commit or rollback; the user's rollups are rewritten by
+    # one transaction at a time
+    return select(func.pg_advisory_xact_lock(user_id))
+
+
+def _bucket_statements(bucket: Bucket):
+    user_id, year, month = bucket
+    start, end = _month_range(year, month)
+    return (
+        delete(UserStatsRollup).where(
+            UserStatsRollup.user_id == user_id,
+            UserStatsRollup.year == year,
+            UserStatsRollup.month == month,
+        ),
+        _insert_rollups(
+            UserTitle.user_id == user_id,
+            UserTitle.finished_at >= start,
+            UserTitle.finished_at < end,
+        ),
+    )
+
+
+async def rebuild_user_rollups(db_session: AsyncSession, user_id: int) -> None:
+    await db_session.execute(_lock_user(user_id))
+    await db_session.execute(
+        delete(UserStatsRollup).where(UserStatsRollup.user_id == user_id)
+    )
+    await db_session.execute(_insert_rollups(UserTitle.user_id == user_id))
+
+
+# --- incremental maintenance -------------------------------------------------
+
+
+def _bucket_of(user_id: int | None, finished_at: datetime | None) -> Bucket | None:
+    if user_id is None or finished_at is None:
+        return None
+    return user_id, finished_at.year, finished_at.month
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_buckets(session: Session, flush_context, instances) -> None:
+    buckets: set[Bucket] = session.info.setdefault(_PENDING_KEY, set())
+    candidates: list[Bucket | None] = []
+
+    for obj in session.new:
+        if isinstance(obj, UserTitle):
+            candidates.append(_bucket_of(obj.user_id, obj.finished_at))
+    for obj in session.deleted:
+        if isinstance(obj, UserTitle):
+            candidates.append(_bucket_of(obj.user_id, obj.finished_at))
+    for obj in session.dirty:
+        if not isinstance(obj, UserTitle):
+            continue
+        attrs = inspect(obj).attrs
+        if not any(attrs[name].history.has_changes() for name in TRACKED_FIELDS):
+            continue
+        candidates.append(_bucket_of(obj.user_id, obj.finished_at))
+        # A moved finish date also empties the old month
+        for old in attrs.finished_at.history.deleted:
+            candidates.append(_bucket_of(obj.user_id, old))
+
+    buckets.update(b for b in candidates if b is not None)
+
+
+@event.listens_for(Session, "after_flush")
+def _recompute_buckets(session: Session, flush_context) -> None:
+    buckets = session.info.pop(_PENDING_KEY, None)
+    if not buckets:
+        return
+    connection = session.connection()
+    # Locks are taken in user order, so concurrent flushes cannot deadlock
+    for user_id in sorted({user_id for user_id, _, _ in buckets}):
+        connection.execute(_lock_user(user_id))
+    for bucket in sorted(buckets):
+        for stmt in _bucket_statements(bucket):
+            connection.execute(stmt)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_buckets(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -26,3 +26,17 @@ class YearStatsRead(BaseModel):
     daily_heatmap: list[DayCount] = Field(default_factory=list)
     by_platform: list[NamedCount]
     by_category: list[NamedCount]
+
+
+class YearOverview(BaseModel):
+    year: int
+    completed_count: int
+    average_score: float | None
+    monthly: list[MonthCount]
+    top_genres: list[NamedCount]
+    by_platform: list[NamedCount]
+    by_category: list[NamedCount]
+
+
+class StatsOverviewRead(BaseModel):
+    years: list[YearOverview]
@@ -0,0 +1,278 @@
+"""Garbage collection of objects in S3.
+
+Two paths remove objects nothing points at any more:
+
+- The deletion queue. Deleting screenshots or library entries queues their
+  keys once the transaction commits, through session hooks here, or
+  through `schedule_deletion` for Core bulk deletes and replaced avatars.
+  The request never waits on S3.
+- The sweeper. Every SWEEP_INTERVAL_SECONDS one worker lists the bucket
+  and removes objects older than ORPHAN_GRACE that no row references. This
+  catches what the queue missed: lost jobs, uploads that were never
+  confirmed and abandoned import files.
+
+Both check `referenced_keys` right before deleting, since a key can be
+referenced again, or by another user's row (imported backups keep the
+original URLs). Deletes go out in DeleteObjects batches of 1000.
+"""
+
+import asyncio
+import logging
+from collections.abc import Iterable
+from contextlib import suppress
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from redis.exceptions import RedisError
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from core.models import TitleScreenshot, User, UserTitle
+from core.models.db_helper import db_helper
+from core.redis.client import redis_client
+from core.redis.queue import JobQueue
+from core.s3 import (
+    DELETE_OBJECTS_BATCH,
+    IMAGE_EXTENSIONS,
+    parse_s3_key_from_url,
+    s3_service,
+)
+from screenshots.derivatives import VARIANTS, variant_keys
+from users.avatars import LEGACY_URL_PREFIX
+
+logger = logging.getLogger(__name__)
+
+JOB_DELETE_OBJECTS = "delete_objects"
+
+SWEPT_PREFIXES = ("screenshots/", "avatars/", "imports/")
+# Younger objects may still be on their way to being referenced: presigned
+# uploads awaiting confirmation, variants being rendered, queued imports
+ORPHAN_GRACE = timedelta(hours=24)
+SWEEP_INTERVAL_SECONDS = 6 * 60 * 60
+SWEEP_LOCK_KEY = "storage:sweep:lock"
+
+_PENDING_KEY = "storage_gc_pending"
+
+storage_queue = JobQueue("storage")
+
+_background_deletions: set[asyncio.Task] = set()
+
+
+@dataclass(slots=True)
+class SweepReport:
+    scanned: int = 0
+    orphaned: int = 0
+    deleted: int = 0
+    failed: int = 0
+    bytes_reclaimed: int = 0
+
+
+def screenshot_keys(s3_key: str) -> list[str]:
+    """A screenshot's original together with its generated variants."""
+    return [s3_key, *variant_keys(s3_key)]
+
+
+def _screenshot_originals(key: str) -> set[str]:
+    """Screenshot keys whose row keeps `key` alive."""
+    for variant in VARIANTS:
+        suffix = f".{variant.name}.webp"
+        if key.endswith(suffix):
+            stem = key.removesuffix(suffix)
+            return {f"{stem}.{ext}" for ext in IMAGE_EXTENSIONS.values()}
+    return {key}
+
+
+async def referenced_keys(session: AsyncSession, keys: Iterable[str]) -> set[str]:
+    """The subset of `keys` that a screenshot or an avatar still uses."""
+    by_screenshot: dict[str, set[str]] = {}
+    # avatars/{user_id}/{digest} -> keys under it
+    by_avatar: dict[str, set[str]] = {}
+    for key in keys:
+        if key.startswith("screenshots/"):
+            for original in _screenshot_originals(key):
+                by_screenshot.setdefault(original, set()).add(key)
+        elif key.startswith("avatars/"):
+            by_avatar.setdefault(key.rsplit("/", 1)[0], set()).add(key)
+
+    live: set[str] = set()
+    if by_screenshot:
+        rows = await session.scalars(
+            select(TitleScreenshot.s3_key)
+            .where(TitleScreenshot.s3_key.in_(by_screenshot))
+            .distinct()
+        )
+        for s3_key in rows:
+            live |= by_screenshot[s3_key]
+    if by_avatar:
+        # Users store the URL of one size, and it keeps every size alive.
+        # Compared by key, so a changed endpoint or CDN host cannot orphan
+        # every avatar at once
+        user_ids = set()
+        for prefix in by_avatar:
+            with suppress(IndexError, ValueError):
+                user_ids.add(int(prefix.split("/")[1]))
+        rows = await session.scalars(
+            select(User.avatar_url).where(
+                User.id.in_(user_ids), User.avatar_url.is_not(None)
+            )
+        )
+        for url in rows:
+            if url.startswith(LEGACY_URL_PREFIX):
+                continue
+            key = parse_s3_key_from_url(url)
+            if key is not None:
+                live |= by_avatar.get(key.rsplit("/", 1)[0], set())
+    return live
+
+
+async def _delete_unreferenced(keys: list[str]) -> tuple[list[str], list[str]]:
+    """Delete the keys nothing references; returns (deleted, failed)."""
+    async with db_helper.session_factory() as session:
+        live = await referenced_keys(session, keys)
+    orphans = [key for key in keys if key not in live]
+    if not orphans:
+        return [], []
+    failed = await s3_service.delete_objects(orphans)
+    failed_set = set(failed)
+    return [key for key in orphans if key not in failed_set], failed
+
+
+async def schedule_deletion(keys: Iterable[str]) -> None:
+    """Queue objects for deletion, in jobs of up to DELETE_OBJECTS_BATCH keys.
+
+    Failing to enqueue is not fatal: the sweeper removes the objects later.
+    """
+    keys = sorted(set(keys))
+    for start in range(0, len(keys), DELETE_OBJECTS_BATCH):
+        batch = keys[start : start + DELETE_OBJECTS_BATCH]
+        try:
+            await storage_queue.enqueue(JOB_DELETE_OBJECTS, {"keys": batch})
+        except RedisError:
+            logger.warning("Failed to enqueue deletion of %s objects", len(batch))
+
+
+async def _run_delete_objects(payload: dict[str, Any]) -> None:
+    deleted, failed = await _delete_unreferenced(payload["keys"])
+    if failed:
+        # Raising retries the job; the referenced check runs again first
+        raise RuntimeError(f"Failed to delete {len(failed)} objects")
+    logger.info(
+        "Deleted %s of %s queued objects", len(deleted), len(payload["keys"])
+    )
+
+
+STORAGE_HANDLERS = {
+    JOB_DELETE_OBJECTS: _run_delete_objects,
+}
+
+
+# --- session hooks ------------------------------------------------------
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_released_keys(session: Session, flush_context, instances) -> None:
+    screenshots = set()
+    entry_ids = set()
+    for obj in session.deleted:
+        if isinstance(obj, TitleScreenshot):
+            screenshots.add(obj.s3_key)
+        elif isinstance(obj, UserTitle):
+            entry_ids.add(obj.id)
+    if entry_ids:
+        # The database cascades entries' screenshots; read them while they exist
+        screenshots.update(
+            session.connection().scalars(
+                select(TitleScreenshot.s3_key).where(
+                    TitleScreenshot.user_title_id.in_(entry_ids)
+                )
+            )
+        )
+    if screenshots:
+        pending: set[str] = session.info.setdefault(_PENDING_KEY, set())
+        for s3_key in screenshots:
+            pending.update(screenshot_keys(s3_key))
+
+
+@event.listens_for(Session, "after_commit")
+def _schedule_released_keys(session: Session) -> None:
+    keys = session.info.pop(_PENDING_KEY, None)
+    if not keys:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(schedule_deletion(keys))
+    _background_deletions.add(task)
+    task.add_done_callback(_background_deletions.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_released_keys(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+# --- sweeper ------------------------------------------------------------
+
+
+async def sweep(
+    *, grace: timedelta = ORPHAN_GRACE, dry_run: bool = False
+) -> SweepReport:
+    """Delete unreferenced objects older than `grace` under SWEPT_PREFIXES.
+
+    Works one listing page (up to 1000 objects) at a time: one reference
+    query and at most one DeleteObjects request per page.
+    """
+    report = SweepReport()
+    cutoff = datetime.now(UTC) - grace
+    for prefix in SWEPT_PREFIXES:
+        async for page in s3_service.iter_object_pages(prefix):
+            report.scanned += len(page)
+            sizes = {
+                obj["Key"]: obj["Size"] for obj in page if obj["LastModified"] < cutoff
+            }
+            if not sizes:
+                continue
+            if dry_run:
+                async with db_helper.session_factory() as session:
+                    live = await referenced_keys(session, sizes)
+                orphans = [key for key in sizes if key not in live]
+                report.orphaned += len(orphans)
+                report.bytes_reclaimed += sum(sizes[key] for key in orphans)
+                continue
+
+            deleted, failed = await _delete_unreferenced(list(sizes))
+            report.orphaned += len(deleted) + len(failed)
+            report.deleted += len(deleted)
+            report.failed += len(failed)
+            report.bytes_reclaimed += sum(sizes[key] for key in deleted)
+    return report
+
+
+async def run_sweeper(
+    stop: asyncio.Event, interval: float = SWEEP_INTERVAL_SECONDS
+) -> None:
+    """Sweep every `interval` seconds until `stop` is set.
+
+    A Redis lock that expires after one interval makes a single worker do
+    each sweep, however many are running.
+    """
+    while not stop.is_set():
+        try:
+            if await redis_client.set(SWEEP_LOCK_KEY, "1", nx=True, ex=int(interval)):
+                report = await sweep()
+                logger.info(
+                    "Storage sweep: %s scanned, %s orphaned, %s deleted, "
+                    "%s failed, %s bytes reclaimed",
+                    report.scanned,
+                    report.orphaned,
+                    report.deleted,
+                    report.failed,
+                    report.bytes_reclaimed,
+                )
+        except Exception:
+            logger.exception("Storage sweep failed")
+        with suppress(TimeoutError):
+            await asyncio.wait_for(stop.wait(), interval)
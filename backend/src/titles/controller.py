@@ -5,7 +5,7 @@ from sqlalchemy import func, select
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from litestar import Controller, delete, get, post, put, Request
+from litestar import Controller, delete, get, post, put, Request, Response
 from litestar.di import Provide
 from litestar.exceptions import HTTPException, NotFoundException
 from litestar.security.jwt import Token
@@ -26,6 +26,7 @@ from core.models import (
     UserTitleSeason,
     UserTitleEpisode,
 )
+from core.pagination import keyset_page, paged_response, split_page
 from core.privacy import ensure_can_view_user_library
 from users.schemas import UserRead
 from user_titles.schemas import SeriesStructureRead, SeasonStructureRead, GameDlcsRead
@@ -350,6 +351,7 @@ class TitleController(Controller):
         db_session: AsyncSession,
         limit: int = 50,
         offset: int = 0,
+        cursor: str | None = None,
     ) -> ReviewViewsResponse:
         """List users who viewed this review. Owner only."""
         user_title = await db_session.get(UserTitle, user_title_id)
@@ -365,20 +367,25 @@ class TitleController(Controller):
         count_result = await db_session.execute(count_stmt)
         count = count_result.scalar() or 0
 
-        viewers_stmt = (
-            select(User)
+        viewers_stmt = keyset_page(
+            select(User, ReviewView.viewed_at, ReviewView.id)
             .join(ReviewView, ReviewView.viewer_id == User.id)
-            .where(ReviewView.user_title_id == user_title_id)
-            .order_by(ReviewView.viewed_at.desc())
-            .limit(limit)
-            .offset(offset)
+            .where(ReviewView.user_title_id == user_title_id),
+            ReviewView.viewed_at,
+            ReviewView.id,
+            limit=limit,
+            cursor=cursor,
+            offset=offset,
         )
         viewers_result = await db_session.execute(viewers_stmt)
-        viewers = viewers_result.scalars().all()
+        rows, next_cursor = split_page(
+            viewers_result.all(), limit, lambda row: (row.viewed_at, row.id)
+        )
 
         return ReviewViewsResponse(
             count=count,
-            viewers=[UserRead.model_validate(u) for u in viewers],
+            viewers=[UserRead.model_validate(row.User) for row in rows],
+            next_cursor=next_cursor,
         )
 
     @get("/entry/{user_title_id:int}/comments")
@@ -389,23 +396,32 @@ class TitleController(Controller):
         db_session: AsyncSession,
         limit: int = 50,
         offset: int = 0,
-    ) -> list[ReviewCommentRead]:
+        cursor: str | None = None,
+    ) -> Response[list[ReviewCommentRead]]:
         user_title = await self._get_user_title_or_404(user_title_id, db_session)
         await self._ensure_can_view_user_library(
             owner_id=user_title.user_id,
             viewer_id=request.user.id,
             db_session=db_session,
         )
-        stmt = (
+        stmt = keyset_page(
             select(ReviewComment)
             .options(selectinload(ReviewComment.author))
-            .where(ReviewComment.user_title_id == user_title_id)
-            .order_by(ReviewComment.created_at.asc())
-            .limit(limit)
-            .offset(offset)
+            .where(ReviewComment.user_title_id == user_title_id),
+            ReviewComment.created_at,
+            ReviewComment.id,
+            limit=limit,
+            cursor=cursor,
+            offset=offset,
+            descending=False,
         )
         result = await db_session.execute(stmt)
-        return [ReviewCommentRead.model_validate(c) for c in result.scalars().all()]
+        comments, next_cursor = split_page(
+            result.scalars().all(), limit, lambda c: (c.created_at, c.id)
+        )
+        return paged_response(
+            [ReviewCommentRead.model_validate(c) for c in comments], next_cursor
+        )
 
     @post("/entry/{user_title_id:int}/comments")
     async def create_review_comment(
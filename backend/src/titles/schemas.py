@@ -63,6 +63,7 @@ class ReviewViewRecordResponse(BaseModel):
 class ReviewViewsResponse(BaseModel):
     count: int
     viewers: list[UserRead]
+    next_cursor: str | None = None
 
 
 class ReviewCommentCreate(BaseModel):
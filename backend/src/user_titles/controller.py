@@ -19,9 +19,9 @@ from core.models import (
     UserTitleSeason,
     UserTitleEpisode,
 )
-from core.models.notification import Notification, NotificationType
-from core.models.user import subscriptions_table
+from core.models.notification import NotificationType
 from core.models.db_helper import get_db_session
+from notifications.fanout import notify_followers
 from screenshots.schemas import ScreenshotRead
 from .schemas import (
     AddUserTitleRequest,
@@ -48,8 +48,8 @@ from .structure_sync import (
     sync_full_structure,
 )
 from .structure_read import build_structure_response
-from .dlc_sync import sync_dlcs_from_igdb
 from .dlc_read import build_game_dlcs_response
+from .enrichment import enqueue_title_enrichment
 
 
 def _spoiler_from_text(text: str | None) -> bool:
@@ -322,36 +322,21 @@ class UserTitlesController(Controller):
 
         await db_session.flush()
 
-        if supports_structure(category):
-            await sync_full_structure(db_session, user_title, load_all_episodes=False)
-        elif category == TitleCategory.GAME and not title.parent_title_id:
-            await sync_dlcs_from_igdb(db_session, title)
-
         should_notify = is_new or has_meaningful_change
         if should_notify:
             notif_type = (
                 NotificationType.NEW_TITLE if is_new else NotificationType.TITLE_UPDATED
             )
-
-            follower_stmt = select(subscriptions_table.c.follower_id).where(
-                subscriptions_table.c.following_id == user_id
+            await notify_followers(
+                db_session,
+                actor_id=user_id,
+                user_title_id=user_title.id,
+                notification_type=notif_type,
             )
-            follower_result = await db_session.execute(follower_stmt)
-            follower_ids = [row[0] for row in follower_result.fetchall()]
-
-            if follower_ids:
-                notifications = [
-                    Notification(
-                        recipient_id=follower_id,
-                        actor_id=user_id,
-                        user_title_id=user_title.id,
-                        type=notif_type,
-                    )
-                    for follower_id in follower_ids
-                ]
-                db_session.add_all(notifications)
 
         await db_session.commit()
+        # Provider sync runs in the enrichment worker, off the request path
+        await enqueue_title_enrichment(title)
         await db_session.refresh(user_title)
 
         return _to_user_title_read(user_title)
@@ -391,24 +376,12 @@ class UserTitlesController(Controller):
         else:
             user_title.finished_at = None
 
-        follower_stmt = select(subscriptions_table.c.follower_id).where(
-            subscriptions_table.c.following_id == request.user.id
-        )
-        follower_result = await db_session.execute(follower_stmt)
-        follower_ids = [row[0] for row in follower_result.fetchall()]
-
-        if follower_ids:
-            db_session.add_all(
-                [
-                    Notification(
-                        recipient_id=follower_id,
-                        actor_id=request.user.id,
-                        user_title_id=user_title.id,
-                        type=NotificationType.TITLE_UPDATED,
-                    )
-                    for follower_id in follower_ids
-                ]
-            )
+        await notify_followers(
+            db_session,
+            actor_id=request.user.id,
+            user_title_id=user_title.id,
+            notification_type=NotificationType.TITLE_UPDATED,
+        )
 
         await db_session.commit()
         await db_session.refresh(user_title)
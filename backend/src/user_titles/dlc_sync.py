@@ -6,12 +6,28 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from core.igdb_service import igdb_service
 from core.models import Title, TitleCategory
 
+from .sync_guard import SYNC_DLCS, acquire_sync, lock_sync, mark_synced
+
+
+async def _linked_dlcs(db_session: AsyncSession, parent_title_id: int) -> list[Title]:
+    stmt = (
+        select(Title)
+        .where(Title.parent_title_id == parent_title_id)
+        .order_by(Title.release_year.asc().nulls_last(), Title.name.asc())
+    )
+    result = await db_session.execute(stmt)
+    return list(result.scalars().all())
+
 
 async def sync_dlcs_from_igdb(db_session: AsyncSession, parent_title: Title) -> list[Title]:
     """Fetch DLC/expansions for a game and upsert them as child Title rows."""
     if parent_title.category != TitleCategory.GAME or not parent_title.external_id:
         return []
 
+    if not await acquire_sync(db_session, SYNC_DLCS, parent_title.id):
+        # A concurrent request just synced this game; reuse its rows
+        return await _linked_dlcs(db_session, parent_title.id)
+
     try:
         dlc_games = await igdb_service.get_game_dlcs(parent_title.external_id)
     except Exception:
@@ -19,14 +35,9 @@ async def sync_dlcs_from_igdb(db_session: AsyncSession, parent_title: Title) ->
 
     if not dlc_games:
         # Still return existing children linked in DB
-        existing_stmt = (
-            select(Title)
-            .where(Title.parent_title_id == parent_title.id)
-            .order_by(Title.release_year.asc().nulls_last(), Title.name.asc())
-        )
-        existing_result = await db_session.execute(existing_stmt)
-        return list(existing_result.scalars().all())
+        return await _linked_dlcs(db_session, parent_title.id)
 
+    await lock_sync(db_session, SYNC_DLCS, parent_title.id)
     prior_stmt = select(Title.id).where(Title.parent_title_id == parent_title.id).limit(1)
     prior_result = await db_session.execute(prior_stmt)
     had_prior_dlcs = prior_result.scalar_one_or_none() is not None
@@ -68,6 +79,7 @@ async def sync_dlcs_from_igdb(db_session: AsyncSession, parent_title: Title) ->
         synced.append(title)
 
     await db_session.flush()
+    await mark_synced(db_session, SYNC_DLCS, parent_title.id)
 
     if had_new_dlc and had_prior_dlcs:
         from notifications.reminders import notify_title_owners_of_new_release
@@ -75,10 +87,4 @@ async def sync_dlcs_from_igdb(db_session: AsyncSession, parent_title: Title) ->
         await notify_title_owners_of_new_release(db_session, parent_title.id)
 
     # Include any previously linked children that IGDB no longer returns
-    existing_stmt = (
-        select(Title)
-        .where(Title.parent_title_id == parent_title.id)
-        .order_by(Title.release_year.asc().nulls_last(), Title.name.asc())
-    )
-    existing_result = await db_session.execute(existing_stmt)
-    return list(existing_result.scalars().all())
+    return await _linked_dlcs(db_session, parent_title.id)
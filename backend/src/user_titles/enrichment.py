@@ -0,0 +1,74 @@
+"""Background catalog enrichment (seasons, DLC) queued after a title is added."""
+
+import logging
+from typing import Any
+
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from core.models import Title, TitleCategory, TitleSeason
+from core.models.db_helper import db_helper
+from core.redis.queue import JobQueue
+
+from .dlc_sync import sync_dlcs_from_igdb
+from .structure_sync import supports_structure, sync_seasons_from_tmdb
+
+logger = logging.getLogger(__name__)
+
+JOB_SYNC_STRUCTURE = "sync_structure"
+JOB_SYNC_DLCS = "sync_dlcs"
+
+enrichment_queue = JobQueue("enrichment")
+
+
+async def enqueue_title_enrichment(title: Title) -> None:
+    """Schedule provider sync for a catalog title, deduplicated by title id.
+
+    Failing to enqueue is not fatal: structure and DLC endpoints still sync
+    lazily when the catalog is empty.
+    """
+    if supports_structure(title.category):
+        kind = JOB_SYNC_STRUCTURE
+    elif title.category == TitleCategory.GAME and not title.parent_title_id:
+        kind = JOB_SYNC_DLCS
+    else:
+        return
+
+    try:
+        await enrichment_queue.enqueue(
+            kind,
+            {"title_id": title.id},
+            dedupe_key=f"{kind}:{title.id}",
+        )
+    except RedisError:
+        logger.warning("Failed to enqueue %s for title %s", kind, title.id)
+
+
+async def _run_structure_sync(payload: dict[str, Any]) -> None:
+    async with db_helper.session_factory() as session:
+        stmt = (
+            select(Title)
+            .options(selectinload(Title.seasons).selectinload(TitleSeason.episodes))
+            .where(Title.id == payload["title_id"])
+        )
+        title = (await session.execute(stmt)).scalar_one_or_none()
+        if title is None:
+            return
+        await sync_seasons_from_tmdb(session, title)
+        await session.commit()
+
+
+async def _run_dlc_sync(payload: dict[str, Any]) -> None:
+    async with db_helper.session_factory() as session:
+        title = await session.get(Title, payload["title_id"])
+        if title is None:
+            return
+        await sync_dlcs_from_igdb(session, title)
+        await session.commit()
+
+
+ENRICHMENT_HANDLERS = {
+    JOB_SYNC_STRUCTURE: _run_structure_sync,
+    JOB_SYNC_DLCS: _run_dlc_sync,
+}
@@ -12,6 +12,14 @@ from core.models import Title, TitleCategory, TitleEpisode, TitleSeason, UserTit
 from core.shikimori_service import ShikimoriService
 from core.tmdb_service import TmdbService
 
+from .sync_guard import (
+    SYNC_EPISODES,
+    SYNC_SEASONS,
+    acquire_sync,
+    lock_sync,
+    mark_synced,
+)
+
 STRUCTURE_CATEGORIES = frozenset({TitleCategory.SERIES, TitleCategory.ANIME})
 
 
@@ -48,6 +56,26 @@ async def _fetch_episodes(
     return None
 
 
+async def _stored_seasons(db_session: AsyncSession, title_id: int) -> list[TitleSeason]:
+    stmt = (
+        select(TitleSeason)
+        .where(TitleSeason.title_id == title_id)
+        .order_by(TitleSeason.season_number)
+    )
+    result = await db_session.execute(stmt)
+    return list(result.scalars().all())
+
+
+async def _stored_episodes(
+    db_session: AsyncSession, title_season: TitleSeason
+) -> list[TitleEpisode]:
+    # TitleSeason.episodes uses selectin; if it was already loaded as empty
+    # before inserts, re-reads in the same session would otherwise stay empty.
+    db_session.expire(title_season, ["episodes"])
+    await db_session.refresh(title_season, attribute_names=["episodes"])
+    return sorted(title_season.episodes, key=lambda e: e.episode_number)
+
+
 async def sync_seasons_from_tmdb(
     db_session: AsyncSession,
     title: Title,
@@ -56,16 +84,16 @@ async def sync_seasons_from_tmdb(
     if not supports_structure(title.category) or not title.external_id:
         return []
 
+    if not await acquire_sync(db_session, SYNC_SEASONS, title.id):
+        # A concurrent request just synced this title; reuse its rows
+        return await _stored_seasons(db_session, title.id)
+
     seasons_data = await _fetch_seasons(title)
     if not seasons_data:
         # Fall back to whatever is already stored
-        stmt = (
-            select(TitleSeason)
-            .where(TitleSeason.title_id == title.id)
-            .order_by(TitleSeason.season_number)
-        )
-        result = await db_session.execute(stmt)
-        return list(result.scalars().all())
+        return await _stored_seasons(db_session, title.id)
+
+    await lock_sync(db_session, SYNC_SEASONS, title.id)
 
     existing_stmt = select(TitleSeason).where(TitleSeason.title_id == title.id)
     existing_result = await db_session.execute(existing_stmt)
@@ -91,6 +119,7 @@ async def sync_seasons_from_tmdb(
         synced.append(season)
 
     await db_session.flush()
+    await mark_synced(db_session, SYNC_SEASONS, title.id)
 
     if had_new_season and existing:
         from notifications.reminders import notify_title_owners_of_new_release
@@ -109,10 +138,15 @@ async def sync_season_episodes_from_tmdb(
     if not supports_structure(title.category) or not title.external_id:
         return list(title_season.episodes or [])
 
+    if not await acquire_sync(db_session, SYNC_EPISODES, title_season.id):
+        return await _stored_episodes(db_session, title_season)
+
     episodes_data = await _fetch_episodes(title, title_season.season_number)
     if episodes_data is None:
         return list(title_season.episodes or [])
 
+    await lock_sync(db_session, SYNC_EPISODES, title_season.id)
+
     existing_stmt = select(TitleEpisode).where(
         TitleEpisode.title_season_id == title_season.id
     )
@@ -136,11 +170,8 @@ async def sync_season_episodes_from_tmdb(
 
     title_season.episode_count = len(synced)
     await db_session.flush()
-    # TitleSeason.episodes uses selectin; if it was already loaded as empty
-    # before inserts, re-reads in the same session would otherwise stay empty.
-    db_session.expire(title_season, ["episodes"])
-    await db_session.refresh(title_season, attribute_names=["episodes"])
-    return sorted(title_season.episodes, key=lambda e: e.episode_number)
+    await mark_synced(db_session, SYNC_EPISODES, title_season.id)
+    return await _stored_episodes(db_session, title_season)
 
 
 async def sync_full_structure(
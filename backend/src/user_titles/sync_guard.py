@@ -0,0 +1,136 @@
+"""Coalesce concurrent catalog syncs of the same title across workers.
+
+One caller per (kind, id) pair fetches from the provider: the leader holds
+a short Redis lease while it does. Its transaction records the sync in
+`catalog_syncs` next to the rows it writes, so the record becomes visible
+exactly when those rows do and disappears with them on rollback. Other
+callers wait without holding any database lock, polling for that record,
+and reuse the leader's rows once it appears. If the leader fails, its
+lease is released and the next caller syncs instead.
+
+Writes are serialized by a transaction-level advisory lock that is taken
+only after the provider round-trip, for the rare case of two leaders (an
+expired lease, or Redis being down).
+"""
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+
+from redis.exceptions import RedisError
+from sqlalchemy import event, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from core.models import CatalogSync
+from core.redis.client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Advisory lock namespaces (first key of the two-key lock form)
+SYNC_SEASONS = 1
+SYNC_EPISODES = 2
+SYNC_DLCS = 3
+
+_KIND_NAMES = {
+    SYNC_SEASONS: "seasons",
+    SYNC_EPISODES: "episodes",
+    SYNC_DLCS: "dlcs",
+}
+
+# How long a finished sync is reused by later callers
+SYNC_REUSE_SECONDS = 60
+# Longest a leader may take; waiters sync themselves after that
+SYNC_LEASE_SECONDS = 30
+SYNC_POLL_SECONDS = 0.2
+
+_PENDING_KEY = "catalog_sync_leases"
+
+_background_releases: set[asyncio.Task] = set()
+
+
+def _lease_key(kind: int, object_id: int) -> str:
+    return f"catalog_sync:{_KIND_NAMES[kind]}:{object_id}"
+
+
+async def _recently_synced(db_session: AsyncSession, kind: int, object_id: int) -> bool:
+    # clock_timestamp, not now(): the caller's transaction may be old
+    cutoff = func.clock_timestamp() - timedelta(seconds=SYNC_REUSE_SECONDS)
+    synced = await db_session.scalar(
+        select(CatalogSync.synced_at).where(
+            CatalogSync.kind == kind,
+            CatalogSync.object_id == object_id,
+            CatalogSync.synced_at > cutoff,
+        )
+    )
+    return synced is not None
+
+
+async def acquire_sync(db_session: AsyncSession, kind: int, object_id: int) -> bool:
+    """Return True if the caller should sync the object, False to reuse its rows.
+
+    While another caller is syncing the object this waits for it, up to
+    SYNC_LEASE_SECONDS, without taking any database lock.
+    """
+    lease = _lease_key(kind, object_id)
+    deadline = time.monotonic() + SYNC_LEASE_SECONDS
+    while not await _recently_synced(db_session, kind, object_id):
+        try:
+            if await redis_client.set(lease, "1", nx=True, ex=SYNC_LEASE_SECONDS):
+                db_session.info.setdefault(_PENDING_KEY, set()).add(lease)
+                return True
+        except RedisError:
+            logger.warning("Sync lease unavailable; syncing %s", lease)
+            return True
+        if time.monotonic() >= deadline:
+            logger.warning("Gave up waiting for %s; syncing", lease)
+            return True
+        await asyncio.sleep(SYNC_POLL_SECONDS)
+    return False
+
+
+async def lock_sync(db_session: AsyncSession, kind: int, object_id: int) -> None:
+    """Serialize writes of the object's rows until the transaction ends.
+
+    Take it after the provider round-trip and before reading existing rows.
+    """
+    await db_session.execute(select(func.pg_advisory_xact_lock(kind, object_id)))
+
+
+async def mark_synced(db_session: AsyncSession, kind: int, object_id: int) -> None:
+    """Record the sync; waiters see it once the transaction commits."""
+    stmt = pg_insert(CatalogSync).values(
+        kind=kind, object_id=object_id, synced_at=func.clock_timestamp()
+    )
+    await db_session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["kind", "object_id"],
+            set_={"synced_at": stmt.excluded.synced_at},
+        )
+    )
+
+
+async def _release_leases(leases: set[str]) -> None:
+    try:
+        await redis_client.delete(*leases)
+    except RedisError:
+        logger.warning("Failed to release %s sync leases", len(leases))
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _schedule_release(session: Session) -> None:
+    # Only frees the lease early: the sync record is what waiters act on,
+    # and leases expire on their own
+    leases = session.info.pop(_PENDING_KEY, None)
+    if not leases:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(_release_leases(leases))
+    _background_releases.add(task)
+    task.add_done_callback(_background_releases.discard)
@@ -0,0 +1,79 @@
+"""Avatar processing and storage.
+
+Uploads are decoded, cropped square and resized to AVATAR_SIZES in the
+image process pool, then stored in S3 under a key derived from the
+upload's hash: `avatars/{user_id}/{digest}/{size}.webp`. A key's content
+never changes, so the objects are served with immutable cache headers and
+a new avatar always gets a new URL. `avatar_url` points at the
+AVATAR_URL_SIZE variant; clients swap the last path segment for others.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+from functools import partial
+
+from core.images import Variant, image_pool, render
+from core.s3 import IMMUTABLE_CACHE_CONTROL, parse_s3_key_from_url, s3_service
+
+logger = logging.getLogger(__name__)
+
+AVATAR_SIZES = (64, 128, 256)
+AVATAR_URL_SIZE = 256
+MAX_AVATAR_SIZE = 5 * 1024 * 1024  # 5 MB
+VARIANTS = tuple(Variant(str(size), size, size, crop=True) for size in AVATAR_SIZES)
+
+# Avatars uploaded before object storage lived on the API's local disk
+LEGACY_URL_PREFIX = "/static/avatars/"
+LEGACY_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "static", "avatars")
+
+
+def _prefix(user_id: int, digest: str) -> str:
+    return f"avatars/{user_id}/{digest}"
+
+
+async def store_avatar(user_id: int, data: bytes) -> str:
+    """Render and upload every size of an avatar; returns its `avatar_url`.
+
+    Raises OSError (or PIL's DecompressionBombError) for data that is not a
+    usable image.
+    """
+    digest = hashlib.sha256(data).hexdigest()[:32]
+    # Only the variants are stored, so the original is never re-encoded
+    rendered = await image_pool.run(partial(render, strip=False), data, VARIANTS)
+    prefix = _prefix(user_id, digest)
+    urls = await asyncio.gather(
+        *(
+            s3_service.upload_file(
+                rendered.variants[variant.name],
+                f"{prefix}/{variant.name}.webp",
+                "image/webp",
+                cache_control=IMMUTABLE_CACHE_CONTROL,
+            )
+            for variant in VARIANTS
+        )
+    )
+    return urls[AVATAR_SIZES.index(AVATAR_URL_SIZE)]
+
+
+def avatar_keys(user_id: int, avatar_url: str) -> list[str]:
+    """Every stored size of an avatar, or nothing if it is not one of ours."""
+    key = parse_s3_key_from_url(avatar_url)
+    # Never touch objects outside this user's avatars
+    if key is None or not key.startswith(f"avatars/{user_id}/"):
+        return []
+    prefix = key.rsplit("/", 1)[0]
+    return [f"{prefix}/{size}.webp" for size in AVATAR_SIZES]
+
+
+async def delete_legacy_avatar(avatar_url: str) -> None:
+    """Remove an avatar stored on local disk before object storage."""
+    if not avatar_url.startswith(LEGACY_URL_PREFIX):
+        return
+    filename = avatar_url.removeprefix(LEGACY_URL_PREFIX)
+    if filename and os.path.basename(filename) == filename:
+        try:
+            await asyncio.to_thread(os.remove, os.path.join(LEGACY_DIR, filename))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,242 @@
+"""Library comparison between two users, computed in Postgres.
+
+Both libraries are joined with a FULL OUTER JOIN on `title_id`. Bucket
+counts come from `FILTER` aggregates, and only the requested page of one
+bucket is sorted and fetched. Results are cached in Redis per user pair.
+The cache key includes a library version for each user. Any committed
+change to a user's library bumps that user's version, which invalidates
+every cached comparison that involves them.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any
+
+from redis.exceptions import RedisError
+from sqlalchemy import case, event, func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from core.models import Title, UserTitle, UserTitleStatus
+from core.redis.client import redis_client
+from titles.schemas import TitleRead
+
+from .compare_schemas import (
+    CompareBucket,
+    LibraryCompareCounts,
+    LibraryCompareItem,
+    LibraryCompareSide,
+)
+
+logger = logging.getLogger(__name__)
+
+COMPARE_CACHE_TTL_SECONDS = 60 * 60
+# Changes to these UserTitle fields can move a title to another bucket
+TRACKED_FIELDS = ("status", "score")
+
+_PENDING_KEY = "library_compare_changes"
+
+_background_bumps: set[asyncio.Task] = set()
+
+
+def _version_key(user_id: int) -> str:
+    return f"library:version:{user_id}"
+
+
+async def get_library_versions(*user_ids: int) -> list[str]:
+    """Current library version of each user, for keying derived caches.
+
+    Raises RedisError when Redis is unavailable.
+    """
+    versions = await redis_client.mget([_version_key(uid) for uid in user_ids])
+    return [v or "0" for v in versions]
+
+
+def _cache_key(
+    me: int, them: int, versions: list[str], bucket: str, limit: int, offset: int
+) -> str:
+    v_me, v_them = versions
+    return f"compare:{me}:{v_me}:{them}:{v_them}:{bucket}:{limit}:{offset}"
+
+
+def _library(user_id: int):
+    return (
+        select(UserTitle.id, UserTitle.title_id, UserTitle.status, UserTitle.score)
+        .join(Title, Title.id == UserTitle.title_id)
+        .where(UserTitle.user_id == user_id, Title.parent_title_id.is_(None))
+        .subquery()
+    )
+
+
+def _side(user_title_id: int | None, status, score) -> LibraryCompareSide:
+    if user_title_id is None:
+        return LibraryCompareSide()
+    return LibraryCompareSide(
+        status=status.value if hasattr(status, "value") else str(status),
+        score=score,
+        user_title_id=user_title_id,
+    )
+
+
+async def _compare(
+    db_session: AsyncSession,
+    me: int,
+    them: int,
+    bucket: CompareBucket,
+    *,
+    limit: int,
+    offset: int,
+) -> tuple[LibraryCompareCounts, list[LibraryCompareItem]]:
+    mine = _library(me)
+    theirs = _library(them)
+    completed = UserTitleStatus.COMPLETED
+    bucket_expr = case(
+        (mine.c.id.is_(None), "only_them"),
+        (theirs.c.id.is_(None), "only_me"),
+        (
+            (mine.c.status == completed) & (theirs.c.status == completed),
+            "both_completed",
+        ),
+        else_="both_other",
+    )
+    joined = (
+        select(
+            func.coalesce(mine.c.title_id, theirs.c.title_id).label("title_id"),
+            bucket_expr.label("bucket"),
+            mine.c.id.label("my_id"),
+            mine.c.status.label("my_status"),
+            mine.c.score.label("my_score"),
+            theirs.c.id.label("their_id"),
+            theirs.c.status.label("their_status"),
+            theirs.c.score.label("their_score"),
+        )
+        .select_from(mine.join(theirs, mine.c.title_id == theirs.c.title_id, full=True))
+        .cte("joined")
+    )
+
+    counts_stmt = select(
+        *(
+            func.count().filter(joined.c.bucket == name).label(name)
+            for name in LibraryCompareCounts.model_fields
+        )
+    )
+    counts = LibraryCompareCounts(
+        **(await db_session.execute(counts_stmt)).one()._asdict()
+    )
+
+    # Plain title columns: loading Title entities would pull their season trees
+    title_columns = [Title.__table__.c[name] for name in TitleRead.model_fields]
+    page_stmt = (
+        select(joined, *title_columns)
+        .join(Title, Title.id == joined.c.title_id)
+        .where(joined.c.bucket == bucket)
+        .order_by(func.lower(Title.name), Title.id)
+        .limit(limit)
+        .offset(offset)
+    )
+    result = await db_session.execute(page_stmt)
+    items = [
+        LibraryCompareItem(
+            title=TitleRead.model_validate(row),
+            me=_side(row.my_id, row.my_status, row.my_score),
+            them=_side(row.their_id, row.their_status, row.their_score),
+        )
+        for row in result.all()
+    ]
+    return counts, items
+
+
+async def compare_libraries(
+    db_session: AsyncSession,
+    me: int,
+    them: int,
+    bucket: CompareBucket,
+    *,
+    limit: int,
+    offset: int,
+) -> tuple[LibraryCompareCounts, list[LibraryCompareItem]]:
+    """Return the bucket counts and one page of `bucket`, cached per pair."""
+    key = None
+    try:
+        # Read versions before querying, so a racing write leaves a stale
+        # entry under a key nobody will ask for again
+        versions = await get_library_versions(me, them)
+        key = _cache_key(me, them, versions, bucket, limit, offset)
+        raw = await redis_client.get(key)
+    except RedisError:
+        logger.warning("Compare cache unavailable for users %s and %s", me, them)
+        raw = None
+
+    if raw is not None:
+        cached = json.loads(raw)
+        return (
+            LibraryCompareCounts.model_validate(cached["counts"]),
+            [LibraryCompareItem.model_validate(item) for item in cached["items"]],
+        )
+
+    counts, items = await _compare(
+        db_session, me, them, bucket, limit=limit, offset=offset
+    )
+
+    if key is not None:
+        payload: dict[str, Any] = {
+            "counts": counts.model_dump(mode="json"),
+            "items": [item.model_dump(mode="json") for item in items],
+        }
+        try:
+            await redis_client.set(
+                key, json.dumps(payload, ensure_ascii=False), ex=COMPARE_CACHE_TTL_SECONDS
+            )
+        except RedisError:
+            logger.warning("Failed to write compare cache key %s", key)
+    return counts, items
+
+
+# --- invalidation -------------------------------------------------------------
+
+
+async def bump_library_versions(user_ids: set[int]) -> None:
+    """Invalidate every cached comparison involving these users."""
+    if not user_ids:
+        return
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.incr(_version_key(user_id))
+        await pipe.execute()
+    except RedisError:
+        logger.warning("Failed to bump library versions of users %s", sorted(user_ids))
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_changed_libraries(session: Session, flush_context, instances) -> None:
+    changed: set[int] = session.info.setdefault(_PENDING_KEY, set())
+    for obj in (*session.new, *session.deleted):
+        if isinstance(obj, UserTitle) and obj.user_id is not None:
+            changed.add(obj.user_id)
+    for obj in session.dirty:
+        if not isinstance(obj, UserTitle):
+            continue
+        attrs = inspect(obj).attrs
+        if any(attrs[name].history.has_changes() for name in TRACKED_FIELDS):
+            changed.add(obj.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _schedule_bump(session: Session) -> None:
+    changed = session.info.pop(_PENDING_KEY, None)
+    if not changed:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(bump_library_versions(changed))
+    _background_bumps.add(task)
+    task.add_done_callback(_background_bumps.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_libraries(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -1,30 +1,51 @@
 from typing import Annotated, Any, Literal
 
-from sqlalchemy import select, or_, func, delete, insert
+from PIL import Image
+
+from sqlalchemy import select, or_, delete, false, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from litestar import Controller, get, post, patch, delete as litestar_delete, Request
+from litestar import Controller, get, post, patch, delete as litestar_delete, Request, Response
 from litestar.di import Provide
 from litestar.params import Parameter, Body
 from litestar.datastructures import UploadFile
 from litestar.enums import RequestEncodingType
-from litestar.exceptions import HTTPException, NotFoundException
+from litestar.exceptions import ClientException, HTTPException, NotFoundException
 from litestar.security.jwt import Token
 
+from auth.principal import invalidate_principal
 from core.models.db_helper import get_db_session
-from core.models import Title, User, UserTitle, UserTitleStatus
+from core.models import User
 from core.models.user import subscriptions_table
 from core.models.notification import Notification, NotificationType
+from core.pagination import keyset_page, paged_response, split_page
 from core.privacy import ensure_can_view_user_library
-from titles.schemas import TitleRead
+from core.s3 import FileTooLargeError, iter_upload, read_limited
+from feed.timeline import invalidate_timeline
+from storage.gc import schedule_deletion
 from .schemas import UserRead, UserProfileRead, UserProfileUpdate, FollowStatusResponse
-from .compare_schemas import (
-    LibraryCompareCounts,
-    LibraryCompareItem,
-    LibraryCompareResponse,
-    LibraryCompareSide,
-)
+from .compare import compare_libraries
+from .compare_schemas import LibraryCompareResponse
+from .avatars import MAX_AVATAR_SIZE, avatar_keys, delete_legacy_avatar, store_avatar
+
+# Room for the multipart boundaries and part headers around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+async def _adjust_follow_counts(
+    db_session: AsyncSession, follower_id: int, following_id: int, delta: int
+) -> None:
+    """Keep the denormalized counters in step with a subscriptions change."""
+    updates = {
+        follower_id: {"following_count": User.following_count + delta},
+        following_id: {"followers_count": User.followers_count + delta},
+    }
+    # Lock rows in id order so crossing follows (A->B, B->A) cannot deadlock
+    for user_id in sorted(updates):
+        await db_session.execute(
+            update(User).where(User.id == user_id).values(**updates[user_id])
+        )
 
 
 class UsersController(Controller):
@@ -72,33 +93,24 @@ class UsersController(Controller):
         db_session: AsyncSession,
     ) -> UserProfileRead:
         """Get user profile by ID with follower/following counts."""
-        user = await db_session.get(User, user_id)
-        if not user:
-            raise NotFoundException(detail="User not found")
-
-        # Follower count
-        follower_count_stmt = select(func.count()).select_from(subscriptions_table).where(
-            subscriptions_table.c.following_id == user_id
-        )
-        follower_result = await db_session.execute(follower_count_stmt)
-        followers_count = follower_result.scalar() or 0
-
-        # Following count
-        following_count_stmt = select(func.count()).select_from(subscriptions_table).where(
-            subscriptions_table.c.follower_id == user_id
-        )
-        following_result = await db_session.execute(following_count_stmt)
-        following_count = following_result.scalar() or 0
-
         # Is current user following this user?
-        is_following = False
         if request.user.id != user_id:
-            follow_check = select(func.count()).select_from(subscriptions_table).where(
-                subscriptions_table.c.follower_id == request.user.id,
-                subscriptions_table.c.following_id == user_id,
+            is_following_expr = (
+                select(subscriptions_table.c.follower_id)
+                .where(
+                    subscriptions_table.c.follower_id == request.user.id,
+                    subscriptions_table.c.following_id == user_id,
+                )
+                .exists()
             )
-            check_result = await db_session.execute(follow_check)
-            is_following = (check_result.scalar() or 0) > 0
+        else:
+            is_following_expr = false()
+
+        stmt = select(User, is_following_expr).where(User.id == user_id)
+        row = (await db_session.execute(stmt)).one_or_none()
+        if not row:
+            raise NotFoundException(detail="User not found")
+        user, is_following = row
 
         return UserProfileRead(
             id=user.id,
@@ -107,8 +119,8 @@ class UsersController(Controller):
             avatar_url=user.avatar_url,
             bio=user.bio,
             is_private=user.is_private,
-            followers_count=followers_count,
-            following_count=following_count,
+            followers_count=user.followers_count,
+            following_count=user.following_count,
             is_following=is_following,
         )
 
@@ -120,7 +132,9 @@ class UsersController(Controller):
         db_session: AsyncSession,
     ) -> UserRead:
         """Update current user's profile fields."""
-        user = request.user
+        user = await db_session.get(User, request.user.id)
+        if not user:
+            raise NotFoundException(detail="User not found")
         payload = data.model_dump(exclude_unset=True)
 
         if "name" in payload:
@@ -132,6 +146,7 @@ class UsersController(Controller):
 
         db_session.add(user)
         await db_session.commit()
+        await invalidate_principal(user.id)
         await db_session.refresh(user)
         return UserRead.model_validate(user)
 
@@ -154,21 +169,17 @@ class UsersController(Controller):
         if not target:
             raise NotFoundException(detail="User not found")
 
-        # Check if already following
-        check_stmt = select(func.count()).select_from(subscriptions_table).where(
-            subscriptions_table.c.follower_id == current_user_id,
-            subscriptions_table.c.following_id == user_id,
+        # Insert subscription; a concurrent follow makes this a no-op
+        stmt = (
+            pg_insert(subscriptions_table)
+            .values(follower_id=current_user_id, following_id=user_id)
+            .on_conflict_do_nothing()
         )
-        result = await db_session.execute(check_stmt)
-        if (result.scalar() or 0) > 0:
+        result = await db_session.execute(stmt)
+        if not result.rowcount:
             return FollowStatusResponse(is_following=True)
 
-        # Insert subscription
-        stmt = insert(subscriptions_table).values(
-            follower_id=current_user_id,
-            following_id=user_id,
-        )
-        await db_session.execute(stmt)
+        await _adjust_follow_counts(db_session, current_user_id, user_id, 1)
 
         # Notify the followed user
         notification = Notification(
@@ -180,6 +191,7 @@ class UsersController(Controller):
         db_session.add(notification)
 
         await db_session.commit()
+        await invalidate_timeline(current_user_id)
 
         return FollowStatusResponse(is_following=True)
 
@@ -197,8 +209,12 @@ class UsersController(Controller):
             subscriptions_table.c.follower_id == current_user_id,
             subscriptions_table.c.following_id == user_id,
         )
-        await db_session.execute(stmt)
+        result = await db_session.execute(stmt)
+        if result.rowcount:
+            await _adjust_follow_counts(db_session, current_user_id, user_id, -1)
         await db_session.commit()
+        if result.rowcount:
+            await invalidate_timeline(current_user_id)
 
         return FollowStatusResponse(is_following=False)
 
@@ -224,89 +240,15 @@ class UsersController(Controller):
 
         await ensure_can_view_user_library(user_id, request.user.id, db_session)
 
-        async def load_library(uid: int) -> dict[int, UserTitle]:
-            stmt = (
-                select(UserTitle)
-                .join(Title, Title.id == UserTitle.title_id)
-                .options(selectinload(UserTitle.title))
-                .where(
-                    UserTitle.user_id == uid,
-                    Title.parent_title_id.is_(None),
-                )
-            )
-            result = await db_session.execute(stmt)
-            return {ut.title_id: ut for ut in result.scalars().unique().all()}
-
-        mine = await load_library(request.user.id)
-        theirs = await load_library(user_id)
-
-        both_completed: list[int] = []
-        only_me: list[int] = []
-        only_them: list[int] = []
-        both_other: list[int] = []
-
-        all_ids = set(mine) | set(theirs)
-        for title_id in all_ids:
-            my_ut = mine.get(title_id)
-            their_ut = theirs.get(title_id)
-            if my_ut and their_ut:
-                if (
-                    my_ut.status == UserTitleStatus.COMPLETED
-                    and their_ut.status == UserTitleStatus.COMPLETED
-                ):
-                    both_completed.append(title_id)
-                else:
-                    both_other.append(title_id)
-            elif my_ut:
-                only_me.append(title_id)
-            else:
-                only_them.append(title_id)
-
-        counts = LibraryCompareCounts(
-            both_completed=len(both_completed),
-            only_me=len(only_me),
-            only_them=len(only_them),
-            both_other=len(both_other),
+        counts, items = await compare_libraries(
+            db_session,
+            request.user.id,
+            user_id,
+            bucket,
+            limit=min(limit, 100),
+            offset=offset,
         )
 
-        bucket_map = {
-            "both_completed": both_completed,
-            "only_me": only_me,
-            "only_them": only_them,
-            "both_other": both_other,
-        }
-        selected_ids = bucket_map[bucket]
-
-        def sort_key(tid: int) -> str:
-            ut = mine.get(tid) or theirs.get(tid)
-            return (ut.title.name if ut else "").lower()
-
-        selected_ids = sorted(selected_ids, key=sort_key)
-        page_ids = selected_ids[offset : offset + min(limit, 100)]
-
-        def side(ut: UserTitle | None) -> LibraryCompareSide:
-            if not ut:
-                return LibraryCompareSide()
-            status = ut.status.value if hasattr(ut.status, "value") else str(ut.status)
-            return LibraryCompareSide(
-                status=status,
-                score=ut.score,
-                user_title_id=ut.id,
-            )
-
-        items: list[LibraryCompareItem] = []
-        for tid in page_ids:
-            my_ut = mine.get(tid)
-            their_ut = theirs.get(tid)
-            title = (my_ut or their_ut).title  # type: ignore[union-attr]
-            items.append(
-                LibraryCompareItem(
-                    title=TitleRead.model_validate(title),
-                    me=side(my_ut),
-                    them=side(their_ut),
-                )
-            )
-
         return LibraryCompareResponse(
             other_user=UserRead.model_validate(other),
             counts=counts,
@@ -321,21 +263,34 @@ class UsersController(Controller):
         db_session: AsyncSession,
         limit: int = 50,
         offset: int = 0,
-    ) -> list[UserRead]:
-        """Get list of users who follow this user."""
-        stmt = (
-            select(User)
+        cursor: str | None = None,
+    ) -> Response[list[UserRead]]:
+        """Get list of users who follow this user, most recent first."""
+        stmt = keyset_page(
+            select(
+                User,
+                subscriptions_table.c.created_at.label("followed_at"),
+                subscriptions_table.c.follower_id,
+            )
             .join(
                 subscriptions_table,
                 subscriptions_table.c.follower_id == User.id,
             )
-            .where(subscriptions_table.c.following_id == user_id)
-            .limit(limit)
-            .offset(offset)
+            .where(subscriptions_table.c.following_id == user_id),
+            subscriptions_table.c.created_at,
+            # The subscription column, not users.id, so the index covers the keyset
+            subscriptions_table.c.follower_id,
+            limit=limit,
+            cursor=cursor,
+            offset=offset,
         )
         result = await db_session.execute(stmt)
-        users = result.scalars().all()
-        return [UserRead.model_validate(u) for u in users]
+        rows, next_cursor = split_page(
+            result.all(), limit, lambda row: (row.followed_at, row.follower_id)
+        )
+        return paged_response(
+            [UserRead.model_validate(row.User) for row in rows], next_cursor
+        )
 
     @get("/{user_id:int}/following")
     async def get_following(
@@ -344,23 +299,37 @@ class UsersController(Controller):
         db_session: AsyncSession,
         limit: int = 50,
         offset: int = 0,
-    ) -> list[UserRead]:
-        """Get list of users this user follows."""
-        stmt = (
-            select(User)
+        cursor: str | None = None,
+    ) -> Response[list[UserRead]]:
+        """Get list of users this user follows, most recent first."""
+        stmt = keyset_page(
+            select(
+                User,
+                subscriptions_table.c.created_at.label("followed_at"),
+                subscriptions_table.c.following_id,
+            )
             .join(
                 subscriptions_table,
                 subscriptions_table.c.following_id == User.id,
             )
-            .where(subscriptions_table.c.follower_id == user_id)
-            .limit(limit)
-            .offset(offset)
+            .where(subscriptions_table.c.follower_id == user_id),
+            subscriptions_table.c.created_at,
+            # The subscription column, not users.id, so the index covers the keyset
+            subscriptions_table.c.following_id,
+            limit=limit,
+            cursor=cursor,
+            offset=offset,
         )
         result = await db_session.execute(stmt)
-        users = result.scalars().all()
-        return [UserRead.model_validate(u) for u in users]
+        rows, next_cursor = split_page(
+            result.all(), limit, lambda row: (row.followed_at, row.following_id)
+        )
+        return paged_response(
+            [UserRead.model_validate(row.User) for row in rows], next_cursor
+        )
 
-    @post("/me/avatar")
+    # Oversized bodies are refused while being received, before any parsing
+    @post("/me/avatar", request_max_body_size=MAX_AVATAR_SIZE + MULTIPART_OVERHEAD)
     async def upload_avatar(
         self,
         request: Request[User, dict, Any],
@@ -368,27 +337,36 @@ class UsersController(Controller):
         data: Annotated[UploadFile, Body(media_type=RequestEncodingType.MULTI_PART)],
     ) -> UserRead:
         """Upload user avatar."""
-        import os
-        from uuid import uuid4
-        
         user_id = request.user.id
-        avatar = data
-        
-        static_dir = os.path.join(os.getcwd(), "static", "avatars")
-        os.makedirs(static_dir, exist_ok=True)
-        
-        ext = avatar.filename.split('.')[-1] if '.' in avatar.filename else 'png'
-        filename = f"user_{user_id}_{uuid4().hex}.{ext}"
-        file_path = os.path.join(static_dir, filename)
-        
-        content = await avatar.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
-            
-        request.user.avatar_url = f"/static/avatars/{filename}"
-        
-        db_session.add(request.user)
+
+        try:
+            content = await read_limited(iter_upload(data), MAX_AVATAR_SIZE)
+            avatar_url = await store_avatar(user_id, content)
+        except FileTooLargeError:
+            raise ClientException(
+                detail="Файл слишком большой (макс. 5 МБ)",
+                status_code=400,
+            )
+        except (OSError, Image.DecompressionBombError):
+            raise ClientException(
+                detail="Неподдерживаемый формат. Допустимые: JPEG, PNG, WebP, GIF",
+                status_code=400,
+            )
+
+        user = await db_session.get(User, user_id)
+        if not user:
+            raise NotFoundException(detail="User not found")
+        previous_url = user.avatar_url
+        user.avatar_url = avatar_url
+
+        db_session.add(user)
         await db_session.commit()
-        await db_session.refresh(request.user)
-        
-        return UserRead.model_validate(request.user)
+        await invalidate_principal(user_id)
+        await db_session.refresh(user)
+
+        # Re-uploading the same image yields the same URL; keep it then
+        if previous_url and previous_url != avatar_url:
+            await schedule_deletion(avatar_keys(user_id, previous_url))
+            await delete_legacy_avatar(previous_url)
+
+        return UserRead.model_validate(user)
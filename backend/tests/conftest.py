@@ -0,0 +1,19 @@
+import os
+import sys
+
+# Settings are read at import time; tests never reach these services
+for name, value in {
+    "POSTGRES_USER": "test",
+    "POSTGRES_PASSWORD": "test",
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+    "POSTGRES_DB": "test",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+    "REDIS_DB": "0",
+    "REDIS_PASSWORD": "",
+    "S3_BUCKET_NAME": "bucket",
+}.items():
+    os.environ.setdefault(name, value)
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
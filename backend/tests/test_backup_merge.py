@@ -0,0 +1,165 @@
+"""Merge imports against an in-memory library.
+
+The session below answers only the statements the importer's user title
+and screenshot steps issue, which is enough to replay merges back to back.
+"""
+
+import asyncio
+import re
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from backup.importer import BackupImporter
+from backup.schemas import BackupItem
+from core.models import TitleScreenshot
+from core.models.title import TitleCategory, UserTitle, UserTitleStatus
+
+USER_ID = 1
+TITLE_ID = 10
+EXPORTED_AT = datetime(2026, 10, 1, 12, 0)
+IMPORTED_AT = datetime(2026, 10, 17, 9, 0)
+
+_MULTI_PARAM = re.compile(r"^(\w+)_m(\d+)$")
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return list(self._rows)
+
+    def scalars(self):
+        return _Result([row[0] for row in self._rows])
+
+
+class FakeLibrary:
+    def __init__(self):
+        self.user_titles: dict[tuple[int, int], SimpleNamespace] = {}
+        self.screenshots: list[SimpleNamespace] = []
+        self._next_id = 100
+
+    def _new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    async def load(self, columns, filter_column, values, *where):
+        values = set(values)
+        if filter_column.table is UserTitle.__table__:
+            return [row for row in self.user_titles.values() if row.title_id in values]
+        return [row for row in self.screenshots if row.user_title_id in values]
+
+    async def execute(self, stmt):
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        if stmt.is_delete:
+            (user_title_ids,) = compiled.params.values()
+            self.screenshots = [
+                row for row in self.screenshots if row.user_title_id not in user_title_ids
+            ]
+            return _Result([])
+
+        rows: dict[int, dict] = {}
+        for name, value in compiled.params.items():
+            match = _MULTI_PARAM.match(name)
+            if match:
+                rows.setdefault(int(match[2]), {})[match[1]] = value
+        if stmt.table.name == TitleScreenshot.__tablename__:
+            ids = []
+            for values in rows.values():
+                ids.append(self._new_id())
+                self.screenshots.append(SimpleNamespace(id=ids[-1], **values))
+            return _Result([(screenshot_id,) for screenshot_id in ids])
+
+        # The upsert's SET clause decides what an existing row keeps
+        keeps_stamp = "updated_at = excluded.updated_at" in str(compiled)
+        returned = []
+        for values in rows.values():
+            values.setdefault("updated_at", IMPORTED_AT)
+            key = (values["user_id"], values["title_id"])
+            current = self.user_titles.get(key)
+            if current is None:
+                current = self.user_titles[key] = SimpleNamespace(
+                    id=self._new_id(), **values
+                )
+            else:
+                vars(current).update(values)
+                if not keeps_stamp:
+                    current.updated_at = IMPORTED_AT
+            returned.append((current.id, current.user_id, current.title_id))
+        return _Result(returned)
+
+    async def merge(self, item: BackupItem) -> BackupImporter:
+        importer = BackupImporter(self, USER_ID, merge=True)
+        importer._load = self.load
+        ut_by_title = await importer._sync_user_titles([item], [TITLE_ID], [[]])
+        await importer._sync_screenshots([item], [ut_by_title[TITLE_ID]])
+        return importer
+
+    def screenshot_urls(self) -> list[str]:
+        return [
+            row.url for row in sorted(self.screenshots, key=lambda row: row.position)
+        ]
+
+
+def _item(**overrides) -> BackupItem:
+    values = {
+        "type": TitleCategory.MOVIE,
+        "title": "Title",
+        "external_id": "1",
+        "status": UserTitleStatus.COMPLETED,
+        "score": 8.0,
+        "updated_at": EXPORTED_AT,
+        "screenshots": ["https://s3.example/bucket/shots/a.webp"],
+    }
+    values.update(overrides)
+    return BackupItem(**values)
+
+
+def test_merged_row_keeps_backup_timestamp():
+    library = FakeLibrary()
+    asyncio.run(library.merge(_item()))
+
+    (row,) = library.user_titles.values()
+    assert row.updated_at == EXPORTED_AT
+
+
+def test_second_merge_applies_screenshot_only_change():
+    library = FakeLibrary()
+    asyncio.run(library.merge(_item()))
+    shots = [
+        "https://s3.example/bucket/shots/a.webp",
+        "https://s3.example/bucket/shots/b.webp",
+    ]
+    importer = asyncio.run(library.merge(_item(screenshots=shots)))
+
+    assert not importer._kept_user_title_ids
+    assert library.screenshot_urls() == shots
+    (row,) = library.user_titles.values()
+    assert row.updated_at == EXPORTED_AT
+
+
+def test_second_merge_applies_later_edit():
+    library = FakeLibrary()
+    asyncio.run(library.merge(_item()))
+    edited_at = EXPORTED_AT + timedelta(days=1)
+    asyncio.run(library.merge(_item(score=9.0, updated_at=edited_at)))
+
+    (row,) = library.user_titles.values()
+    assert row.score == 9.0
+    assert row.updated_at == edited_at
+
+
+def test_second_merge_keeps_library_edit():
+    library = FakeLibrary()
+    asyncio.run(library.merge(_item()))
+    (row,) = library.user_titles.values()
+    row.score = 5.0
+    row.updated_at = EXPORTED_AT + timedelta(days=1)
+    shots = ["https://s3.example/bucket/shots/b.webp"]
+    importer = asyncio.run(library.merge(_item(screenshots=shots)))
+
+    assert importer._kept_user_title_ids == {row.id}
+    assert row.score == 5.0
+    assert library.screenshot_urls() == ["https://s3.example/bucket/shots/a.webp"]
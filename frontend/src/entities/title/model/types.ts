@@ -28,6 +28,11 @@ export enum GamePlatform {
 export interface Screenshot {
   id: number;
   url: string;
+  thumbnail_url: string;
+  original_url: string;
+  width: number | null;
+  height: number | null;
+  blurhash: string | null;
   position: number;
 }
 
@@ -22,6 +22,7 @@ export interface NotificationData {
   user_title_id: number | null;
   actor: NotificationActor;
   title: NotificationTitle | null;
+  source: 'notification' | 'activity';
 }
 
 export interface UnreadCountResponse {
@@ -35,8 +36,11 @@ export const notificationsApi = {
   getUnreadCount: () =>
     apiClient.get<UnreadCountResponse>('/notifications/unread-count'),
 
-  markAsRead: (id: number) =>
-    apiClient.request<NotificationData>(`/notifications/${id}/read`, { method: 'PATCH' }),
+  markAsRead: (id: number, source: NotificationData['source'] = 'notification') =>
+    apiClient.request<NotificationData>(
+      source === 'activity' ? `/notifications/activity/${id}/read` : `/notifications/${id}/read`,
+      { method: 'PATCH' },
+    ),
 
   markAllAsRead: () =>
     apiClient.request<{ status: string }>('/notifications/read-all', { method: 'PATCH' }),
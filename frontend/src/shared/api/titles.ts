@@ -14,9 +14,21 @@ export type TitleType = 'game' | 'movie' | 'tv' | 'series' | 'anime' | 'manga' |
 export interface Screenshot {
   id: number;
   url: string;
+  thumbnail_url: string;
+  original_url: string;
+  width: number | null;
+  height: number | null;
+  blurhash: string | null;
   position: number;
 }
 
+export interface ScreenshotUploadTicket {
+  s3_key: string;
+  url: string;
+  fields: Record<string, string>;
+  expires_in: number;
+}
+
 export interface ReviewViewsResponse {
   count: number;
   viewers: User[];
@@ -88,10 +100,25 @@ export const titlesApi = {
   getUserTitles: (userId: number) =>
     apiClient.get<UserTitle[]>(`/titles/user/${userId}`),
 
-  uploadScreenshot: (userTitleId: number, file: File) => {
+  // The file goes straight to storage through a presigned form, then the
+  // backend confirms it and creates the screenshot
+  uploadScreenshot: async (userTitleId: number, file: File) => {
+    const ticket = await apiClient.post<ScreenshotUploadTicket>(
+      `/screenshots/upload-url/${userTitleId}`,
+      { content_type: file.type },
+    );
     const formData = new FormData();
-    formData.append('data', file);
-    return apiClient.postFormData<Screenshot>(`/screenshots/upload/${userTitleId}`, formData);
+    for (const [name, value] of Object.entries(ticket.fields)) {
+      formData.append(name, value);
+    }
+    formData.append('file', file);
+    const response = await fetch(ticket.url, { method: 'POST', body: formData });
+    if (!response.ok) {
+      throw new Error(`Upload failed: ${response.status}`);
+    }
+    return apiClient.post<Screenshot>(`/screenshots/confirm/${userTitleId}`, {
+      s3_key: ticket.s3_key,
+    });
   },
 
   deleteScreenshot: (screenshotId: number) =>
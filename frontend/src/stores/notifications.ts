@@ -28,11 +28,19 @@ export const useNotificationStore = defineStore('notifications', () => {
     }
   }
 
-  async function markAsRead(id: number) {
+  async function markAsRead(id: number, source: NotificationData['source'] = 'notification') {
     try {
-      const updated = await notificationsApi.markAsRead(id);
+      const updated = await notificationsApi.markAsRead(id, source);
+      if (source === 'activity') {
+        // Activities share a read cursor: everything up to this one is read now
+        notifications.value = notifications.value.map(n =>
+          n.source === 'activity' && n.created_at <= updated.created_at ? { ...n, is_read: true } : n,
+        );
+        await fetchUnreadCount();
+        return;
+      }
       // Update in local list
-      const idx = notifications.value.findIndex(n => n.id === id);
+      const idx = notifications.value.findIndex(n => n.id === id && n.source !== 'activity');
       if (idx !== -1) {
         notifications.value[idx] = updated;
       }